@@ -0,0 +1,250 @@
+"""
+Vectorized graph analytics over the thought network.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Analytics are optional; the rest of gistghost runs without NumPy
+    np = None
+
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-10
+PAGERANK_MAX_ITERATIONS = 100
+
+
+def endorses(relationship_type: str) -> bool:
+    """Whether an edge, in its recorded direction, points at the thought it builds on.
+
+    Evolutions are followed child -> parent (``evolved_from``) and semantic
+    links from the linking thought to the linked one; their mirror edges
+    (``evolved_to``, ``reverse_*``) are skipped so each link counts once.
+    """
+    return relationship_type == 'evolved_from' or not (
+        relationship_type == 'evolved_to' or relationship_type.startswith('reverse_')
+    )
+
+
+class CSRGraph:
+    """Directed thought graph in compressed sparse row form.
+
+    Thoughts are numbered ``0..n-1`` in ``ids``. The edges leaving node ``i``
+    are ``indices[indptr[i]:indptr[i + 1]]``, and ``edge_types`` holds a code
+    into ``types`` for each of them.
+    """
+    
+    def __init__(self, ids: List[str], types: List[str], indptr: 'np.ndarray',
+                 indices: 'np.ndarray', edge_types: 'np.ndarray'):
+        """Wrap already compiled CSR arrays."""
+        self.ids = ids
+        self.types = types
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_types = edge_types
+    
+    @property
+    def node_count(self) -> int:
+        """Number of thoughts."""
+        return len(self.ids)
+    
+    @property
+    def edge_count(self) -> int:
+        """Number of edges."""
+        return len(self.indices)
+    
+    @classmethod
+    def from_edges(cls, gist_ids: Iterable[str],
+                   edges: Iterable[Tuple[str, str, str]]) -> 'CSRGraph':
+        """Compile thought ids and ``(from_gist, to_gist, type)`` edges.
+
+        Only edges that ``endorses`` are kept, and edges to or from gists
+        that are not in ``gist_ids`` are dropped.
+        """
+        if np is None:
+            raise ImportError("Graph analytics need NumPy: pip install numpy")
+        
+        ids = list(gist_ids)
+        node_of = {gist_id: node for node, gist_id in enumerate(ids)}
+        type_codes: Dict[str, int] = {}
+        sources, targets, codes = array('q'), array('q'), array('q')
+        
+        for from_gist, to_gist, relationship_type in edges:
+            if not endorses(relationship_type):
+                continue
+            source = node_of.get(from_gist)
+            target = node_of.get(to_gist)
+            if source is None or target is None:
+                continue
+            sources.append(source)
+            targets.append(target)
+            codes.append(type_codes.setdefault(relationship_type, len(type_codes)))
+        
+        sources = np.frombuffer(sources, dtype=np.int64)
+        targets = np.frombuffer(targets, dtype=np.int64)
+        codes = np.frombuffer(codes, dtype=np.int64)
+        
+        order = np.argsort(sources, kind='stable')
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(ids)), out=indptr[1:])
+        
+        return cls(
+            ids,
+            list(type_codes),
+            indptr,
+            targets[order].astype(np.int32),
+            codes[order].astype(np.int16)
+        )
+    
+    def sources(self) -> 'np.ndarray':
+        """Source node of every edge, aligned with ``indices``."""
+        return np.repeat(np.arange(self.node_count, dtype=np.int32), np.diff(self.indptr))
+    
+    def out_degree(self) -> 'np.ndarray':
+        """Number of edges leaving each node."""
+        return np.diff(self.indptr)
+    
+    def in_degree(self) -> 'np.ndarray':
+        """Number of edges entering each node."""
+        return np.bincount(self.indices, minlength=self.node_count)
+    
+    def pagerank(self) -> 'np.ndarray':
+        """PageRank of every node, by power iteration.
+
+        Rank held by nodes without outgoing edges is spread evenly over all
+        nodes, so the scores always sum to 1.
+        """
+        n = self.node_count
+        if not n:
+            return np.zeros(0)
+        
+        sources = self.sources()
+        out_degree = self.out_degree()
+        dangling = out_degree == 0
+        inverse_degree = np.zeros(n)
+        inverse_degree[~dangling] = 1.0 / out_degree[~dangling]
+        
+        rank = np.full(n, 1.0 / n)
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            flow = np.bincount(
+                self.indices, weights=(rank * inverse_degree)[sources], minlength=n
+            )
+            new_rank = (1 - PAGERANK_DAMPING) / n + PAGERANK_DAMPING * (flow + rank[dangling].sum() / n)
+            converged = np.abs(new_rank - rank).sum() < PAGERANK_TOLERANCE
+            rank = new_rank
+            if converged:
+                break
+        
+        return rank
+    
+    def components(self) -> 'np.ndarray':
+        """Weakly connected component label of every node.
+
+        Each label is the smallest node number in its component. Components
+        are merged by hooking roots onto smaller roots across every edge at
+        once and then shortcutting labels until they point at roots, which
+        takes a handful of rounds even on long evolution chains.
+        """
+        labels = np.arange(self.node_count)
+        sources = self.sources()
+        
+        while True:
+            low = np.minimum(labels[sources], labels[self.indices])
+            high = np.maximum(labels[sources], labels[self.indices])
+            merging = low != high
+            if not merging.any():
+                return labels
+            
+            np.minimum.at(labels, high[merging], low[merging])
+            while True:
+                shortcut = labels[labels]
+                if np.array_equal(shortcut, labels):
+                    break
+                labels = shortcut
+    
+    def evolution_roots(self) -> 'np.ndarray':
+        """Root of the evolution tree of every node (itself if it has no parent).
+        
+        Parent pointers are doubled until they reach the roots; a (corrupt)
+        evolution cycle stops after enough rounds for any acyclic chain.
+        """
+        parent = np.arange(self.node_count)
+        evolved_from = self.types.index('evolved_from') if 'evolved_from' in self.types else -1
+        is_evolution = self.edge_types == evolved_from
+        parent[self.sources()[is_evolution]] = self.indices[is_evolution]
+        
+        for _ in range(self.node_count.bit_length() + 1):
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        return parent
+
+
+def _top_nodes(values: 'np.ndarray', top: int) -> 'np.ndarray':
+    """Nodes with the ``top`` largest values, largest first."""
+    count = min(top, len(values))
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    candidates = np.argpartition(-values, count - 1)[:count]
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
+
+def analyze_network(graph: CSRGraph, top: int = 10) -> Dict[str, Any]:
+    """PageRank, degrees, connected components and influential evolution roots."""
+    n = graph.node_count
+    in_degree = graph.in_degree()
+    out_degree = graph.out_degree()
+    rank = graph.pagerank()
+    
+    labels = graph.components()
+    component_sizes = np.bincount(labels, minlength=n)
+    component_count = int((component_sizes > 0).sum())
+    
+    # An evolution root matters by how much rank its whole tree gathers
+    roots = graph.evolution_roots()
+    tree_sizes = np.bincount(roots, minlength=n)
+    tree_rank = np.bincount(roots, weights=rank, minlength=n)
+    is_root = tree_sizes > 1
+    
+    def ranked(values: 'np.ndarray', key: str, limit: int = top) -> List[Dict[str, Any]]:
+        return [
+            {'gist_id': graph.ids[node], key: values[node].item()}
+            for node in _top_nodes(values, limit)
+        ]
+    
+    return {
+        'nodes': n,
+        'edges': graph.edge_count,
+        'relationship_types': {
+            relationship_type: int(count)
+            for relationship_type, count in zip(
+                graph.types, np.bincount(graph.edge_types, minlength=len(graph.types))
+            )
+        },
+        'pagerank': ranked(rank, 'score'),
+        'degree': {
+            'mean': graph.edge_count / n if n else 0.0,
+            'top_in': ranked(in_degree, 'degree'),
+            'top_out': ranked(out_degree, 'degree')
+        },
+        'components': {
+            'count': component_count,
+            'isolated': int((component_sizes == 1).sum()),
+            'largest': [
+                {'gist_id': graph.ids[node], 'size': component_sizes[node].item()}
+                for node in _top_nodes(component_sizes, min(top, component_count))
+            ]
+        },
+        'evolution_roots': [
+            {
+                'gist_id': graph.ids[node],
+                'tree_size': tree_sizes[node].item(),
+                'influence': tree_rank[node].item()
+            }
+            for node in _top_nodes(np.where(is_root, tree_rank, -1.0), min(top, int(is_root.sum())))
+        ]
+    }
@@ -0,0 +1,455 @@
+"""
+Async GitHub API client for GistGhost, for bulk gist operations.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+
+from gist import BUNDLE_MARKER, Gist, split_thought_key, thought_key
+from http_cache import HTTPCache
+from rate_limit import DEFAULT_PRIORITY, RateLimitScheduler, backoff_delay
+
+try:
+    import h2  # noqa: F401 -- only probed; httpx speaks HTTP/2 through it
+except ImportError:  # HTTP/2 is optional; HTTP/1.1 keep-alive connections are used instead
+    h2 = None
+
+# Statuses worth resending after a pause: GitHub is briefly unavailable
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Network failures that guarantee the request never reached GitHub
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _rate_limited(response: httpx.Response) -> bool:
+    """Whether GitHub refused a request because of its primary or secondary rate limit."""
+    if response.status_code not in (403, 429):
+        return False
+    return (
+        response.headers.get('X-RateLimit-Remaining') == '0'
+        or 'Retry-After' in response.headers
+        or 'rate limit' in response.text.lower()
+    )
+
+
+class AsyncGitHubClient:
+    """Async GitHub API client for managing Gists.
+
+    Requests share one pooled connection (HTTP/2 when the ``h2`` package is
+    installed, so concurrent requests multiplex over it). At most
+    ``concurrency`` requests are in flight at once, which bounds the
+    ``*_many`` bulk calls.
+
+    With an ``HTTPCache``, GETs are sent as conditional requests and
+    unchanged resources are read from the cache instead of downloaded again.
+
+    Requests go out when the ``RateLimitScheduler`` allows, highest
+    ``priority`` first. Rate-limited requests are resent once the limit is
+    over, and failed ones after an exponential backoff, up to the
+    scheduler's ``max_retries``. A POST is never resent once it may have
+    reached GitHub, since that could create the gist twice.
+    """
+    
+    BASE_URL = "https://api.github.com"
+    DEFAULT_CONCURRENCY = 8
+    # Files per bundled gist; GitHub only lists the first 300 files of a gist
+    MAX_BUNDLE_FILES = 300
+    
+    def __init__(self, token: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 http2: Optional[bool] = None, base_url: Optional[str] = None,
+                 timeout: float = 30.0, cache: Optional[HTTPCache] = None,
+                 scheduler: Optional[RateLimitScheduler] = None):
+        """Initialize the client; ``http2`` defaults to whether HTTP/2 support is installed."""
+        self.token = token
+        self.cache = cache
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.concurrency = max(1, concurrency)
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        
+        headers = {}
+        if token:
+            headers = {
+                'Authorization': f'token {token}',
+                'Accept': 'application/vnd.github.v3+json',
+                'User-Agent': 'GistGhost/1.0.0'
+            }
+        
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            http2=h2 is not None if http2 is None else http2,
+            limits=httpx.Limits(
+                max_connections=self.concurrency, max_keepalive_connections=self.concurrency
+            ),
+            timeout=timeout
+        )
+        # Created inside the running event loop on first use
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def __aenter__(self) -> 'AsyncGitHubClient':
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self.client.aclose()
+    
+    async def request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                      priority: int = DEFAULT_PRIORITY) -> Any:
+        """Make an authenticated request to the GitHub API, ordered by ``priority`` (1-10)."""
+        if not self.token:
+            raise ValueError("GitHub token is required for API operations")
+        
+        method = method.upper()
+        if method not in ('GET', 'POST', 'PATCH', 'DELETE'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        
+        url = f"{self.base_url}{endpoint}"
+        cached = None
+        headers = {}
+        if method == 'GET' and self.cache is not None:
+            url = str(httpx.URL(url, params=data))
+            data = None
+            cached = self.cache.lookup(url, self.token)
+            headers = self.cache.conditional_headers(cached)
+        
+        response = await self._send(method, url, data, headers, priority)
+        
+        if cached is not None and response.status_code == 304:
+            self.cache.hit(url, self.token)
+            return json.loads(cached['body']) if cached['body'] else {}
+        
+        # Handle rate limiting that outlasted the retries
+        if _rate_limited(response):
+            raise Exception("GitHub API rate limit exceeded. Please try again later.")
+        
+        # Handle other errors
+        if not response.is_success:
+            if cached is not None and response.status_code in (404, 410):
+                self.cache.discard(url, self.token)
+            raise Exception(f"GitHub API error ({response.status_code}): {response.text}")
+        
+        if method == 'GET' and self.cache is not None:
+            self.cache.store(
+                url, self.token, response.headers.get('ETag'),
+                response.headers.get('Last-Modified'), response.text
+            )
+        
+        return response.json() if response.content else {}
+    
+    async def _send(self, method: str, url: str, data: Optional[Dict], headers: Dict[str, str],
+                    priority: int) -> httpx.Response:
+        """Send a request when the scheduler allows, retrying rate limits and transient failures."""
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(priority)
+            delay = 0.0
+            try:
+                async with self._semaphore:
+                    if method == 'GET':
+                        response = await self.client.get(url, params=data, headers=headers)
+                    elif method == 'DELETE':
+                        response = await self.client.delete(url)
+                    else:
+                        response = await self.client.request(method, url, json=data)
+            except BaseException as e:
+                # Unanswered, so the token is still good for the next request
+                self.scheduler.refund()
+                if not isinstance(e, httpx.HTTPError):
+                    raise
+                resendable = method != 'POST' or isinstance(e, UNSENT_ERRORS)
+                if not resendable or attempt >= self.scheduler.max_retries:
+                    raise Exception(f"Network error: {e}")
+                delay = backoff_delay(attempt)
+            else:
+                blocked = self.scheduler.observe(response.headers)
+                if response.status_code == 304:
+                    # Conditional requests answered from cache cost no quota
+                    self.scheduler.refund()
+                
+                if _rate_limited(response):
+                    if blocked is None:
+                        # A secondary limit that didn't say how long: back off
+                        blocked = backoff_delay(attempt)
+                        self.scheduler.block(blocked)
+                    if attempt >= self.scheduler.max_retries or blocked > self.scheduler.max_wait:
+                        return response
+                    if blocked >= 1:
+                        print(f"⏳ GitHub rate limit reached, waiting {blocked:.0f}s")
+                elif (response.status_code in RETRY_STATUSES and method != 'POST'
+                      and attempt < self.scheduler.max_retries):
+                    delay = backoff_delay(attempt)
+                else:
+                    return response
+            
+            attempt += 1
+            if delay:
+                await asyncio.sleep(delay)
+    
+    async def test_authentication(self) -> Dict[str, Any]:
+        """Test if the authentication token is valid."""
+        try:
+            user_data = await self.request('GET', '/user')
+            return {
+                'valid': True,
+                'username': user_data.get('login'),
+                'name': user_data.get('name'),
+                'email': user_data.get('email')
+            }
+        except Exception as e:
+            return {
+                'valid': False,
+                'error': str(e)
+            }
+    
+    async def create_gist(self, gist: Gist) -> Dict[str, Any]:
+        """Create a new gist on GitHub."""
+        response = await self.request('POST', '/gists', gist.to_github_format(), gist.priority)
+        
+        return {
+            'id': response['id'],
+            'html_url': response['html_url'],
+            'git_pull_url': response['git_pull_url'],
+            'git_push_url': response['git_push_url'],
+            'created_at': response['created_at'],
+            'updated_at': response['updated_at']
+        }
+    
+    async def create_bundle(self, gists: List[Gist]) -> Dict[str, Any]:
+        """Create one gist holding many thoughts, one file each, with a single POST.
+
+        File names are made unique within the bundle, and each thought's
+        ``gist_id`` is set to its ``(gist ID, file name)`` index key.
+        """
+        if not gists:
+            raise ValueError("A bundle needs at least one thought")
+        if len(gists) > self.MAX_BUNDLE_FILES:
+            raise ValueError(f"A bundle holds at most {self.MAX_BUNDLE_FILES} thoughts")
+        
+        taken = set()
+        for gist in gists:
+            stem, extension = os.path.splitext(gist.filename)
+            filename, suffix = gist.filename, 1
+            while filename in taken:
+                suffix += 1
+                filename = f"{stem}_{suffix}{extension}"
+            gist.filename = filename
+            taken.add(filename)
+        
+        response = await self.request(
+            'POST', '/gists', Gist.bundle_to_github_format(gists),
+            max(gist.priority for gist in gists)
+        )
+        
+        for gist in gists:
+            gist.gist_id = thought_key(response['id'], gist.filename)
+        
+        return {
+            'id': response['id'],
+            'html_url': response['html_url'],
+            'git_pull_url': response['git_pull_url'],
+            'git_push_url': response['git_push_url'],
+            'created_at': response['created_at'],
+            'updated_at': response['updated_at'],
+            'thoughts': [gist.gist_id for gist in gists]
+        }
+    
+    async def update_gists(self, gists: List[Gist]) -> List[Dict[str, Any]]:
+        """Update many thoughts, with one PATCH per GitHub gist they live in.
+
+        Bundled thoughts sharing a gist are sent together, and only their
+        files change; the other files and the bundle's description are kept.
+        The PATCHes run concurrently.
+        """
+        bundles: Dict[str, List[Gist]] = {}
+        for gist in gists:
+            if not gist.gist_id:
+                raise ValueError("Gist ID is required for updates")
+            bundles.setdefault(gist.github_id, []).append(gist)
+        
+        patches = []
+        for github_id, members in bundles.items():
+            if not members[0].bundled:
+                patches.extend(self.update_gist(gist) for gist in members)
+                continue
+            
+            files = {}
+            for gist in members:
+                files.update(gist.to_github_files())
+            patches.append(self._patch_gist(
+                github_id, {'files': files}, max(gist.priority for gist in members)
+            ))
+        
+        return list(await asyncio.gather(*patches))
+    
+    async def _patch_gist(self, github_id: str, gist_data: Dict[str, Any],
+                          priority: int = DEFAULT_PRIORITY) -> Dict[str, Any]:
+        """Send one PATCH to a gist."""
+        response = await self.request('PATCH', f'/gists/{github_id}', gist_data, priority)
+        
+        return {
+            'id': response['id'],
+            'html_url': response['html_url'],
+            'updated_at': response['updated_at']
+        }
+    
+    async def update_gist(self, gist: Gist) -> Dict[str, Any]:
+        """Update an existing gist on GitHub."""
+        if not gist.gist_id:
+            raise ValueError("Gist ID is required for updates")
+        if gist.bundled:
+            return (await self.update_gists([gist]))[0]
+        
+        gist_data = gist.to_github_format()
+        # Remove description from updates to avoid conflicts
+        gist_data.pop('public', None)
+        
+        return await self._patch_gist(gist.gist_id, gist_data, gist.priority)
+    
+    async def get_gist(self, gist_id: str, priority: int = DEFAULT_PRIORITY) -> Optional[Gist]:
+        """Retrieve a gist from GitHub and parse it."""
+        try:
+            github_id, filename = split_thought_key(gist_id)
+            gist_data = await self.request('GET', f'/gists/{github_id}', priority=priority)
+            return Gist.from_github_gist(gist_data, filename)
+        except Exception as e:
+            print(f"Failed to retrieve gist {gist_id}: {e}")
+            return None
+    
+    async def create_many(self, gists: List[Gist]) -> List[Union[Dict[str, Any], Exception]]:
+        """Create many single-file gists concurrently, setting each thought's ``gist_id``.
+
+        Results line up with ``gists``. A failed creation is returned as its
+        exception instead of aborting the others, so callers can still record
+        the thoughts that were created.
+        """
+        async def create(gist: Gist) -> Dict[str, Any]:
+            result = await self.create_gist(gist)
+            gist.gist_id = result['id']
+            return result
+        
+        return list(await asyncio.gather(*(create(gist) for gist in gists), return_exceptions=True))
+    
+    async def update_many(self, gists: List[Gist]) -> List[Union[Dict[str, Any], Exception]]:
+        """Update many thoughts concurrently; results line up with ``gists``.
+
+        Unlike ``update_gists``, each thought gets its own PATCH, and a failed
+        update is returned as its exception.
+        """
+        return list(await asyncio.gather(
+            *(self.update_gist(gist) for gist in gists), return_exceptions=True
+        ))
+    
+    async def get_many(self, gist_ids: List[str]) -> List[Optional[Gist]]:
+        """Fetch many gists concurrently; None for any that could not be read."""
+        return list(await asyncio.gather(*(self.get_gist(gist_id) for gist_id in gist_ids)))
+    
+    async def list_user_gists(self, per_page: int = 30, page: int = 1) -> List[Dict[str, Any]]:
+        """List all gists for the authenticated user."""
+        params = {
+            'per_page': min(100, per_page),  # GitHub max is 100
+            'page': page
+        }
+        
+        try:
+            gists = await self.request('GET', '/gists', params)
+            
+            # Filter for Hydra Network gists
+            hydra_gists = []
+            for gist_data in gists:
+                description = gist_data.get('description') or ''
+                if description.startswith(BUNDLE_MARKER):
+                    hydra_gists.extend(gist.to_dict() for gist in Gist.from_github_bundle(gist_data))
+                elif '🧠' in description and 'Hydra:' in description:
+                    gist = Gist.from_github_gist(gist_data)
+                    if gist:
+                        hydra_gists.append(gist.to_dict())
+            
+            return hydra_gists
+        
+        except Exception as e:
+            print(f"Failed to list gists: {e}")
+            return []
+    
+    async def delete_gist(self, gist_id: str) -> bool:
+        """Delete a gist (use with caution - violates never delete principle).
+
+        For a bundled thought only its file is removed from the bundle.
+        """
+        try:
+            github_id, filename = split_thought_key(gist_id)
+            if filename:
+                await self.request('PATCH', f'/gists/{github_id}', {'files': {filename: None}})
+            else:
+                await self.request('DELETE', f'/gists/{gist_id}')
+            return True
+        except Exception as e:
+            print(f"Failed to delete gist {gist_id}: {e}")
+            return False
+    
+    async def search_gists_by_content(self, query: str, max_results: int = 50) -> List[Dict[str, Any]]:
+        """Search through user's gists for content matches."""
+        # Note: GitHub doesn't provide native gist search, so we fetch and filter locally.
+        # Pages are fetched a concurrency-sized window at a time, up to 10 pages.
+        all_gists = []
+        page = 1
+        
+        while len(all_gists) < max_results and page <= 10:
+            window = range(page, min(page + self.concurrency, 11))
+            pages = await asyncio.gather(
+                *(self.list_user_gists(per_page=30, page=number) for number in window)
+            )
+            page = window.stop
+            
+            for gists_page in pages:
+                if not gists_page:
+                    page = 11
+                    break
+                all_gists.extend(gists_page)
+        
+        # Filter by content/intent
+        query_lower = query.lower()
+        matching_gists = []
+        
+        for gist_data in all_gists:
+            if (query_lower in gist_data.get('intent', '').lower() or
+                query_lower in gist_data.get('content', '').lower()):
+                matching_gists.append(gist_data)
+                
+                if len(matching_gists) >= max_results:
+                    break
+        
+        return matching_gists
+    
+    async def sync_gist_metadata(self, gist: Gist) -> bool:
+        """Sync local gist metadata with GitHub version."""
+        try:
+            github_gist = await self.get_gist(gist.gist_id, gist.priority)
+            if github_gist:
+                # Update local metadata from GitHub
+                gist.timestamp = github_gist.timestamp
+                return True
+            return False
+        except Exception as e:
+            print(f"Failed to sync gist {gist.gist_id}: {e}")
+            return False
+    
+    async def sync_many(self, gists: List[Gist]) -> List[bool]:
+        """Sync the metadata of many thoughts concurrently; False for any that failed."""
+        return list(await asyncio.gather(*(self.sync_gist_metadata(gist) for gist in gists)))
+    
+    async def get_rate_limit_info(self) -> Dict[str, Any]:
+        """Get current rate limit information."""
+        try:
+            response = await self.request('GET', '/rate_limit')
+            return response.get('rate', {})
+        except Exception:
+            return {}
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Benchmark the GistGhost index backends on synthetic thought networks.
+
+Usage:
+    python benchmark.py --sizes 10000,100000,1000000
+    python benchmark.py --suite --sizes 1000,100000 --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: RSS is not reported
+    resource = None
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from gist import Gist
+from index_manager import IndexManager
+from sqlite_index import SQLiteIndexManager
+
+
+STATUSES = ['new', 'processing', 'complete', 'evolving']
+WORDS = [
+    'hosting', 'performance', 'cdn', 'latency', 'cache', 'uptime', 'pricing',
+    'affiliate', 'conversion', 'traffic', 'seo', 'analysis', 'research', 'guide'
+]
+
+
+def generate_index(size: int, seed: int = 42, edge_density: float = 0.1,
+                   evolution_rate: float = 0.2, evolution_depth: Optional[int] = None) -> dict:
+    """Generate a synthetic index.json document with evolutions and links.
+    
+    Each thought evolves from the previous one with probability
+    ``evolution_rate``, as long as that chain has fewer than
+    ``evolution_depth`` evolutions. Each thought also links to
+    ``edge_density`` earlier thoughts on average.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    thoughts = {}
+    relationships = {}
+    depth = 0
+    
+    def link(from_gist, to_gist, relationship_type, created_at):
+        relationships.setdefault(from_gist, []).append({
+            'to': to_gist,
+            'type': relationship_type,
+            'created_at': created_at
+        })
+    
+    for i in range(size):
+        gist_id = f"{i:032x}"
+        timestamp = (start + timedelta(seconds=i)).isoformat()
+        evolves = i and rng.random() < evolution_rate
+        parent_gist = None
+        if evolves and (evolution_depth is None or depth < evolution_depth):
+            parent_gist = f"{i - 1:032x}"
+            depth += 1
+        else:
+            depth = 0
+        
+        thoughts[gist_id] = {
+            'gist_id': gist_id,
+            'origin_hydra': f"hydra-{rng.randrange(16)}",
+            'intent': ' '.join(rng.choice(WORDS) for _ in range(4)),
+            'priority': rng.randint(1, 10),
+            'content': ' '.join(rng.choice(WORDS) for _ in range(60)),
+            'file_format': 'md',
+            'filename': f"thought_{i}.md",
+            'parent_gist': parent_gist,
+            'version': '1.0.0',
+            'status': rng.choice(STATUSES),
+            'timestamp': timestamp,
+            'node_id': f"node-{i}"
+        }
+        
+        if parent_gist:
+            link(parent_gist, gist_id, 'evolved_to', timestamp)
+            link(gist_id, parent_gist, 'evolved_from', timestamp)
+        
+        links = int(edge_density) + (rng.random() < edge_density % 1) if i else 0
+        for other in {f"{rng.randrange(i):032x}" for _ in range(links)}:
+            link(gist_id, other, 'related', timestamp)
+            link(other, gist_id, 'reverse_related', timestamp)
+    
+    return {
+        'thoughts': thoughts,
+        'relationships': relationships,
+        'metadata': {
+            'version': '1.0.0',
+            'created_at': start.isoformat(),
+            'last_updated': start.isoformat(),
+            'total_thoughts': size,
+            'evolution_chains': 0
+        }
+    }
+
+
+def timed(fn, *args, **kwargs) -> float:
+    """Run a callable once and return elapsed milliseconds."""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB, if the platform reports it.
+    
+    Reads the current RSS from /proc on Linux; elsewhere falls back to the
+    peak RSS reported by getrusage.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def measure_open(index_file: Path, snapshot_format: str) -> dict:
+    """Open an index in a fresh interpreter and report load time and RSS growth.
+    
+    Each format gets its own process so neither inherits the other's heap.
+    """
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure-open', str(index_file),
+         '--snapshot-format', snapshot_format],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def _measure_open_here(index_file: Path, snapshot_format: str):
+    """Child side of measure_open: print one JSON line of results."""
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    manager = IndexManager(index_file, snapshot_format=snapshot_format)
+    open_ms = (time.perf_counter() - start) * 1000
+    rss_after = rss_mb()
+    
+    print(json.dumps({
+        'open_ms': open_ms,
+        'rss_mb': rss_after - rss_before if rss_after is not None else None,
+        'thoughts': len(manager.index['thoughts'])
+    }))
+
+
+def bench_backend(manager, sample_id: str) -> dict:
+    """Time the read/write operations common to both backends."""
+    gist = Gist(origin_hydra='bench', intent='benchmark write', gist_id='bench-write')
+    
+    return {
+        'list_10_ms': timed(manager.list_gists, limit=10),
+        'list_status_10_ms': timed(manager.list_gists, 'complete', 10),
+        'get_gist_ms': timed(manager.get_gist, sample_id),
+        'related_ms': timed(manager.get_related_gists, sample_id),
+        'search_ms': timed(manager.search_thoughts, 'latency cdn'),
+        'stats_ms': timed(manager.get_network_stats),
+        'add_gist_ms': timed(manager.add_gist, gist),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class _CountingSink:
+    """Text stream that only counts what is written to it."""
+    
+    def __init__(self):
+        self.chars = 0
+    
+    def write(self, text: str) -> int:
+        self.chars += len(text)
+        return len(text)
+
+
+def time_ops(fn: Callable, calls: Iterable[tuple]) -> Dict[str, Any]:
+    """Call ``fn`` once per argument tuple; report latency and peak RSS growth."""
+    timings = []
+    peak_before = peak_rss_mb()
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    peak_after = peak_rss_mb()
+    
+    timings.sort()
+    return {
+        'ops': len(timings),
+        'total_ms': sum(timings),
+        'mean_ms': sum(timings) / len(timings) if timings else 0.0,
+        'p95_ms': timings[int(len(timings) * 0.95)] if timings else 0.0,
+        'max_ms': timings[-1] if timings else 0.0,
+        'peak_rss_growth_mb': peak_after - peak_before if peak_after is not None else None
+    }
+
+
+def suite_case(size: int, backend: str, workdir: Path, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Time every index operation on one synthetic network, in this process.
+    
+    Writes go through single calls, as the CLI makes them. The JSON backend
+    runs journaled, the setting recommended for frequent writes. Searching
+    and exporting use the index calls behind ``gistghost search`` and
+    ``gistghost export``.
+    """
+    rng = random.Random(params['seed'] + 1)
+    ops = min(params['ops'], size)
+    
+    start = time.perf_counter()
+    index_file = workdir / "index.json"
+    index = generate_index(
+        size, params['seed'], params['edge_density'],
+        params['evolution_rate'], params['evolution_depth']
+    )
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    del index
+    generate_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    if backend == 'sqlite':
+        manager = SQLiteIndexManager.migrate_from_json(index_file, workdir / "index.db")
+    else:
+        # The first open moves the inline contents into the blob store
+        IndexManager(index_file)
+        manager = IndexManager(index_file, journaled=True)
+    load_ms = (time.perf_counter() - start) * 1000
+    
+    existing = [f"{rng.randrange(size):032x}" for _ in range(2 * ops)]
+    new_gists = [
+        Gist(
+            origin_hydra='bench',
+            intent=' '.join(rng.choice(WORDS) for _ in range(4)),
+            content=' '.join(rng.choice(WORDS) for _ in range(60)),
+            priority=rng.randint(1, 10),
+            gist_id=f"bench-{i}"
+        )
+        for i in range(ops)
+    ]
+    queries = [' '.join(rng.sample(WORDS, 2)) for _ in range(params['repeat'])]
+    statuses = [rng.choice(STATUSES + [None]) for _ in range(params['repeat'])]
+    
+    sink = _CountingSink()
+    operations = {
+        'add_gist': time_ops(manager.add_gist, ((gist,) for gist in new_gists)),
+        'link_gists': time_ops(
+            manager.link_gists,
+            ((existing[2 * i], existing[2 * i + 1], 'bench') for i in range(ops))
+        ),
+        'remove_gist': time_ops(manager.remove_gist, ((gist.gist_id,) for gist in new_gists)),
+        'list_gists': time_ops(manager.list_gists, ((status, 50) for status in statuses)),
+        'search_thoughts': time_ops(manager.search_thoughts, ((query,) for query in queries)),
+        'get_evolution_chains': time_ops(manager.get_evolution_chains, [()]),
+        'get_network_stats': time_ops(manager.get_network_stats, [()]),
+        'export_network': time_ops(manager.export_stream, [(sink, 'ndjson')])
+    }
+    
+    if backend == 'sqlite':
+        manager.close()
+    
+    return {
+        'size': size,
+        'backend': backend,
+        'generate_ms': generate_ms,
+        'load_ms': load_ms,
+        'export_chars': sink.chars,
+        'operations': operations,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_suite(sizes: List[int], backends: List[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run every (size, backend) case in a fresh interpreter, so peak memory is its own."""
+    results = []
+    for size in sizes:
+        for backend in backends:
+            output = subprocess.run(
+                [sys.executable, __file__, '--suite-case', str(size), backend,
+                 '--params', json.dumps(params)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append(json.loads(output.splitlines()[-1]))
+    
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': params
+        },
+        'results': results
+    }
+
+
+def compare_suites(before: Dict[str, Any], after: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Mean latency of every operation measured in both runs, with the ratio after/before."""
+    baseline = {
+        (case['size'], case['backend'], operation): timing['mean_ms']
+        for case in before['results'] for operation, timing in case['operations'].items()
+    }
+    
+    rows = []
+    for case in after['results']:
+        for operation, timing in case['operations'].items():
+            old = baseline.get((case['size'], case['backend'], operation))
+            if old is None:
+                continue
+            rows.append({
+                'size': case['size'],
+                'backend': case['backend'],
+                'operation': operation,
+                'before_ms': old,
+                'after_ms': timing['mean_ms'],
+                'ratio': timing['mean_ms'] / old if old else None
+            })
+    return rows
+
+
+def print_suite(suite: Dict[str, Any]):
+    """Human-readable summary of a suite run."""
+    for case in suite['results']:
+        peak = f"{case['peak_rss_mb']:.0f} MB" if case['peak_rss_mb'] is not None else 'n/a'
+        print(f"📊 {case['size']} thoughts, {case['backend']} "
+              f"(load {case['load_ms']:.0f} ms, peak RSS {peak})")
+        for operation, timing in case['operations'].items():
+            print(f"   {operation:<22} mean {timing['mean_ms']:>10.3f} ms"
+                  f"   p95 {timing['p95_ms']:>10.3f} ms   x{timing['ops']}")
+        print()
+
+
+def run(size: int, workdir: Path) -> dict:
+    """Benchmark both backends on one synthetic network size."""
+    index = generate_index(size)
+    sample_id = f"{size // 2:032x}"
+    
+    index_file = workdir / f"index-{size}.json"
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    del index
+    
+    # The first open moves the inline contents into the blob store; the
+    # second writes the binary snapshot mirroring the converted index.json
+    IndexManager(index_file)
+    IndexManager(index_file, snapshot_format='binary')
+    
+    results = {'size': size}
+    results['snapshot'] = {
+        snapshot_format: measure_open(index_file, snapshot_format)
+        for snapshot_format in IndexManager.SNAPSHOT_FORMATS
+    }
+    
+    start = time.perf_counter()
+    json_manager = IndexManager(index_file)
+    results['json'] = {'open_ms': (time.perf_counter() - start) * 1000}
+    results['json'].update(bench_backend(json_manager, sample_id))
+    del json_manager
+    
+    db_file = workdir / f"index-{size}.db"
+    start = time.perf_counter()
+    SQLiteIndexManager.migrate_from_json(index_file, db_file).close()
+    results['migrate_ms'] = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    sqlite_manager = SQLiteIndexManager(db_file)
+    results['sqlite'] = {'open_ms': (time.perf_counter() - start) * 1000}
+    results['sqlite'].update(bench_backend(sqlite_manager, sample_id))
+    sqlite_manager.close()
+    
+    return results
+
+
+def main():
+    """Benchmark CLI entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark GistGhost index backends")
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Comma-separated network sizes')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--suite', action='store_true',
+                        help='Time every index operation on synthetic networks')
+    parser.add_argument('--backends', default='json,sqlite', help='Suite: comma-separated backends')
+    parser.add_argument('--edge-density', type=float, default=0.1,
+                        help='Suite: average semantic links per thought')
+    parser.add_argument('--evolution-rate', type=float, default=0.2,
+                        help='Suite: chance that a thought evolves from the previous one')
+    parser.add_argument('--evolution-depth', type=int,
+                        help='Suite: most evolutions per chain (default: unbounded)')
+    parser.add_argument('--ops', type=int, default=1000, help='Suite: writes timed per operation')
+    parser.add_argument('--repeat', type=int, default=20, help='Suite: lookups timed per operation')
+    parser.add_argument('--seed', type=int, default=42, help='Suite: random seed')
+    parser.add_argument('--output', help='Suite: write the results JSON to a file')
+    parser.add_argument('--compare', metavar='RESULTS_JSON', help='Suite: compare with an earlier run')
+    parser.add_argument('--measure-open', metavar='INDEX_FILE', help=argparse.SUPPRESS)
+    parser.add_argument('--snapshot-format', default='json', help=argparse.SUPPRESS)
+    parser.add_argument('--suite-case', nargs=2, metavar=('SIZE', 'BACKEND'), help=argparse.SUPPRESS)
+    parser.add_argument('--params', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.measure_open:
+        _measure_open_here(Path(args.measure_open), args.snapshot_format)
+        return
+    
+    if args.suite_case:
+        workdir = Path(tempfile.mkdtemp(prefix='gistghost-bench-'))
+        try:
+            size, backend = args.suite_case
+            print(json.dumps(suite_case(int(size), backend, workdir, json.loads(args.params))))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return
+    
+    if args.suite:
+        params = {
+            'seed': args.seed,
+            'edge_density': args.edge_density,
+            'evolution_rate': args.evolution_rate,
+            'evolution_depth': args.evolution_depth,
+            'ops': args.ops,
+            'repeat': args.repeat
+        }
+        suite = run_suite(
+            [int(s) for s in args.sizes.split(',')], args.backends.split(','), params
+        )
+        
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(suite, f, indent=2)
+        if args.json:
+            print(json.dumps(suite, indent=2))
+        else:
+            print_suite(suite)
+        
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                rows = compare_suites(json.load(f), suite)
+            for row in rows:
+                change = f"x{row['ratio']:.2f}" if row['ratio'] is not None else 'n/a'
+                print(f"   {row['size']:>8} {row['backend']:<7} {row['operation']:<22}"
+                      f" {row['before_ms']:>10.3f} -> {row['after_ms']:>10.3f} ms  {change}")
+        return
+    
+    workdir = Path(tempfile.mkdtemp(prefix='gistghost-bench-'))
+    try:
+        all_results = []
+        for size in (int(s) for s in args.sizes.split(',')):
+            results = run(size, workdir)
+            all_results.append(results)
+            
+            if not args.json:
+                print(f"📊 {size} thoughts (migration {results['migrate_ms']:.0f} ms)")
+                for metric in results['json']:
+                    print(f"   {metric:<18} json {results['json'][metric]:>10.2f}"
+                          f"   sqlite {results['sqlite'][metric]:>10.2f}")
+                for snapshot_format, load in results['snapshot'].items():
+                    rss = f"{load['rss_mb']:.1f} MB" if load['rss_mb'] is not None else 'n/a'
+                    print(f"   cold open ({snapshot_format + ' snapshot'})".ljust(27)
+                          + f"{load['open_ms']:>10.2f} ms   RSS +{rss}")
+                print()
+        
+        if args.json:
+            print(json.dumps(all_results, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
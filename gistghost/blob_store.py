@@ -0,0 +1,238 @@
+"""
+Content-addressed storage for thought bodies.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from journal import atomic_write
+
+
+# Words with their trailing whitespace; joined back together they give the text
+TOKEN_PATTERN = re.compile(r'\S*\s*')
+
+DeltaOps = List[Union[List[int], str]]
+
+
+def _tokens(text: str) -> List[str]:
+    """Split text into diffable word tokens."""
+    return [token for token in TOKEN_PATTERN.findall(text) if token]
+
+
+def diff(base: str, content: str) -> DeltaOps:
+    """Encode ``content`` as ops against ``base``.
+
+    Each op is either ``[start, end]``, copying base tokens ``start:end``, or
+    a string of new text.
+    """
+    base_tokens = _tokens(base)
+    tokens = _tokens(content)
+    ops: DeltaOps = []
+    
+    matcher = difflib.SequenceMatcher(None, base_tokens, tokens)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(tokens[j1:j2]))
+    return ops
+
+
+def patch(base: str, ops: DeltaOps) -> str:
+    """Rebuild a text from its base and delta ops."""
+    base_tokens = _tokens(base)
+    return ''.join(
+        ''.join(base_tokens[op[0]:op[1]]) if isinstance(op, list) else op
+        for op in ops
+    )
+
+
+class BlobStore:
+    """Stores thought contents as files named by their SHA-256 hash.
+
+    Blobs live under ``<directory>/<first two hex digits>/<rest of hash>``,
+    like git objects. Identical contents hash to the same blob, so a thought
+    and an evolution that reuses its body share one file. Blobs are written
+    once and never modified, which makes them safe to read lazily.
+
+    A body stored with a ``base`` (its parent's body) may instead be kept as
+    a ``.delta`` file of word-level edits against that base. Every
+    ``CHECKPOINT_INTERVAL``-th link of a chain is stored in full, so rebuilding
+    a body never applies more than that many deltas. Rebuilt bodies are kept
+    in an LRU cache.
+    """
+    
+    CHECKPOINT_INTERVAL = 8
+    # Bodies smaller than this are always stored in full
+    MIN_DELTA_SIZE = 1024
+    # A delta is only kept if it is at most this fraction of the full body
+    MAX_DELTA_RATIO = 0.5
+    # Characters of rebuilt bodies kept in the LRU cache
+    CACHE_SIZE = 32 * 1024 * 1024
+    
+    def __init__(self, directory: Path):
+        """Initialize a store rooted at a directory."""
+        self.directory = directory
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._cached_size = 0
+    
+    @staticmethod
+    def hash_content(content: str) -> str:
+        """Return the hex SHA-256 of a content string."""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    def path_for(self, content_hash: str) -> Path:
+        """File path of a blob."""
+        return self.directory / content_hash[:2] / content_hash[2:]
+    
+    def delta_path_for(self, content_hash: str) -> Path:
+        """File path of a blob stored as a delta."""
+        return self.directory / content_hash[:2] / (content_hash[2:] + '.delta')
+    
+    def __contains__(self, content_hash: str) -> bool:
+        """Check whether a blob is stored."""
+        return self.path_for(content_hash).exists() or self.delta_path_for(content_hash).exists()
+    
+    def put(self, content: str, base: Optional[str] = None) -> str:
+        """Store a content string (once) and return its hash.
+
+        ``base`` is the hash of a related body, usually the parent thought's;
+        the content is stored as a delta against it when that saves space.
+        """
+        content_hash = self.hash_content(content)
+        if content_hash in self:
+            return content_hash
+        
+        # Written as bytes, so newlines are stored exactly as they hash
+        delta = self._encode_delta(content, base) if base and base != content_hash else None
+        if delta is not None:
+            atomic_write(self.delta_path_for(content_hash), delta.encode('utf-8'))
+        else:
+            atomic_write(self.path_for(content_hash), content.encode('utf-8'))
+        return content_hash
+    
+    def _encode_delta(self, content: str, base: str) -> Optional[str]:
+        """Delta file text for a body, or None if it should be stored in full."""
+        size = len(content.encode('utf-8'))
+        if size < self.MIN_DELTA_SIZE or base not in self:
+            return None
+        
+        depth = 1
+        if not self.path_for(base).exists():
+            depth += self._read_delta_header(self.delta_path_for(base))['depth']
+        if depth >= self.CHECKPOINT_INTERVAL:
+            return None
+        
+        header = json.dumps({'base': base, 'depth': depth, 'size': size})
+        delta = header + '\n' + json.dumps(diff(self.get(base), content), ensure_ascii=False)
+        if len(delta.encode('utf-8')) > size * self.MAX_DELTA_RATIO:
+            return None
+        return delta
+    
+    def _read_delta(self, content_hash: str) -> Tuple[Dict[str, Any], DeltaOps]:
+        """Read the header and ops of a delta blob."""
+        with open(self.delta_path_for(content_hash), 'rb') as f:
+            header = json.loads(f.readline())
+            return header, json.loads(f.read())
+    
+    def _read_delta_header(self, path: Path) -> Dict[str, Any]:
+        """Read only the header line of a delta file."""
+        with open(path, 'rb') as f:
+            return json.loads(f.readline())
+    
+    def get(self, content_hash: str) -> str:
+        """Read a blob back as text, rebuilding it from deltas if needed."""
+        cached = self._cache.get(content_hash)
+        if cached is not None:
+            self._cache.move_to_end(content_hash)
+            return cached
+        
+        path = self.path_for(content_hash)
+        if path.exists():
+            with open(path, 'rb') as f:
+                return f.read().decode('utf-8')
+        
+        # Walk back to a full body (or a cached one), then replay the deltas
+        chain: List[Tuple[str, DeltaOps]] = []
+        current = content_hash
+        while current not in self._cache and not self.path_for(current).exists():
+            header, ops = self._read_delta(current)
+            chain.append((current, ops))
+            current = header['base']
+        
+        content = self.get(current)
+        for delta_hash, ops in reversed(chain):
+            content = patch(content, ops)
+            if self.hash_content(content) != delta_hash:
+                raise ValueError(f"Delta blob {delta_hash} does not rebuild its content")
+            self._remember(delta_hash, content)
+        return content
+    
+    def _remember(self, content_hash: str, content: str):
+        """Add a rebuilt body to the LRU cache, evicting the oldest ones."""
+        self._cache[content_hash] = content
+        self._cached_size += len(content)
+        while self._cached_size > self.CACHE_SIZE and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_size -= len(evicted)
+    
+    def _files(self) -> Iterator[Tuple[str, os.DirEntry]]:
+        """Iterate over ``(hash, directory entry)`` for every stored blob file."""
+        if not self.directory.exists():
+            return
+        for shard in os.scandir(self.directory):
+            if shard.is_dir() and len(shard.name) == 2:
+                for entry in os.scandir(shard.path):
+                    if not entry.name.endswith('.tmp'):
+                        yield shard.name + entry.name.split('.', 1)[0], entry
+    
+    def hashes(self) -> Iterator[str]:
+        """Iterate over the hashes of all stored blobs."""
+        seen: Set[str] = set()
+        for content_hash, _ in self._files():
+            if content_hash not in seen:
+                seen.add(content_hash)
+                yield content_hash
+    
+    def prune(self, referenced: Set[str]) -> int:
+        """Delete blobs whose hash is not referenced; returns how many were removed.
+
+        Bases that referenced deltas are built from are kept as well.
+        """
+        keep = set()
+        for content_hash in referenced:
+            while content_hash not in keep:
+                keep.add(content_hash)
+                if self.path_for(content_hash).exists() or not self.delta_path_for(content_hash).exists():
+                    break
+                content_hash = self._read_delta_header(self.delta_path_for(content_hash))['base']
+        
+        removed = set()
+        for content_hash, entry in list(self._files()):
+            if content_hash not in keep:
+                os.unlink(entry.path)
+                removed.add(content_hash)
+                self._cache.pop(content_hash, None)
+        return len(removed)
+    
+    def stats(self) -> Dict[str, int]:
+        """Blob counts and sizes, including the space saved by delta encoding."""
+        stats = {'blobs': 0, 'delta_blobs': 0, 'stored_bytes': 0, 'content_bytes': 0}
+        for _, entry in self._files():
+            stored = entry.stat().st_size
+            stats['blobs'] += 1
+            stats['stored_bytes'] += stored
+            if entry.name.endswith('.delta'):
+                stats['delta_blobs'] += 1
+                stats['content_bytes'] += self._read_delta_header(Path(entry.path))['size']
+            else:
+                stats['content_bytes'] += stored
+        
+        stats['saved_bytes'] = stats['content_bytes'] - stats['stored_bytes']
+        return stats
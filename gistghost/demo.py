@@ -8,7 +8,6 @@ an intelligent content network for hosting-related insights.
 
 import os
 import sys
-import time
 from pathlib import Path
 
 # Add current directory to path for imports
@@ -125,19 +124,13 @@ def main():
         }
     ]
     
+    # Created concurrently, one gist each, over one pooled connection
     thought_ids = []
-    for insight in hosting_insights:
-        try:
-            thought_id = ghost.create_thought(
-                intent=insight["intent"],
-                content=insight["content"],
-                priority=insight["priority"]
-            )
-            thought_ids.append(thought_id)
-            print(f"  ✅ Created: {insight['intent']}")
-            time.sleep(1)  # Be nice to GitHub API
-        except Exception as e:
-            print(f"  ❌ Failed to create {insight['intent']}: {e}")
+    try:
+        thought_ids = ghost.create_thoughts(hosting_insights, bundle_size=1)
+        print(f"  ✅ Created {len(thought_ids)} of {len(hosting_insights)} thoughts")
+    except Exception as e:
+        print(f"  ❌ Failed to create thoughts: {e}")
     
     # Demo 2: Link related thoughts
     if len(thought_ids) >= 2:
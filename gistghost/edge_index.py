@@ -0,0 +1,115 @@
+"""
+In-memory adjacency index over the thought network relationships.
+"""
+
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+
+class EdgeIndex:
+    """Typed adjacency with a reverse index of incoming edges.
+
+    Outgoing edges are keyed by ``(source, type)`` with one entry per target,
+    so duplicate checks, neighbour lookups and node removal cost O(degree)
+    instead of scanning every relationship list in the network. Entries point
+    at the same relationship dicts stored in ``index['relationships']``.
+    """
+    
+    def __init__(self):
+        """Initialize an empty edge index."""
+        self._out: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self._types: Dict[str, Set[str]] = {}
+        self._in: Dict[str, Set[Tuple[str, str]]] = {}
+    
+    @classmethod
+    def from_relationships(cls, relationships: Dict[str, List[Dict[str, Any]]]) -> 'EdgeIndex':
+        """Build an index from the ``relationships`` section of index.json."""
+        edges = cls()
+        for source, rels in relationships.items():
+            for rel in rels:
+                edges.add(source, rel)
+        return edges
+    
+    def __len__(self) -> int:
+        """Return the number of indexed edges."""
+        return sum(len(targets) for targets in self._out.values())
+    
+    def add(self, source: str, rel: Dict[str, Any]) -> bool:
+        """Index an edge; returns False if it was already present."""
+        key = (source, rel['type'])
+        targets = self._out.setdefault(key, {})
+        if rel['to'] in targets:
+            return False
+        
+        targets[rel['to']] = rel
+        self._types.setdefault(source, set()).add(rel['type'])
+        self._in.setdefault(rel['to'], set()).add(key)
+        return True
+    
+    def contains(self, source: str, target: str, relationship_type: str) -> bool:
+        """Check whether an edge exists."""
+        return target in self._out.get((source, relationship_type), ())
+    
+    def get(self, source: str, target: str, relationship_type: str) -> Optional[Dict[str, Any]]:
+        """Return the relationship dict for an edge, if present."""
+        return self._out.get((source, relationship_type), {}).get(target)
+    
+    def neighbours(self, source: str, relationship_type: str) -> List[str]:
+        """Targets of a source over one relationship type, in insertion order."""
+        return list(self._out.get((source, relationship_type), ()))
+    
+    def has_outgoing(self, source: str, relationship_type: str) -> bool:
+        """Check whether a source has any edge of the given type."""
+        return bool(self._out.get((source, relationship_type)))
+    
+    def outgoing(self, source: str, relationship_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Outgoing relationship dicts of a source, optionally of one type."""
+        types = [relationship_type] if relationship_type else self._types.get(source, ())
+        return [
+            rel
+            for rel_type in types
+            for rel in self._out.get((source, rel_type), {}).values()
+        ]
+    
+    def incoming(self, target: str, relationship_type: Optional[str] = None) -> List[Tuple[str, str]]:
+        """``(source, type)`` pairs of edges pointing at a target."""
+        return [
+            key for key in self._in.get(target, ())
+            if relationship_type is None or key[1] == relationship_type
+        ]
+    
+    def remove(self, source: str, target: str, relationship_type: str) -> Optional[Dict[str, Any]]:
+        """Drop one edge and return its relationship dict."""
+        key = (source, relationship_type)
+        targets = self._out.get(key)
+        if not targets or target not in targets:
+            return None
+        
+        rel = targets.pop(target)
+        if not targets:
+            del self._out[key]
+            self._types[source].discard(relationship_type)
+            if not self._types[source]:
+                del self._types[source]
+        
+        incoming = self._in.get(target)
+        if incoming is not None:
+            incoming.discard(key)
+            if not incoming:
+                del self._in[target]
+        
+        return rel
+    
+    def remove_node(self, gist_id: str) -> Set[str]:
+        """Drop every edge touching a node; returns sources that lost edges."""
+        touched = set()
+        
+        for relationship_type in list(self._types.get(gist_id, ())):
+            for target in list(self._out.get((gist_id, relationship_type), ())):
+                self.remove(gist_id, target, relationship_type)
+            touched.add(gist_id)
+        
+        for source, relationship_type in list(self._in.get(gist_id, ())):
+            self.remove(source, gist_id, relationship_type)
+            touched.add(source)
+        
+        return touched
@@ -0,0 +1,216 @@
+"""
+Incremental tracking of evolution trees in the thought network.
+"""
+
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+
+
+class EvolutionTracker:
+    """Maintains evolution trees (parent -> children) incrementally.
+
+    Every thought that takes part in an evolution knows its parent, children,
+    root, depth and subtree size. Chain statistics are kept as running
+    counters, so they never require a walk over the whole network. A parent
+    evolved more than once forks its tree; all branches are kept.
+
+    An evolution chain is a tree with more than one thought, and its length
+    is the number of thoughts in it.
+    """
+    
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self.parent: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.root: Dict[str, str] = {}
+        self.depth: Dict[str, int] = {}
+        self.size: Dict[str, int] = {}
+        self.chain_roots: Dict[str, None] = {}
+        self.chain_count = 0
+        self.total_chain_length = 0
+    
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str]]) -> 'EvolutionTracker':
+        """Build a tracker from ``(parent, child)`` pairs in one pass."""
+        tracker = cls()
+        for parent_id, child_id in edges:
+            if child_id in tracker.parent or parent_id == child_id:
+                continue
+            tracker.parent[child_id] = parent_id
+            tracker.children.setdefault(parent_id, []).append(child_id)
+        
+        # Drop edges that would close a cycle
+        for child_id in list(tracker.parent):
+            seen = {child_id}
+            node = tracker.parent.get(child_id)
+            while node is not None and node not in seen:
+                seen.add(node)
+                node = tracker.parent.get(node)
+            if node == child_id:
+                tracker._detach(child_id)
+        
+        for node in list(tracker.children):
+            if node not in tracker.parent:
+                tracker._settle_tree(node)
+                tracker._count_tree(node, 1)
+        
+        return tracker
+    
+    def _detach(self, child_id: str):
+        """Remove the parent pointer of a node without bookkeeping."""
+        parent_id = self.parent.pop(child_id)
+        siblings = self.children[parent_id]
+        siblings.remove(child_id)
+        if not siblings:
+            del self.children[parent_id]
+    
+    def _subtree(self, node: str) -> List[str]:
+        """Nodes of the subtree rooted at ``node`` in depth-first order."""
+        order = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            order.append(current)
+            stack.extend(reversed(self.children.get(current, ())))
+        return order
+    
+    def _settle_tree(self, node: str):
+        """Recompute root, depth and subtree size below a node."""
+        root_id = self.root_of(self.parent[node]) if node in self.parent else node
+        base_depth = self.depth_of(self.parent[node]) + 1 if node in self.parent else 0
+        
+        order = self._subtree(node)
+        for current in order:
+            self.root[current] = root_id
+            parent_id = self.parent.get(current)
+            self.depth[current] = base_depth if current == node else self.depth[parent_id] + 1
+        
+        for current in reversed(order):
+            self.size[current] = 1 + sum(self.size[c] for c in self.children.get(current, ()))
+        
+        for current in order:
+            if current not in self.parent and current not in self.children:
+                # Isolated thoughts need no entries
+                self.root.pop(current, None)
+                self.depth.pop(current, None)
+                self.size.pop(current, None)
+    
+    def _count_tree(self, root_id: str, sign: int):
+        """Add or remove a tree from the chain counters."""
+        size = self.size_of(root_id)
+        if size > 1:
+            self.chain_count += sign
+            self.total_chain_length += sign * size
+            if sign > 0:
+                self.chain_roots[root_id] = None
+            else:
+                self.chain_roots.pop(root_id, None)
+    
+    def root_of(self, gist_id: str) -> str:
+        """Root of the evolution tree containing a thought."""
+        return self.root.get(gist_id, gist_id)
+    
+    def depth_of(self, gist_id: str) -> int:
+        """Distance of a thought from its evolution root."""
+        return self.depth.get(gist_id, 0)
+    
+    def size_of(self, gist_id: str) -> int:
+        """Number of thoughts in the subtree rooted at a thought."""
+        return self.size.get(gist_id, 1)
+    
+    def link(self, parent_id: str, child_id: str) -> bool:
+        """Record that ``child_id`` evolved from ``parent_id``."""
+        if child_id in self.parent or parent_id == child_id:
+            return False
+        
+        # Refuse edges that would make a thought its own ancestor
+        node: Optional[str] = parent_id
+        while node is not None:
+            if node == child_id:
+                return False
+            node = self.parent.get(node)
+        
+        parent_root = self.root_of(parent_id)
+        self._count_tree(parent_root, -1)
+        self._count_tree(child_id, -1)
+        
+        child_size = self.size_of(child_id)
+        self.parent[child_id] = parent_id
+        self.children.setdefault(parent_id, []).append(child_id)
+        
+        if parent_id not in self.size:
+            self.root[parent_id] = parent_id
+            self.depth[parent_id] = 0
+            self.size[parent_id] = 1
+        
+        node = parent_id
+        while node is not None:
+            self.size[node] += child_size
+            node = self.parent.get(node)
+        
+        self._settle_tree(child_id)
+        self._count_tree(parent_root, 1)
+        return True
+    
+    def unlink(self, parent_id: str, child_id: str) -> bool:
+        """Remove an evolution edge, splitting the child's subtree off."""
+        if self.parent.get(child_id) != parent_id:
+            return False
+        
+        root_id = self.root_of(parent_id)
+        self._count_tree(root_id, -1)
+        
+        child_size = self.size_of(child_id)
+        self._detach(child_id)
+        
+        node: Optional[str] = parent_id
+        while node is not None:
+            self.size[node] -= child_size
+            node = self.parent.get(node)
+        
+        self._settle_tree(child_id)
+        if parent_id not in self.parent and parent_id not in self.children:
+            self._settle_tree(parent_id)  # Drops the now isolated parent
+        self._count_tree(root_id, 1)
+        self._count_tree(child_id, 1)
+        return True
+    
+    def remove_node(self, gist_id: str):
+        """Drop a thought; its children become roots of their own trees."""
+        if gist_id in self.parent:
+            self.unlink(self.parent[gist_id], gist_id)
+        for child_id in list(self.children.get(gist_id, ())):
+            self.unlink(gist_id, child_id)
+    
+    def chain(self, gist_id: str) -> List[str]:
+        """All thoughts in a thought's evolution tree, root first, depth-first."""
+        return self._subtree(self.root_of(gist_id))
+    
+    def lineage(self, gist_id: str) -> List[str]:
+        """Path from the evolution root down to a thought."""
+        path = [gist_id]
+        while path[-1] in self.parent:
+            path.append(self.parent[path[-1]])
+        return list(reversed(path))
+    
+    def tree(self, gist_id: str) -> Dict[str, Any]:
+        """Nested evolution tree containing a thought."""
+        nodes = {}
+        for node in self.chain(gist_id):
+            nodes[node] = {
+                'gist_id': node,
+                'depth': self.depth_of(node),
+                'size': self.size_of(node),
+                'children': []
+            }
+            if node in self.parent:
+                nodes[self.parent[node]]['children'].append(nodes[node])
+        
+        return nodes[self.root_of(gist_id)]
+    
+    def chains(self) -> List[List[str]]:
+        """All evolution trees with more than one thought."""
+        return [self._subtree(root_id) for root_id in self.chain_roots]
+    
+    def avg_chain_length(self) -> float:
+        """Average number of thoughts per evolution chain."""
+        return self.total_chain_length / self.chain_count if self.chain_count else 0
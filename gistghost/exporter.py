@@ -0,0 +1,181 @@
+"""
+Streaming export of the thought network and of k-hop subgraphs.
+"""
+
+import json
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+
+EXPORT_FORMATS = ('json', 'ndjson', 'dot', 'graphml')
+
+STATUS_COLORS = {
+    'new': 'lightblue',
+    'processing': 'yellow',
+    'complete': 'lightgreen',
+    'evolving': 'orange'
+}
+
+# Thought fields written as GraphML node attributes
+GRAPHML_NODE_KEYS = ('intent', 'status', 'priority', 'origin_hydra', 'timestamp', 'parent_gist')
+
+Thoughts = Iterable[Tuple[str, Dict[str, Any]]]
+Relationships = Iterable[Tuple[str, List[Dict[str, Any]]]]
+
+
+def k_hop(start: str, hops: int, neighbours: Callable[[str], Iterable[Tuple[str, str]]],
+          accept: Callable[[str], bool],
+          relationship_types: Optional[Set[str]] = None) -> List[str]:
+    """Ids of thoughts within ``hops`` edges of ``start``, in breadth-first order.
+
+    ``neighbours(gist_id)`` yields ``(other_id, relationship_type)`` pairs in
+    either direction. Only edges of ``relationship_types`` (all if None) are
+    followed, and thoughts rejected by ``accept`` are neither included nor
+    walked through. The start thought is always included.
+    """
+    selected = {start}
+    order = [start]
+    frontier = deque([(start, 0)])
+    
+    while frontier:
+        gist_id, depth = frontier.popleft()
+        if depth == hops:
+            continue
+        
+        for other_id, relationship_type in neighbours(gist_id):
+            if other_id in selected:
+                continue
+            if relationship_types is not None and relationship_type not in relationship_types:
+                continue
+            if not accept(other_id):
+                continue
+            selected.add(other_id)
+            order.append(other_id)
+            frontier.append((other_id, depth + 1))
+    
+    return order
+
+
+def write_network(out: TextIO, format_type: str, thoughts: Thoughts,
+                  relationships: Relationships, metadata: Optional[Dict[str, Any]] = None):
+    """Write a network to a text stream, one thought or edge list at a time.
+
+    ``thoughts`` yields ``(gist_id, record)`` and ``relationships`` yields
+    ``(from_gist, [rel, ...])``; both are consumed lazily, so neither the
+    network nor the output document has to fit in memory at once.
+    """
+    writers = {
+        'json': _write_json,
+        'ndjson': _write_ndjson,
+        'dot': _write_dot,
+        'graphml': _write_graphml
+    }
+    if format_type not in writers:
+        raise ValueError(f"Unsupported export format: {format_type}")
+    
+    writers[format_type](out, thoughts, relationships, metadata or {})
+
+
+def _dumps(value: Any) -> str:
+    """Compact single-line JSON."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _write_json(out: TextIO, thoughts: Thoughts, relationships: Relationships,
+                metadata: Dict[str, Any]):
+    """Write the index.json layout: thoughts, relationships and metadata."""
+    out.write('{\n  "thoughts": {')
+    separator = '\n'
+    for gist_id, record in thoughts:
+        out.write(f'{separator}    {_dumps(gist_id)}: {_dumps(record)}')
+        separator = ',\n'
+    
+    out.write('\n  },\n  "relationships": {')
+    separator = '\n'
+    for from_gist, rels in relationships:
+        if not rels:
+            continue
+        out.write(f'{separator}    {_dumps(from_gist)}: {_dumps(rels)}')
+        separator = ',\n'
+    
+    out.write(f'\n  }},\n  "metadata": {_dumps(metadata)}\n}}\n')
+
+
+def _write_ndjson(out: TextIO, thoughts: Thoughts, relationships: Relationships,
+                  metadata: Dict[str, Any]):
+    """Write one JSON object per line: metadata, then thoughts, then edges."""
+    out.write(_dumps({'kind': 'metadata', 'data': metadata}) + '\n')
+    for gist_id, record in thoughts:
+        out.write(_dumps({'kind': 'thought', 'id': gist_id, 'data': record}) + '\n')
+    for from_gist, rels in relationships:
+        for rel in rels:
+            out.write(_dumps({
+                'kind': 'relationship',
+                'from': from_gist,
+                'to': rel['to'],
+                'type': rel['type'],
+                'created_at': rel.get('created_at')
+            }) + '\n')
+
+
+def _dot_string(value: str) -> str:
+    """Quote a string for DOT."""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ') + '"'
+
+
+def _is_mirror(relationship_type: str) -> bool:
+    """Whether an edge only mirrors another one in the opposite direction."""
+    return relationship_type == 'evolved_from' or relationship_type.startswith('reverse_')
+
+
+def _write_dot(out: TextIO, thoughts: Thoughts, relationships: Relationships,
+               metadata: Dict[str, Any]):
+    """Write a GraphViz digraph; mirrored edges are drawn once."""
+    out.write('digraph GistGhost {\n')
+    out.write('  node [shape=box];\n')
+    
+    for gist_id, record in thoughts:
+        label = (record.get('intent') or 'Unknown')[:30]
+        color = STATUS_COLORS.get(record.get('status', 'unknown'), 'gray')
+        out.write(f'  {_dot_string(gist_id)} [label={_dot_string(label)} '
+                  f'fillcolor="{color}" style="filled"];\n')
+    
+    for from_gist, rels in relationships:
+        for rel in rels:
+            if _is_mirror(rel['type']):
+                continue
+            style = 'solid' if rel['type'] == 'evolved_to' else 'dashed'
+            out.write(f'  {_dot_string(from_gist)} -> {_dot_string(rel["to"])} [style="{style}"];\n')
+    
+    out.write('}\n')
+
+
+def _write_graphml(out: TextIO, thoughts: Thoughts, relationships: Relationships,
+                   metadata: Dict[str, Any]):
+    """Write a GraphML document with thought fields as node attributes."""
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    for key in GRAPHML_NODE_KEYS:
+        key_type = 'int' if key == 'priority' else 'string'
+        out.write(f'  <key id="{key}" for="node" attr.name="{key}" attr.type="{key_type}"/>\n')
+    out.write('  <key id="type" for="edge" attr.name="type" attr.type="string"/>\n')
+    out.write('  <key id="created_at" for="edge" attr.name="created_at" attr.type="string"/>\n')
+    out.write('  <graph id="GistGhost" edgedefault="directed">\n')
+    
+    for gist_id, record in thoughts:
+        out.write(f'    <node id={quoteattr(gist_id)}>\n')
+        for key in GRAPHML_NODE_KEYS:
+            if record.get(key) is not None:
+                out.write(f'      <data key="{key}">{escape(str(record[key]))}</data>\n')
+        out.write('    </node>\n')
+    
+    for from_gist, rels in relationships:
+        for rel in rels:
+            out.write(f'    <edge source={quoteattr(from_gist)} target={quoteattr(rel["to"])}>\n')
+            out.write(f'      <data key="type">{escape(rel["type"])}</data>\n')
+            if rel.get('created_at'):
+                out.write(f'      <data key="created_at">{escape(rel["created_at"])}</data>\n')
+            out.write('    </edge>\n')
+    
+    out.write('  </graph>\n</graphml>\n')
@@ -5,12 +5,36 @@ Gist class for managing thought cells with Hydra Network metadata.
 import json
 import uuid
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+
+# Separates a bundle's GitHub gist ID from the file name of a thought in it
+BUNDLE_SEPARATOR = '/'
+
+# Description prefix marking a gist that holds many thoughts, one per file
+BUNDLE_MARKER = '🧠 Bundle'
+
+
+def thought_key(gist_id: str, filename: Optional[str] = None) -> str:
+    """Index key of a thought: the gist ID, plus the file name for a bundled thought."""
+    return f"{gist_id}{BUNDLE_SEPARATOR}{filename}" if filename else gist_id
+
+
+def split_thought_key(key: str) -> Tuple[str, Optional[str]]:
+    """Split an index key into ``(GitHub gist ID, file name or None)``."""
+    gist_id, _, filename = key.partition(BUNDLE_SEPARATOR)
+    return gist_id, filename or None
 
 
 class Gist:
     """Represents a single thought cell in the Hydra Network."""
     
+    # Index listings build one Gist per row; slots keep each one small
+    __slots__ = (
+        'gist_id', 'origin_hydra', 'intent', 'priority', 'file_format', 'parent_gist',
+        'version', 'status', 'timestamp', '_content', '_content_loader', '_filename', '_node_id'
+    )
+    
     def __init__(
         self,
         origin_hydra: str,
@@ -23,21 +47,74 @@ class Gist:
         version: str = "1.0.0",
         status: str = "new",
         gist_id: Optional[str] = None,
-        timestamp: Optional[str] = None
+        timestamp: Optional[str] = None,
+        content_loader: Optional[Callable[[], str]] = None,
+        node_id: Optional[str] = None
     ):
-        """Initialize a new Gist thought cell."""
+        """Initialize a new Gist thought cell.
+        
+        If ``content_loader`` is given, ``content`` is fetched through it on
+        first access instead of being passed in up front. ``filename`` and
+        ``node_id`` are generated on first access when not given.
+        """
         self.gist_id = gist_id
         self.origin_hydra = origin_hydra
         self.intent = intent
         self.priority = max(1, min(10, priority))  # Clamp between 1-10
-        self.content = content
+        self._content = None if content_loader else content
+        self._content_loader = content_loader
         self.file_format = file_format
-        self.filename = filename or self._generate_filename()
+        self._filename = filename
         self.parent_gist = parent_gist
         self.version = version
         self.status = status
         self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
-        self.node_id = str(uuid.uuid4())
+        self._node_id = node_id
+    
+    @property
+    def content(self) -> str:
+        """Thought body, loaded on first access for gists read from an index."""
+        if self._content is None and self._content_loader is not None:
+            self._content = self._content_loader()
+            self._content_loader = None
+        return self._content
+    
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self._content_loader = None
+    
+    @property
+    def filename(self) -> str:
+        """File name on GitHub, derived from the intent unless set explicitly."""
+        if self._filename is None:
+            self._filename = self._generate_filename()
+        return self._filename
+    
+    @filename.setter
+    def filename(self, value: Optional[str]):
+        self._filename = value
+    
+    @property
+    def github_id(self) -> Optional[str]:
+        """ID of the GitHub gist holding this thought (a bundle's, for bundled thoughts)."""
+        return split_thought_key(self.gist_id)[0] if self.gist_id else None
+    
+    @property
+    def bundled(self) -> bool:
+        """Whether this thought is one file of a multi-thought gist."""
+        return bool(self.gist_id) and split_thought_key(self.gist_id)[1] is not None
+    
+    @property
+    def node_id(self) -> str:
+        """Unique node identifier, assigned on first access for new thoughts."""
+        if self._node_id is None:
+            self._node_id = str(uuid.uuid4())
+        return self._node_id
+    
+    @node_id.setter
+    def node_id(self, value: str):
+        self._node_id = value
     
     def _generate_filename(self) -> str:
         """Generate a filename based on intent and format."""
@@ -94,11 +171,29 @@ class Gist:
         return {
             "description": f"🧠 {self.intent} | Hydra: {self.origin_hydra}",
             "public": False,  # Private by default for security
-            "files": {
-                self.filename: {
-                    "content": self.get_full_content()
-                }
-            }
+            "files": self.to_github_files()
+        }
+    
+    def to_github_files(self) -> Dict[str, Dict[str, str]]:
+        """This thought's entry in the ``files`` of a GitHub Gist API request."""
+        filename = split_thought_key(self.gist_id)[1] if self.bundled else self.filename
+        return {filename: {"content": self.get_full_content()}}
+    
+    @staticmethod
+    def bundle_to_github_format(gists: List['Gist']) -> Dict[str, Any]:
+        """GitHub Gist API format of one gist holding many thoughts, one file each.
+        
+        File names must be unique within the bundle.
+        """
+        files = {}
+        for gist in gists:
+            files.update(gist.to_github_files())
+        
+        origins = sorted({gist.origin_hydra for gist in gists})
+        return {
+            "description": f"{BUNDLE_MARKER} of {len(gists)} thoughts | Hydra: {', '.join(origins)}",
+            "public": False,
+            "files": files
         }
     
     def evolve(self, new_content: Optional[str] = None, new_intent: Optional[str] = None) -> 'Gist':
@@ -142,21 +237,61 @@ class Gist:
         }
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'Gist':
-        """Create Gist instance from dictionary."""
-        return cls(**data)
+    def from_dict(cls, data: Dict[str, Any],
+                  content_loader: Optional[Callable[[], str]] = None) -> 'Gist':
+        """Create Gist instance from dictionary.
+        
+        Index records carry a ``content_hash`` instead of the body; pass a
+        ``content_loader`` to fetch it lazily. The record is read, not copied.
+        """
+        return cls(
+            origin_hydra=data['origin_hydra'],
+            intent=data['intent'],
+            priority=data.get('priority', 5),
+            content=data.get('content', ''),
+            file_format=data.get('file_format', 'md'),
+            filename=data.get('filename'),
+            parent_gist=data.get('parent_gist'),
+            version=data.get('version', '1.0.0'),
+            status=data.get('status', 'new'),
+            gist_id=data.get('gist_id'),
+            timestamp=data.get('timestamp'),
+            content_loader=content_loader,
+            node_id=data.get('node_id')
+        )
+    
+    @classmethod
+    def from_github_gist(cls, gist_data: Dict[str, Any],
+                         filename: Optional[str] = None) -> Optional['Gist']:
+        """Parse a GitHub gist and extract Hydra metadata.
+        
+        Reads the first file, or the named one of a bundle; a thought read
+        from a named file is keyed by ``(gist ID, file name)``.
+        """
+        files = gist_data.get('files', {})
+        if not files:
+            return None
+        if filename is None:
+            return cls._from_github_file(gist_data, next(iter(files.values())))
+        if filename not in files:
+            return None
+        return cls._from_github_file(gist_data, files[filename], bundled=True)
+    
+    @classmethod
+    def from_github_bundle(cls, gist_data: Dict[str, Any]) -> List['Gist']:
+        """Parse every file of a multi-thought gist into its own thought."""
+        thoughts = [
+            cls._from_github_file(gist_data, file_data, bundled=True)
+            for file_data in gist_data.get('files', {}).values()
+        ]
+        return [thought for thought in thoughts if thought]
     
     @classmethod
-    def from_github_gist(cls, gist_data: Dict[str, Any]) -> Optional['Gist']:
-        """Parse a GitHub gist and extract Hydra metadata."""
+    def _from_github_file(cls, gist_data: Dict[str, Any], file_data: Dict[str, Any],
+                          bundled: bool = False) -> Optional['Gist']:
+        """Parse one file of a GitHub gist into a thought."""
         try:
-            # Get the first file from the gist
-            files = gist_data.get('files', {})
-            if not files:
-                return None
-            
-            first_file = next(iter(files.values()))
-            content = first_file.get('content', '')
+            content = file_data.get('content', '')
             
             # Try to parse metadata from content
             if content.startswith('---'):
@@ -196,14 +331,15 @@ class Gist:
                 actual_content = content
             
             # Extract metadata with defaults
+            filename = file_data.get('filename', 'thought.md')
             return cls(
-                gist_id=gist_data['id'],
+                gist_id=thought_key(gist_data['id'], filename if bundled else None),
                 origin_hydra=metadata.get('origin_hydra', 'unknown'),
                 intent=metadata.get('intent', gist_data.get('description', 'Unknown intent')),
                 priority=metadata.get('priority', 5),
                 content=actual_content,
                 file_format=metadata.get('file_format', 'md'),
-                filename=first_file.get('filename', 'thought.md'),
+                filename=filename,
                 parent_gist=metadata.get('parent_gist'),
                 version=metadata.get('version', '1.0.0'),
                 status=metadata.get('status', 'new'),
@@ -11,13 +11,24 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import datetime
 import uuid
 
 from gist import Gist
 from github_client import GitHubClient
+from http_cache import HTTPCache
+from rate_limit import RateLimitScheduler
+from exporter import EXPORT_FORMATS
 from index_manager import IndexManager
+from sqlite_index import SQLiteIndexManager
+from sharding import ShardedIndexManager
+from replication import Replica, parse_address
+from work_queue import WorkQueue
+
+
+DUPLICATE_POLICIES = ('allow', 'refuse', 'link', 'evolve')
+
 
 class GistGhost:
     """Main GistGhost application class."""
@@ -31,8 +42,11 @@ class GistGhost:
         self.index_file = self.config_dir / "index.json"
         
         self.config = self._load_config()
-        self.github_client = GitHubClient(self.config.get("github_token"))
-        self.index_manager = IndexManager(self.index_file)
+        self.github_client = self._open_github_client(self.config.get("github_token"))
+        self.index_manager = self._open_index()
+        self.work_queue = WorkQueue(
+            self.index_manager, self.config_dir, lease_seconds=self.config['lease_seconds']
+        )
     
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file or environment."""
@@ -45,13 +59,80 @@ class GistGhost:
         # Override with environment variables
         if os.getenv('GITHUB_TOKEN'):
             config['github_token'] = os.getenv('GITHUB_TOKEN')
+        if os.getenv('GISTGHOST_REPLICATION_SECRET'):
+            config['replication_secret'] = os.getenv('GISTGHOST_REPLICATION_SECRET')
         
         # Default values
         config.setdefault('origin_hydra', 'gistghost-local')
         config.setdefault('default_priority', 5)
+        config.setdefault('index_backend', 'json')
+        config.setdefault('journal_index', False)
+        config.setdefault('snapshot_format', 'json')
+        config.setdefault('duplicate_policy', 'allow')
+        config.setdefault('duplicate_threshold', 0.9)
+        config.setdefault('shard_by_origin', False)
+        config.setdefault('lease_seconds', 300)
+        config.setdefault('bundle_size', 100)
+        config.setdefault('github_concurrency', 8)
+        config.setdefault('http_cache', True)
+        config.setdefault('http_cache_max_bytes', 50 * 1024 * 1024)
+        config.setdefault('github_max_retries', 5)
+        config.setdefault('rate_limit_max_wait', 300)
         
         return config
     
+    def _open_github_client(self, github_token: Optional[str]) -> GitHubClient:
+        """Create the GitHub client, with the on-disk response cache unless disabled."""
+        cache = None
+        if self.config.get('http_cache'):
+            cache = HTTPCache(self.config_dir / "http_cache", self.config['http_cache_max_bytes'])
+        scheduler = RateLimitScheduler(
+            max_retries=self.config['github_max_retries'],
+            max_wait=self.config['rate_limit_max_wait']
+        )
+        return GitHubClient(
+            github_token, concurrency=self.config['github_concurrency'],
+            cache=cache, scheduler=scheduler
+        )
+    
+    def _open_index(self):
+        """Open the configured index backend, split into per-origin shards if enabled."""
+        if not self.config.get('shard_by_origin'):
+            return self._open_backend(self.config_dir)
+        
+        shards_dir = self.config_dir / "shards"
+        migrate = not shards_dir.exists() and any(
+            (self.config_dir / name).exists() for name in ("index.json", "index.db")
+        )
+        if migrate:
+            # One-shot split of the existing unsharded index, over every origin
+            ShardedIndexManager(shards_dir, self._open_backend).import_index(
+                self._open_backend(self.config_dir).to_index()
+            )
+        return ShardedIndexManager(
+            shards_dir, self._open_backend, origins=self.config.get('shard_origins')
+        )
+    
+    def _open_backend(self, directory: Path):
+        """Open the configured index backend ('json' or 'sqlite') stored in a directory."""
+        backend = self.config.get('index_backend', 'json')
+        index_file = directory / "index.json"
+        
+        if backend == 'sqlite':
+            db_file = directory / "index.db"
+            if not db_file.exists() and index_file.exists():
+                # One-shot migration of an existing JSON index
+                return SQLiteIndexManager.migrate_from_json(index_file, db_file)
+            return SQLiteIndexManager(db_file)
+        elif backend == 'json':
+            return IndexManager(
+                index_file,
+                journaled=self.config.get('journal_index', False),
+                snapshot_format=self.config.get('snapshot_format', 'json')
+            )
+        else:
+            raise ValueError(f"Unsupported index backend: {backend}")
+    
     def _save_config(self):
         """Save current configuration to file."""
         with open(self.config_file, 'w') as f:
@@ -64,7 +145,7 @@ class GistGhost:
             self.config['origin_hydra'] = origin_hydra
         
         self._save_config()
-        self.github_client = GitHubClient(github_token)
+        self.github_client = self._open_github_client(github_token)
         
         print("🧠 GistGhost initialized successfully!")
         print(f"   Origin Hydra: {self.config['origin_hydra']}")
@@ -72,12 +153,39 @@ class GistGhost:
         print(f"   Index location: {self.index_file}")
     
     def create_thought(self, content: str, intent: str, priority: int = None, 
-                      file_format: str = "md", filename: Optional[str] = None) -> str:
-        """Create a new thought Gist."""
+                      file_format: str = "md", filename: Optional[str] = None,
+                      on_duplicate: Optional[str] = None,
+                      similarity_threshold: Optional[float] = None) -> str:
+        """Create a new thought Gist.
+        
+        ``on_duplicate`` decides what happens when the index already holds a
+        thought with nearly the same content: 'allow' creates it anyway,
+        'refuse' returns the existing thought's ID without calling GitHub,
+        'link' creates it and links it to the existing one, and 'evolve'
+        evolves the existing thought instead. Both settings default to the
+        ``duplicate_policy`` and ``duplicate_threshold`` config values.
+        """
         if not self.config.get('github_token'):
             raise ValueError("GitHub token not configured. Run 'gistghost setup' first.")
         
         priority = priority or self.config.get('default_priority', 5)
+        policy = on_duplicate or self.config.get('duplicate_policy', 'allow')
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"Invalid duplicate policy. Must be one of: {list(DUPLICATE_POLICIES)}")
+        
+        duplicate = None
+        if policy != 'allow':
+            threshold = similarity_threshold or self.config.get('duplicate_threshold', 0.9)
+            matches = self.index_manager.find_similar(content, threshold, limit=1)
+            if matches:
+                duplicate, similarity = matches[0]
+                print(f"♻️  Near-duplicate of {duplicate} ({similarity:.0%} similar)")
+                
+                if policy == 'refuse':
+                    print("   Not created; reusing the existing thought")
+                    return duplicate
+                if policy == 'evolve':
+                    return self.evolve_thought(duplicate, new_content=content, new_intent=intent)
         
         # Create Gist object
         gist = Gist(
@@ -102,8 +210,112 @@ class GistGhost:
         print(f"   Priority: {priority}")
         print(f"   URL: {gist_data['html_url']}")
         
+        if duplicate:
+            self.link_thoughts(gist_id, duplicate, 'near-duplicate')
+        
         return gist_id
     
+    def create_thoughts(self, thoughts: List[Dict[str, Any]],
+                        bundle_size: Optional[int] = None) -> List[str]:
+        """Create many thoughts, packed ``bundle_size`` to a gist (one POST per bundle).
+        
+        Each entry needs an ``intent`` and may give ``content``, ``priority``,
+        ``format`` and ``filename``. A bundle size of 1 creates one gist per
+        thought, ``github_concurrency`` at a time. Bundled thoughts are
+        indexed as ``<gist ID>/<file name>``. Duplicate checks are skipped.
+        """
+        if not self.config.get('github_token'):
+            raise ValueError("GitHub token not configured. Run 'gistghost setup' first.")
+        
+        bundle_size = bundle_size or self.config.get('bundle_size', 100)
+        gists = [
+            Gist(
+                origin_hydra=self.config['origin_hydra'],
+                intent=thought['intent'],
+                priority=thought.get('priority') or self.config.get('default_priority', 5),
+                content=thought.get('content', ''),
+                file_format=thought.get('format', 'md'),
+                filename=thought.get('filename')
+            )
+            for thought in thoughts
+        ]
+        
+        created = []
+        if bundle_size == 1:
+            results = self.github_client.create_many(gists)
+            with self.index_manager.batch():
+                for gist, result in zip(gists, results):
+                    if isinstance(result, Exception):
+                        print(f"❌ Failed to create {gist.intent}: {result}")
+                        continue
+                    self.index_manager.add_gist(gist)
+                    created.append(gist.gist_id)
+                    print(f"💫 Created thought: {gist.gist_id} ({result['html_url']})")
+            return created
+        
+        for start in range(0, len(gists), bundle_size):
+            bundle = gists[start:start + bundle_size]
+            gist_data = self.github_client.create_bundle(bundle)
+            
+            # Indexed per bundle, so a failed POST later on leaves the earlier ones recorded
+            with self.index_manager.batch():
+                for gist in bundle:
+                    self.index_manager.add_gist(gist)
+            created.extend(gist.gist_id for gist in bundle)
+            print(f"💫 Created {len(bundle)} thought(s) in {gist_data['id']}: {gist_data['html_url']}")
+        
+        return created
+    
+    def push_thoughts(self, gist_ids: List[str]) -> List[Dict[str, Any]]:
+        """Send the indexed state of thoughts to GitHub, one PATCH per gist they live in."""
+        gists = []
+        for gist_id in gist_ids:
+            gist = self.index_manager.get_gist(gist_id)
+            if not gist:
+                raise ValueError(f"Gist {gist_id} not found in local index")
+            gists.append(gist)
+        
+        results = self.github_client.update_gists(gists)
+        print(f"📤 Pushed {len(gists)} thought(s) with {len(results)} update(s)")
+        return results
+    
+    def sync_thoughts(self, status_filter: Optional[str] = None) -> Dict[str, int]:
+        """Refresh indexed thoughts' metadata from GitHub.
+
+        With the HTTP cache on, thoughts whose gist hasn't changed cost a
+        ``304 Not Modified`` each instead of a full download.
+        """
+        synced = changed = failed = 0
+        cursor = None
+        while True:
+            page = self.index_manager.query_gists(status=status_filter, limit=100, cursor=cursor)
+            gists = [self.index_manager.get_gist(record['gist_id']) for record in page['thoughts']]
+            gists = [gist for gist in gists if gist is not None]
+            before = [gist.timestamp for gist in gists]
+            
+            results = self.github_client.sync_many(gists)
+            with self.index_manager.batch():
+                for gist, timestamp, ok in zip(gists, before, results):
+                    if not ok:
+                        failed += 1
+                    elif gist.timestamp != timestamp:
+                        self.index_manager.update_gist(gist)
+                        changed += 1
+            synced += sum(results)
+            
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        
+        print(f"🔄 Synced {synced} thought(s): {changed} changed, {failed} failed")
+        stats = {'synced': synced, 'changed': changed, 'failed': failed}
+        if self.github_client.cache is not None:
+            cache_stats = self.github_client.cache.stats()
+            print(f"💾 HTTP cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es), "
+                  f"{cache_stats['entries']} entries ({cache_stats['bytes']} bytes)")
+            stats.update(cache_stats)
+        return stats
+    
     def evolve_thought(self, gist_id: str, new_content: Optional[str] = None,
                       new_intent: Optional[str] = None) -> str:
         """Evolve an existing thought by creating a child Gist."""
@@ -127,9 +339,10 @@ class GistGhost:
         parent_gist.status = "complete"
         self.github_client.update_gist(parent_gist)
         
-        # Update index
-        self.index_manager.update_gist(parent_gist)
-        self.index_manager.add_gist(evolved_gist)
+        # Update index in a single write
+        with self.index_manager.batch():
+            self.index_manager.update_gist(parent_gist)
+            self.index_manager.add_gist(evolved_gist)
         
         print(f"🔄 Evolved thought: {new_gist_id}")
         print(f"   Parent: {gist_id}")
@@ -146,10 +359,55 @@ class GistGhost:
         print(f"   {gist_id_1} -> {gist_id_2}")
         print(f"   Relationship: {relationship}")
     
+    def run_queue(self, action: str, gist_id: Optional[str] = None, token: Optional[str] = None,
+                  worker: Optional[str] = None, seconds: Optional[float] = None) -> Any:
+        """Lease, renew, finish or inspect thoughts of the work queue."""
+        queue = self.work_queue
+        
+        if action == 'lease':
+            lease = queue.lease(worker, seconds)
+            if lease:
+                # Machine-readable, so worker scripts can pick up the token
+                print(json.dumps(lease))
+            else:
+                print("📭 No new thoughts waiting")
+            return lease
+        
+        if action == 'reclaim':
+            reclaimed = queue.reclaim()
+            print(f"♻️  Reclaimed {len(reclaimed)} expired lease(s)")
+            return reclaimed
+        
+        if action == 'stats':
+            stats = queue.stats()
+            print(f"📬 Queue: {stats['queued']} waiting, {stats['leased']} leased")
+            return stats
+        
+        if not gist_id or not token:
+            raise ValueError(f"'{action}' needs a gist ID and --token")
+        
+        if action == 'renew':
+            held, done = queue.renew(gist_id, token, seconds), "Renewed"
+        elif action == 'complete':
+            held, done = queue.complete(gist_id, token), "Completed"
+        else:
+            held, done = queue.release(gist_id, token), "Released"
+        
+        if held:
+            print(f"✅ {done} lease on {gist_id}")
+        else:
+            print(f"❌ Lease on {gist_id} expired or was taken over")
+        return held
+    
     def list_thoughts(self, status_filter: Optional[str] = None, 
-                     limit: int = 10) -> List[Dict]:
-        """List thoughts from the index."""
-        thoughts = self.index_manager.list_gists(status_filter, limit)
+                     limit: int = 10, **filters) -> List[Dict]:
+        """List thoughts from the index.
+        
+        Extra filters (priority_min, priority_max, origin, since, until,
+        cursor) are passed through to ``IndexManager.query_gists``.
+        """
+        result = self.index_manager.query_gists(status=status_filter, limit=limit, **filters)
+        thoughts = result['thoughts']
         
         if not thoughts:
             print("🤔 No thoughts found")
@@ -172,10 +430,136 @@ class GistGhost:
                 print(f"   Parent: {thought['parent_gist'][:8]}...")
             print()
         
+        if result['next_cursor']:
+            print(f"➡️  More results: --cursor {result['next_cursor']}")
+        
         return thoughts
     
-    def show_network(self):
+    def search_thoughts(self, query: str, mode: str = 'newest', limit: int = 10) -> List[Dict]:
+        """Search thoughts in the index."""
+        thoughts = self.index_manager.search_thoughts(query, mode=mode, limit=limit)
+        
+        if not thoughts:
+            print(f"🤔 No thoughts match '{query}'")
+            return []
+        
+        print(f"🔍 Thoughts matching '{query}' ({len(thoughts)}):")
+        print("-" * 80)
+        
+        for thought in thoughts:
+            print(f"   {thought['gist_id'][:8]}... | {thought['intent']}")
+            print(f"   Priority: {thought['priority']} | {thought['timestamp']}")
+            print()
+        
+        return thoughts
+    
+    def report_duplicates(self, threshold: Optional[float] = None,
+                          limit: int = 20) -> List[Tuple[str, str, float]]:
+        """Report pairs of existing thoughts with nearly the same content."""
+        threshold = threshold or self.config.get('duplicate_threshold', 0.9)
+        pairs = self.index_manager.find_duplicates(threshold)
+        
+        if not pairs:
+            print(f"✨ No near-duplicate thoughts at {threshold:.0%} similarity")
+            return []
+        
+        print(f"♻️  Near-duplicate thoughts ({len(pairs)} pairs at ≥{threshold:.0%} similarity):")
+        print("-" * 80)
+        
+        for first, second, similarity in pairs[:limit]:
+            first_gist = self.index_manager.get_gist(first)
+            second_gist = self.index_manager.get_gist(second)
+            print(f"   {similarity:.0%} | {first[:8]}... {first_gist.intent if first_gist else ''}")
+            print(f"        | {second[:8]}... {second_gist.intent if second_gist else ''}")
+            print()
+        
+        if len(pairs) > limit:
+            print(f"   ... and {len(pairs) - limit} more (use --limit to show them)")
+        
+        return pairs
+    
+    def show_similar(self, gist_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Show the thoughts that read most like a given one, linked or not."""
+        gist = self.index_manager.get_gist(gist_id)
+        if not gist:
+            print(f"❌ Thought {gist_id} not found in index")
+            return []
+        
+        similar = self.index_manager.similar_thoughts(gist_id, k)
+        if not similar:
+            print(f"🔍 No thoughts similar to {gist_id[:8]}...")
+            return []
+        
+        print(f"🧭 Thoughts similar to {gist_id[:8]}... ({gist.intent}):")
+        print("-" * 80)
+        
+        for match in similar:
+            thought = match['gist']
+            print(f"   {match['similarity']:.2f} | {thought['gist_id'][:8]}... | {thought.get('intent', '')}")
+        
+        return similar
+    
+    def _replication_secret(self) -> bytes:
+        """Shared secret that socket replication peers authenticate each other with."""
+        secret = self.config.get('replication_secret')
+        if not secret:
+            raise ValueError(
+                "Replication secret not configured. Set 'replication_secret' in config.json "
+                "or GISTGHOST_REPLICATION_SECRET, the same on every node."
+            )
+        return secret.encode('utf-8')
+    
+    def replicate(self, exchange: Optional[str] = None, serve: Optional[str] = None,
+                  connect: Optional[str] = None, allow_remote: bool = False):
+        """Sync the index with other gistghost nodes through a shared directory or a socket."""
+        replica = Replica(self.index_manager, self.config_dir)
+        
+        if serve:
+            secret = self._replication_secret()
+            print(f"🔁 Node {replica.node_id[:8]}... serving replication on {serve} (Ctrl+C to stop)")
+            try:
+                replica.serve(parse_address(serve), secret, allow_remote=allow_remote)
+            except KeyboardInterrupt:
+                pass
+            return {}
+        
+        if exchange:
+            merged = replica.sync_file(Path(exchange))
+        elif connect:
+            merged = replica.sync_socket(parse_address(connect), self._replication_secret())
+        else:
+            raise ValueError("Choose --exchange, --serve or --connect")
+        
+        print(f"🔁 Node {replica.node_id[:8]}... synced with {len(merged)} peer(s)")
+        for node, changes in merged.items():
+            print(f"   {node[:8]}...: {changes} change(s) merged")
+        return merged
+    
+    def analyze_network(self, top: int = 10, output: Optional[str] = None) -> Dict[str, Any]:
+        """Print (or save) PageRank, degree, component and evolution-root analytics as JSON."""
+        analysis = self.index_manager.analyze(top)
+        document = json.dumps(analysis, indent=2, ensure_ascii=False)
+        
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(document + '\n')
+            print(f"📈 Wrote network analysis to {output}")
+        else:
+            print(document)
+        
+        return analysis
+    
+    def show_network(self, verify: bool = False):
         """Show the thought network structure."""
+        if verify:
+            drift = self.index_manager.verify_network_stats()
+            if drift:
+                print("⚠️  Network counters had drifted and were repaired:")
+                for counter, (maintained, recomputed) in drift.items():
+                    print(f"   {counter}: {maintained} -> {recomputed}")
+            else:
+                print("✅ Network counters verified")
+        
         network = self.index_manager.get_network_stats()
         
         print("🌐 Thought Network Status:")
@@ -184,6 +568,42 @@ class GistGhost:
         print(f"   Completed thoughts: {network['completed_thoughts']}")
         print(f"   Evolution chains: {network['evolution_chains']}")
         print(f"   Semantic links: {network['semantic_links']}")
+        
+        storage = self.index_manager.storage_stats()
+        saved = storage['saved_bytes'] / storage['content_bytes'] * 100 if storage['content_bytes'] else 0.0
+        print(f"   Content storage: {storage['stored_bytes']:,} bytes for "
+              f"{storage['content_bytes']:,} bytes of thoughts "
+              f"({storage['delta_blobs']}/{storage['blobs']} blobs as deltas, {saved:.1f}% saved)")
+    
+    def export_network(self, format_type: str = 'json', output: Optional[str] = None,
+                       around: Optional[str] = None, hops: int = 2,
+                       relationship_types: Optional[List[str]] = None,
+                       statuses: Optional[List[str]] = None):
+        """Export the network, or the neighbourhood of one thought, to a file or stdout."""
+        options = dict(
+            around=around,
+            hops=hops,
+            relationship_types=relationship_types,
+            statuses=statuses
+        )
+        
+        if not output:
+            self.index_manager.export_stream(sys.stdout, format_type, **options)
+            return
+        
+        with open(output, 'w', encoding='utf-8') as f:
+            self.index_manager.export_stream(f, format_type, **options)
+        
+        scope = f"{hops}-hop neighbourhood of {around}" if around else "network"
+        print(f"📤 Exported {scope} as {format_type} to {output}")
+
+def parse_time_filter(value: str) -> str:
+    """Turn an ISO timestamp or a relative age like '7d' / '12h' into an ISO timestamp."""
+    units = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+    if len(value) > 1 and value[-1] in units and value[:-1].isdigit():
+        delta = datetime.timedelta(**{units[value[-1]]: int(value[:-1])})
+        return (datetime.datetime.now(datetime.timezone.utc) - delta).isoformat()
+    return value
 
 def main():
     """Main CLI entry point."""
@@ -197,8 +617,17 @@ Examples:
   gistghost setup --token ghp_xxxx --origin my-hydra-node
   gistghost create --intent "Market research" --content "Analysis of..."
   gistghost evolve abc123def --content "Updated analysis..."
+  gistghost bulk-create thoughts.jsonl --bundle-size 50
   gistghost link abc123def xyz789abc --relationship "builds-on"
   gistghost list --status active
+  gistghost list --priority-min 7 --origin my-hydra-node --since 7d
+  gistghost search "hosting perf" --mode ranked
+  gistghost export --around abc123def --hops 2 --format dot
+  gistghost create --intent "Market research" --content "..." --on-duplicate refuse
+  gistghost dedupe --threshold 0.8
+  gistghost similar abc123def --k 5
+  gistghost replicate --exchange /mnt/shared/gistghost
+  gistghost analyze --top 20
         """
     )
     
@@ -216,6 +645,25 @@ Examples:
     create_parser.add_argument('--priority', type=int, default=5, help='Priority (1-10)')
     create_parser.add_argument('--format', choices=['md', 'json', 'txt'], default='md', help='File format')
     create_parser.add_argument('--filename', help='Custom filename')
+    create_parser.add_argument('--on-duplicate', choices=DUPLICATE_POLICIES,
+                               help='What to do if a near-identical thought exists (default: config)')
+    create_parser.add_argument('--similarity', type=float,
+                               help='Similarity (0-1) at which thoughts count as duplicates')
+    
+    # Bulk create command
+    bulk_parser = subparsers.add_parser('bulk-create', help='Create many thoughts, bundled into shared gists')
+    bulk_parser.add_argument('file', help='JSON list or JSON lines of {"intent", "content", "priority", ...} (- for stdin)')
+    bulk_parser.add_argument('--bundle-size', type=int,
+                             help='Thoughts per gist (default: config bundle_size; 1 = one gist each)')
+    
+    # Sync command
+    sync_parser = subparsers.add_parser('sync', help='Refresh indexed thoughts from GitHub (cached)')
+    sync_parser.add_argument('--status', choices=['new', 'processing', 'complete', 'evolving'],
+                             help='Only sync thoughts with this status')
+    
+    # Push command
+    push_parser = subparsers.add_parser('push', help='Send indexed thoughts to GitHub, one update per gist')
+    push_parser.add_argument('gist_ids', nargs='+', help='Thoughts to push')
     
     # Evolve command
     evolve_parser = subparsers.add_parser('evolve', help='Evolve existing thought')
@@ -233,9 +681,70 @@ Examples:
     list_parser = subparsers.add_parser('list', help='List thoughts')
     list_parser.add_argument('--status', choices=['new', 'processing', 'complete', 'evolving'], help='Filter by status')
     list_parser.add_argument('--limit', type=int, default=10, help='Max results')
+    list_parser.add_argument('--priority-min', type=int, help='Minimum priority (1-10)')
+    list_parser.add_argument('--priority-max', type=int, help='Maximum priority (1-10)')
+    list_parser.add_argument('--origin', help='Filter by origin Hydra')
+    list_parser.add_argument('--since', type=parse_time_filter,
+                             help='Only thoughts at or after this time (ISO date/time, or e.g. 7d, 12h)')
+    list_parser.add_argument('--until', type=parse_time_filter,
+                             help='Only thoughts at or before this time (ISO date/time, or e.g. 7d, 12h)')
+    list_parser.add_argument('--cursor', help='Continue from a previous page')
+    
+    # Queue command
+    queue_parser = subparsers.add_parser('queue', help='Lease new thoughts to workers, by priority and age')
+    queue_parser.add_argument('action', choices=['lease', 'renew', 'complete', 'release', 'reclaim', 'stats'])
+    queue_parser.add_argument('gist_id', nargs='?', help='Leased gist ID (renew/complete/release)')
+    queue_parser.add_argument('--token', help='Lease token returned by lease')
+    queue_parser.add_argument('--worker', help='Worker name recorded with the lease')
+    queue_parser.add_argument('--seconds', type=float, help='Lease length (default: config lease_seconds)')
+    
+    # Search command
+    search_parser = subparsers.add_parser('search', help='Search thoughts')
+    search_parser.add_argument('query', help='Words to search for (prefix matching)')
+    search_parser.add_argument('--mode', choices=['newest', 'ranked', 'substring'], default='newest',
+                               help='Result ordering, or substring scan')
+    search_parser.add_argument('--limit', type=int, default=10, help='Max results')
     
     # Network command
     network_parser = subparsers.add_parser('network', help='Show network status')
+    network_parser.add_argument('--verify', action='store_true',
+                                help='Recompute the network counters from scratch and repair drift')
+    
+    # Dedupe command
+    dedupe_parser = subparsers.add_parser('dedupe', help='Report near-duplicate thoughts')
+    dedupe_parser.add_argument('--threshold', type=float, help='Minimum similarity (0-1)')
+    dedupe_parser.add_argument('--limit', type=int, default=20, help='Max pairs to show')
+    
+    # Similar command
+    similar_parser = subparsers.add_parser('similar', help='Find thoughts similar to one (needs NumPy)')
+    similar_parser.add_argument('gist_id', help='Thought to compare against')
+    similar_parser.add_argument('--k', type=int, default=10, help='Number of thoughts to show')
+    
+    # Replicate command
+    replicate_parser = subparsers.add_parser('replicate', help='Sync the index with other gistghost nodes')
+    replicate_transport = replicate_parser.add_mutually_exclusive_group(required=True)
+    replicate_transport.add_argument('--exchange', metavar='DIR', help='Shared directory to exchange deltas through')
+    replicate_transport.add_argument('--serve', metavar='ADDRESS', help='Serve syncs on host:port or a socket path')
+    replicate_transport.add_argument('--connect', metavar='ADDRESS', help='Sync with a node serving on an address')
+    replicate_parser.add_argument('--allow-remote', action='store_true',
+                                  help='Let --serve listen on a non-loopback address (traffic is not encrypted)')
+    
+    # Analyze command
+    analyze_parser = subparsers.add_parser('analyze', help='Rank and cluster thoughts (JSON, needs NumPy)')
+    analyze_parser.add_argument('--top', type=int, default=10, help='Entries per ranking')
+    analyze_parser.add_argument('--output', help='Output file (default: stdout)')
+    
+    # Export command
+    export_parser = subparsers.add_parser('export', help='Export the network or a subgraph')
+    export_parser.add_argument('--format', choices=EXPORT_FORMATS, default='json', help='Output format')
+    export_parser.add_argument('--around', help='Only export thoughts near this gist ID')
+    export_parser.add_argument('--hops', type=int, default=2, help='Neighbourhood radius for --around')
+    export_parser.add_argument('--type', action='append', dest='types',
+                               help='Only follow/export this relationship type (repeatable)')
+    export_parser.add_argument('--status', action='append', dest='statuses',
+                               choices=['new', 'processing', 'complete', 'evolving'],
+                               help='Only export thoughts with this status (repeatable)')
+    export_parser.add_argument('--output', help='Output file (default: stdout)')
     
     args = parser.parse_args()
     
@@ -263,9 +772,30 @@ Examples:
                 intent=args.intent,
                 priority=args.priority,
                 file_format=args.format,
-                filename=args.filename
+                filename=args.filename,
+                on_duplicate=args.on_duplicate,
+                similarity_threshold=args.similarity
             )
         
+        elif args.command == 'bulk-create':
+            if args.file == '-':
+                text = sys.stdin.read()
+            else:
+                with open(args.file, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            
+            if text.lstrip().startswith('['):
+                thoughts = json.loads(text)
+            else:
+                thoughts = [json.loads(line) for line in text.splitlines() if line.strip()]
+            ghost.create_thoughts(thoughts, args.bundle_size)
+        
+        elif args.command == 'push':
+            ghost.push_thoughts(args.gist_ids)
+        
+        elif args.command == 'sync':
+            ghost.sync_thoughts(args.status)
+        
         elif args.command == 'evolve':
             content = args.content
             if not content:
@@ -281,10 +811,47 @@ Examples:
             ghost.link_thoughts(args.gist_id_1, args.gist_id_2, args.relationship)
         
         elif args.command == 'list':
-            ghost.list_thoughts(args.status, args.limit)
+            ghost.list_thoughts(
+                args.status,
+                args.limit,
+                priority_min=args.priority_min,
+                priority_max=args.priority_max,
+                origin=args.origin,
+                since=args.since,
+                until=args.until,
+                cursor=args.cursor
+            )
+        
+        elif args.command == 'queue':
+            ghost.run_queue(args.action, args.gist_id, args.token, args.worker, args.seconds)
+        
+        elif args.command == 'search':
+            ghost.search_thoughts(args.query, args.mode, args.limit)
         
         elif args.command == 'network':
-            ghost.show_network()
+            ghost.show_network(args.verify)
+        
+        elif args.command == 'dedupe':
+            ghost.report_duplicates(args.threshold, args.limit)
+        
+        elif args.command == 'similar':
+            ghost.show_similar(args.gist_id, args.k)
+        
+        elif args.command == 'replicate':
+            ghost.replicate(args.exchange, args.serve, args.connect, args.allow_remote)
+        
+        elif args.command == 'analyze':
+            ghost.analyze_network(args.top, args.output)
+        
+        elif args.command == 'export':
+            ghost.export_network(
+                args.format,
+                args.output,
+                around=args.around,
+                hops=args.hops,
+                relationship_types=args.types,
+                statuses=args.statuses
+            )
     
     except Exception as e:
         print(f"❌ Error: {e}")
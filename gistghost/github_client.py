@@ -2,202 +2,113 @@
 GitHub API client for GistGhost operations.
 """
 
-import json
-import requests
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
 from gist import Gist
+from async_client import AsyncGitHubClient
+from http_cache import HTTPCache
+from rate_limit import DEFAULT_PRIORITY, RateLimitScheduler
 
 
 class GitHubClient:
-    """GitHub API client for managing Gists."""
+    """GitHub API client for managing Gists.
+
+    A blocking wrapper around ``AsyncGitHubClient``: each call runs the
+    async version to completion on this client's own event loop, so the
+    connection pool is kept between calls. The ``*_many`` methods run their
+    requests concurrently, up to ``concurrency`` at a time. Given an
+    ``HTTPCache``, reads are revalidated against it instead of downloaded.
+    Requests are paced and retried by a ``RateLimitScheduler``.
+    """
     
-    BASE_URL = "https://api.github.com"
+    BASE_URL = AsyncGitHubClient.BASE_URL
+    MAX_BUNDLE_FILES = AsyncGitHubClient.MAX_BUNDLE_FILES
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None,
+                 concurrency: int = AsyncGitHubClient.DEFAULT_CONCURRENCY,
+                 base_url: Optional[str] = None, cache: Optional[HTTPCache] = None,
+                 scheduler: Optional[RateLimitScheduler] = None):
         """Initialize GitHub client with authentication token."""
         self.token = token
-        self.session = requests.Session()
-        
-        if token:
-            self.session.headers.update({
-                'Authorization': f'token {token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'GistGhost/1.0.0'
-            })
-    
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
+        self.cache = cache
+        self.async_client = AsyncGitHubClient(
+            token, concurrency=concurrency, base_url=base_url, cache=cache, scheduler=scheduler
+        )
+        self.scheduler = self.async_client.scheduler
+        self._loop = asyncio.new_event_loop()
+    
+    def _run(self, coroutine) -> Any:
+        """Run a coroutine of the async client to completion."""
+        return self._loop.run_until_complete(coroutine)
+    
+    def close(self):
+        """Close the pooled connections and the event loop."""
+        if not self._loop.is_closed():
+            self._run(self.async_client.aclose())
+            self._loop.close()
+    
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                      priority: int = DEFAULT_PRIORITY) -> Dict[str, Any]:
         """Make authenticated request to GitHub API."""
-        if not self.token:
-            raise ValueError("GitHub token is required for API operations")
-        
-        url = f"{self.BASE_URL}{endpoint}"
-        
-        try:
-            if method.upper() == 'GET':
-                response = self.session.get(url, params=data)
-            elif method.upper() == 'POST':
-                response = self.session.post(url, json=data)
-            elif method.upper() == 'PATCH':
-                response = self.session.patch(url, json=data)
-            elif method.upper() == 'DELETE':
-                response = self.session.delete(url)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Handle rate limiting
-            if response.status_code == 403 and 'rate limit' in response.text.lower():
-                raise Exception("GitHub API rate limit exceeded. Please try again later.")
-            
-            # Handle other errors
-            if not response.ok:
-                error_msg = f"GitHub API error ({response.status_code}): {response.text}"
-                raise Exception(error_msg)
-            
-            return response.json() if response.content else {}
-            
-        except requests.RequestException as e:
-            raise Exception(f"Network error: {e}")
+        return self._run(self.async_client.request(method, endpoint, data, priority))
     
     def test_authentication(self) -> Dict[str, Any]:
         """Test if the authentication token is valid."""
-        try:
-            user_data = self._make_request('GET', '/user')
-            return {
-                'valid': True,
-                'username': user_data.get('login'),
-                'name': user_data.get('name'),
-                'email': user_data.get('email')
-            }
-        except Exception as e:
-            return {
-                'valid': False,
-                'error': str(e)
-            }
+        return self._run(self.async_client.test_authentication())
     
     def create_gist(self, gist: Gist) -> Dict[str, Any]:
         """Create a new gist on GitHub."""
-        gist_data = gist.to_github_format()
-        
-        response = self._make_request('POST', '/gists', gist_data)
-        
-        return {
-            'id': response['id'],
-            'html_url': response['html_url'],
-            'git_pull_url': response['git_pull_url'],
-            'git_push_url': response['git_push_url'],
-            'created_at': response['created_at'],
-            'updated_at': response['updated_at']
-        }
+        return self._run(self.async_client.create_gist(gist))
+    
+    def create_bundle(self, gists: List[Gist]) -> Dict[str, Any]:
+        """Create one gist holding many thoughts, one file each, with a single POST."""
+        return self._run(self.async_client.create_bundle(gists))
+    
+    def update_gists(self, gists: List[Gist]) -> List[Dict[str, Any]]:
+        """Update many thoughts, with one PATCH per GitHub gist they live in."""
+        return self._run(self.async_client.update_gists(gists))
     
     def update_gist(self, gist: Gist) -> Dict[str, Any]:
         """Update an existing gist on GitHub."""
-        if not gist.gist_id:
-            raise ValueError("Gist ID is required for updates")
-        
-        gist_data = gist.to_github_format()
-        # Remove description from updates to avoid conflicts
-        gist_data.pop('public', None)
-        
-        response = self._make_request('PATCH', f'/gists/{gist.gist_id}', gist_data)
-        
-        return {
-            'id': response['id'],
-            'html_url': response['html_url'],
-            'updated_at': response['updated_at']
-        }
-    
-    def get_gist(self, gist_id: str) -> Optional[Gist]:
+        return self._run(self.async_client.update_gist(gist))
+    
+    def get_gist(self, gist_id: str, priority: int = DEFAULT_PRIORITY) -> Optional[Gist]:
         """Retrieve a gist from GitHub and parse it."""
-        try:
-            gist_data = self._make_request('GET', f'/gists/{gist_id}')
-            return Gist.from_github_gist(gist_data)
-        except Exception as e:
-            print(f"Failed to retrieve gist {gist_id}: {e}")
-            return None
+        return self._run(self.async_client.get_gist(gist_id, priority))
+    
+    def create_many(self, gists: List[Gist]) -> List[Union[Dict[str, Any], Exception]]:
+        """Create many single-file gists concurrently; failures come back as exceptions."""
+        return self._run(self.async_client.create_many(gists))
+    
+    def update_many(self, gists: List[Gist]) -> List[Union[Dict[str, Any], Exception]]:
+        """Update many thoughts concurrently; failures come back as exceptions."""
+        return self._run(self.async_client.update_many(gists))
+    
+    def get_many(self, gist_ids: List[str]) -> List[Optional[Gist]]:
+        """Fetch many gists concurrently; None for any that could not be read."""
+        return self._run(self.async_client.get_many(gist_ids))
     
     def list_user_gists(self, per_page: int = 30, page: int = 1) -> List[Dict[str, Any]]:
         """List all gists for the authenticated user."""
-        params = {
-            'per_page': min(100, per_page),  # GitHub max is 100
-            'page': page
-        }
-        
-        try:
-            gists = self._make_request('GET', '/gists', params)
-            
-            # Filter for Hydra Network gists
-            hydra_gists = []
-            for gist_data in gists:
-                description = gist_data.get('description', '')
-                if '🧠' in description and 'Hydra:' in description:
-                    gist = Gist.from_github_gist(gist_data)
-                    if gist:
-                        hydra_gists.append(gist.to_dict())
-            
-            return hydra_gists
-            
-        except Exception as e:
-            print(f"Failed to list gists: {e}")
-            return []
+        return self._run(self.async_client.list_user_gists(per_page, page))
     
     def delete_gist(self, gist_id: str) -> bool:
         """Delete a gist (use with caution - violates never delete principle)."""
-        try:
-            self._make_request('DELETE', f'/gists/{gist_id}')
-            return True
-        except Exception as e:
-            print(f"Failed to delete gist {gist_id}: {e}")
-            return False
+        return self._run(self.async_client.delete_gist(gist_id))
     
     def search_gists_by_content(self, query: str, max_results: int = 50) -> List[Dict[str, Any]]:
         """Search through user's gists for content matches."""
-        # Note: GitHub doesn't provide native gist search, so we fetch and filter locally
-        all_gists = []
-        page = 1
-        
-        while len(all_gists) < max_results:
-            gists_page = self.list_user_gists(per_page=30, page=page)
-            if not gists_page:
-                break
-            
-            all_gists.extend(gists_page)
-            page += 1
-            
-            # Avoid infinite loops
-            if page > 10:
-                break
-        
-        # Filter by content/intent
-        query_lower = query.lower()
-        matching_gists = []
-        
-        for gist_data in all_gists:
-            if (query_lower in gist_data.get('intent', '').lower() or 
-                query_lower in gist_data.get('content', '').lower()):
-                matching_gists.append(gist_data)
-                
-                if len(matching_gists) >= max_results:
-                    break
-        
-        return matching_gists
+        return self._run(self.async_client.search_gists_by_content(query, max_results))
     
     def sync_gist_metadata(self, gist: Gist) -> bool:
         """Sync local gist metadata with GitHub version."""
-        try:
-            github_gist = self.get_gist(gist.gist_id)
-            if github_gist:
-                # Update local metadata from GitHub
-                gist.timestamp = github_gist.timestamp
-                return True
-            return False
-        except Exception as e:
-            print(f"Failed to sync gist {gist.gist_id}: {e}")
-            return False
+        return self._run(self.async_client.sync_gist_metadata(gist))
+    
+    def sync_many(self, gists: List[Gist]) -> List[bool]:
+        """Sync the metadata of many thoughts concurrently; False for any that failed."""
+        return self._run(self.async_client.sync_many(gists))
     
     def get_rate_limit_info(self) -> Dict[str, Any]:
         """Get current rate limit information."""
-        try:
-            response = self._make_request('GET', '/rate_limit')
-            return response.get('rate', {})
-        except Exception:
-            return {}
\ No newline at end of file
+        return self._run(self.async_client.get_rate_limit_info())
@@ -0,0 +1,161 @@
+"""
+On-disk cache of GitHub API responses, revalidated with conditional requests.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from journal import atomic_write
+
+
+# Bytes of cached responses kept on disk before the least recently used go
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+class HTTPCache:
+    """Caches GET response bodies per URL, with their ``ETag``/``Last-Modified``.
+
+    The client sends the stored validators as ``If-None-Match`` /
+    ``If-Modified-Since``; a ``304 Not Modified`` is answered from the cache
+    and, on GitHub, costs no rate-limit quota. Each entry is one file under
+    the cache directory, named by a hash of the URL and of the token it was
+    fetched with, so one user's private gists are never served to another.
+
+    Entries are evicted least recently used first once the cache grows past
+    ``max_bytes``; a hit touches the file, so recency survives restarts and
+    is shared by every process using the directory.
+    """
+    
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Open (or create) a cache stored in ``directory``."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Entry file name -> size, least recently used first; scanned on first use
+        self._entries: Optional['OrderedDict[str, int]'] = None
+        self._size = 0
+    
+    @staticmethod
+    def _key(url: str, scope: Optional[str]) -> str:
+        """File name of the entry for a URL fetched under a scope (the token)."""
+        digest = hashlib.sha256(f"{scope or ''}\n{url}".encode('utf-8')).hexdigest()
+        return f"{digest}.json"
+    
+    def _load_entries(self) -> 'OrderedDict[str, int]':
+        """Entry sizes by file name, least recently used first."""
+        if self._entries is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            found = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+            found.sort()
+            self._entries = OrderedDict((name, size) for _, name, size in found)
+            self._size = sum(self._entries.values())
+        return self._entries
+    
+    def _forget(self, name: str):
+        """Drop an entry from the in-memory view."""
+        self._size -= self._load_entries().pop(name, 0)
+    
+    def lookup(self, url: str, scope: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Stored entry for a URL (``etag``, ``last_modified``, ``body``), or None."""
+        name = self._key(url, scope)
+        entries = self._load_entries()
+        try:
+            with open(self.directory / name, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            # Missing, evicted by another process, or half-written
+            self._forget(name)
+            return None
+        
+        if entry.get('url') != url:
+            return None
+        if name not in entries:
+            # Stored by another process since the directory was scanned
+            entries[name] = os.path.getsize(self.directory / name)
+            self._size += entries[name]
+        return entry
+    
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Request headers that revalidate a stored entry."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def hit(self, url: str, scope: Optional[str] = None):
+        """Record that a stored entry was still fresh (a 304), making it most recently used."""
+        self.hits += 1
+        name = self._key(url, scope)
+        entries = self._load_entries()
+        if name in entries:
+            entries.move_to_end(name)
+            try:
+                os.utime(self.directory / name)
+            except OSError:
+                self._forget(name)
+    
+    def store(self, url: str, scope: Optional[str], etag: Optional[str],
+              last_modified: Optional[str], body: str):
+        """Record a full response (a miss), keeping it if it carries a validator."""
+        self.misses += 1
+        name = self._key(url, scope)
+        if not etag and not last_modified:
+            self.discard(url, scope)
+            return
+        
+        data = json.dumps({'url': url, 'etag': etag, 'last_modified': last_modified, 'body': body})
+        atomic_write(self.directory / name, data)
+        
+        self._forget(name)
+        entries = self._load_entries()
+        entries[name] = len(data.encode('utf-8'))
+        self._size += entries[name]
+        self._evict()
+    
+    def discard(self, url: str, scope: Optional[str] = None):
+        """Remove the entry for a URL, e.g. once the gist is gone."""
+        self._remove(self._key(url, scope))
+    
+    def _remove(self, name: str):
+        """Delete an entry file."""
+        self._forget(name)
+        try:
+            os.unlink(self.directory / name)
+        except FileNotFoundError:
+            pass
+    
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in ``max_bytes``."""
+        entries = self._load_entries()
+        while self._size > self.max_bytes and entries:
+            self._remove(next(iter(entries)))
+            self.evictions += 1
+    
+    def clear(self):
+        """Remove every cached response."""
+        for name in list(self._load_entries()):
+            self._remove(name)
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters of this process, and the cache's size on disk."""
+        entries = self._load_entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'bytes': self._size
+        }
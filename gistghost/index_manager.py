@@ -2,28 +2,178 @@
 Local index manager for GistGhost thought network.
 """
 
+import functools
+import heapq
+import io
 import json
 import os
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Set, TextIO, Tuple
 from datetime import datetime
 from gist import Gist
+from journal import IndexJournal, atomic_write, file_lock, file_signature
+from blob_store import BlobStore
+from edge_index import EdgeIndex
+from evolution import EvolutionTracker
+from text_index import TextIndex
+from minhash import MinHashIndex
+from vector_index import VectorIndex
+from analytics import CSRGraph, analyze_network
+from query_index import ThoughtIndexes
+from snapshot import read_snapshot, write_snapshot
+from exporter import k_hop, write_network
+
+
+def export_index(index: Dict[str, Any], format_type: str = 'json') -> str:
+    """Export an index document (thoughts + relationships) in various formats."""
+    out = io.StringIO()
+    write_network(
+        out, format_type, index['thoughts'].items(), index['relationships'].items(),
+        index.get('metadata')
+    )
+    return out.getvalue()
+
+
+def summarize_network(status_counts: Dict[str, int], semantic_edges: int,
+                      evolution_chains: int, total_chain_length: int) -> Dict[str, Any]:
+    """Build the network statistics summary from its maintained counters."""
+    return {
+        'total_thoughts': sum(status_counts.values()),
+        'active_thoughts': status_counts.get('new', 0) + status_counts.get('processing', 0),
+        'completed_thoughts': status_counts.get('complete', 0),
+        'evolving_thoughts': status_counts.get('evolving', 0),
+        'evolution_chains': evolution_chains,
+        'semantic_links': semantic_edges // 2,  # Divide by 2 for bidirectional links
+        'status_breakdown': dict(status_counts),
+        'avg_chain_length': total_chain_length / evolution_chains if evolution_chains else 0
+    }
+
+
+# Statistics counters persisted in the index metadata and kept up to date on every mutation
+STAT_COUNTERS = ('status_breakdown', 'semantic_edges', 'evolution_chains', 'total_chain_length')
+
+
+def _refreshing(method):
+    """Make an IndexManager method pick up external changes before it runs."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.refresh()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+def is_semantic(relationship_type: str) -> bool:
+    """Whether a relationship is a semantic link rather than part of an evolution."""
+    return not relationship_type.startswith('evolved_')
 
 
 class IndexManager:
     """Manages local index of thoughts and their relationships."""
     
-    def __init__(self, index_file: Path):
-        """Initialize index manager."""
+    # Journal size (bytes) past which it is folded back into index.json
+    COMPACT_THRESHOLD = 4 * 1024 * 1024
+    # Times to re-read index.json + journal when a compaction races the load
+    LOAD_ATTEMPTS = 5
+    
+    SNAPSHOT_FORMATS = ('json', 'binary')
+    
+    def __init__(self, index_file: Path, journaled: bool = False,
+                 compact_threshold: Optional[int] = None, snapshot_format: str = 'json'):
+        """Initialize index manager.
+        
+        In journaled mode mutations are appended to ``index.journal`` next to
+        the index file instead of rewriting the whole index on every change.
+        Thought bodies live in a content-addressed ``blobs/`` directory beside
+        it; index records only keep their ``content_hash``.
+        
+        Several processes may share one index: writers serialize on an
+        advisory lock on ``index.lock`` and merge what others wrote before
+        persisting, and readers pick up external changes without locking.
+        
+        With ``snapshot_format='binary'`` every index.json written is mirrored
+        by a pickled ``index.snapshot``, which later opens load instead of
+        parsing the JSON as long as it matches the index.json on disk.
+        """
+        if snapshot_format not in self.SNAPSHOT_FORMATS:
+            raise ValueError(f"Unsupported snapshot format: {snapshot_format}")
+        
         self.index_file = index_file
-        self.index = self._load_index()
+        self.snapshot_format = snapshot_format
+        self.snapshot_file = index_file.with_suffix('.snapshot')
+        self.journaled = journaled
+        self.compact_threshold = compact_threshold or self.COMPACT_THRESHOLD
+        self.journal = IndexJournal(index_file.with_suffix('.journal'))
+        self.search_index_file = index_file.with_suffix('.search.json')
+        self.minhash_index_file = index_file.with_suffix('.minhash.json')
+        self.vector_index_file = index_file.with_suffix('.vectors.npz')
+        self.lock_file = index_file.with_suffix('.lock')
+        self.blobs = BlobStore(index_file.parent / 'blobs')
+        self._batch_depth = 0
+        self._save_deferred = False
+        self._lock_held = False
+        
+        # Older index files embed thought bodies, and a non-journaled manager
+        # folds leftover journal records into index.json
+        if self._load():
+            self.compact()
     
-    def _load_index(self) -> Dict[str, Any]:
-        """Load index from file or create empty one."""
+    def _load(self) -> bool:
+        """Load the persisted index and replay the journal into memory.
+        
+        Returns True if the snapshot should be rewritten: it still had inline
+        contents, or a non-journaled manager found journal records in it.
+        """
+        for _ in range(self.LOAD_ATTEMPTS):
+            index_signature = file_signature(self.index_file)
+            index = self._load_index(index_signature)
+            records = self.journal.read()
+            
+            base = records[0] if records and records[0].get('op') == 'base' else None
+            if base is None or base['snapshot_id'] == index['metadata'].get('snapshot_id'):
+                break
+            # Another process compacted between the two reads; read both again
+        
+        self._index_signature = index_signature
+        self._pending: List[Dict[str, Any]] = []
+        self.index = index
+        self._snapshot_id = self.index['metadata'].get('snapshot_id')
+        
+        inline_contents = self._move_contents_to_blobs(self.index['thoughts'])
+        self._rebuild_derived()
+        self._load_counters()
+        
+        for record in records:
+            self._apply_record(record)
+        
+        # Replayed records are already durable
+        self._pending = []
+        self.index['metadata']['total_thoughts'] = len(self.index['thoughts'])
+        
+        replayed = any(record.get('op') != 'base' for record in records)
+        return bool(inline_contents) or (replayed and not self.journaled)
+    
+    def _load_index(self, signature: Optional[Tuple[int, int, int]] = None) -> Dict[str, Any]:
+        """Load index from file or create empty one.
+        
+        ``signature`` is the index.json signature taken before reading; a
+        binary snapshot written for exactly that file is loaded instead.
+        """
+        if self.snapshot_format == 'binary':
+            index = read_snapshot(self.snapshot_file, signature)
+            if index is not None:
+                return index
+        
         if self.index_file.exists():
             try:
                 with open(self.index_file, 'r', encoding='utf-8') as f:
                     index = json.load(f)
+                
+                if self.snapshot_format == 'binary' and signature is not None:
+                    # Snapshot missing or stale (e.g. index.json was written
+                    # by a JSON-only manager); the next open can skip the parse
+                    self._write_binary_snapshot(index, signature)
                     
                 # Ensure all required sections exist
                 index.setdefault('thoughts', {})
@@ -50,32 +200,324 @@ class IndexManager:
                 'created_at': datetime.utcnow().isoformat(),
                 'last_updated': datetime.utcnow().isoformat(),
                 'total_thoughts': 0,
-                'evolution_chains': 0
+                'status_breakdown': {},
+                'semantic_edges': 0,
+                'evolution_chains': 0,
+                'total_chain_length': 0
             }
         }
     
+    def _rebuild_derived(self):
+        """Rebuild in-memory lookup structures from the raw index."""
+        self.edges = EdgeIndex.from_relationships(self.index['relationships'])
+        self.evolution = self._build_evolution()
+        
+        self.thought_indexes = ThoughtIndexes.build(self.index['thoughts'].items())
+        
+        # The full-text, near-duplicate and similarity indexes are loaded on first use
+        self._text_index: Optional[TextIndex] = None
+        self._minhash_index: Optional[MinHashIndex] = None
+        self._vector_index: Optional[VectorIndex] = None
+        self._touched_since_snapshot = set()
+    
+    def _build_evolution(self) -> EvolutionTracker:
+        """Evolution forest of the raw index's ``evolved_to`` edges."""
+        return EvolutionTracker.from_edges(
+            (from_gist, rel['to'])
+            for from_gist, rels in self.index['relationships'].items()
+            for rel in rels
+            if rel['type'] == 'evolved_to'
+        )
+    
+    def _count_stats(self, evolution: EvolutionTracker) -> Dict[str, Any]:
+        """Count the statistics from scratch, in one pass over thoughts and relationships."""
+        status_counts: Dict[str, int] = {}
+        for gist_data in self.index['thoughts'].values():
+            status = gist_data.get('status', 'unknown')
+            status_counts[status] = status_counts.get(status, 0) + 1
+        
+        return {
+            'status_breakdown': status_counts,
+            'semantic_edges': sum(
+                1 for rels in self.index['relationships'].values()
+                for rel in rels if is_semantic(rel['type'])
+            ),
+            'evolution_chains': evolution.chain_count,
+            'total_chain_length': evolution.total_chain_length
+        }
+    
+    def _load_counters(self, trust_metadata: bool = True):
+        """Take the statistics counters from the metadata; counted only if they are missing."""
+        metadata = self.index['metadata']
+        if trust_metadata and all(counter in metadata for counter in STAT_COUNTERS):
+            self._counters = {counter: metadata[counter] for counter in STAT_COUNTERS}
+            self._counters['status_breakdown'] = dict(metadata['status_breakdown'])
+        else:
+            # Written before the counters were persisted (or restored from a backup)
+            self._counters = self._count_stats(self.evolution)
+    
+    def _count_status(self, status: str, delta: int):
+        """Adjust the persisted count of one status."""
+        status_counts = self._counters['status_breakdown']
+        status_counts[status] = status_counts.get(status, 0) + delta
+        if not status_counts[status]:
+            del status_counts[status]
+    
+    def _track_evolution(self, change: Callable[[], Any]):
+        """Apply a change to the evolution forest, carrying its effect into the counters."""
+        chains, length = self.evolution.chain_count, self.evolution.total_chain_length
+        change()
+        self._counters['evolution_chains'] += self.evolution.chain_count - chains
+        self._counters['total_chain_length'] += self.evolution.total_chain_length - length
+    
+    def _apply_record(self, record: Dict[str, Any]):
+        """Apply a single journal record to the in-memory index."""
+        op = record.get('op')
+        
+        if op == 'put':
+            self._put_thought(record['id'], record['data'])
+        elif op == 'del':
+            self._delete_thought(record['id'])
+        elif op == 'rel':
+            self._add_relationship(record['from'], record['to'], record['type'], record.get('at'))
+        elif op == 'unrel':
+            self._remove_relationship(record['from'], record['to'], record['type'])
+        elif op == 'meta':
+            self.index['metadata'].update(record['data'])
+    
+    def _record(self, record: Dict[str, Any]):
+        """Queue a mutation record for the next save."""
+        self._pending.append(record)
+    
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the writer lock shared by every process using this index."""
+        if self._lock_held:
+            yield
+            return
+        
+        with file_lock(self.lock_file):
+            self._lock_held = True
+            try:
+                yield
+            finally:
+                self._lock_held = False
+    
+    def _catch_up(self) -> bool:
+        """Merge changes other processes persisted since this manager last read or wrote.
+        
+        New journal records are applied incrementally; a replaced index.json
+        means a full reload. Mutations not yet saved here are re-applied on
+        top, so they win over the external ones. Returns True if anything
+        changed on disk.
+        """
+        if file_signature(self.index_file) != self._index_signature:
+            records = None
+        elif self.journal.changed():
+            records = self.journal.read_new()
+        else:
+            return False
+        
+        # Detached first: applying the external records queues them again
+        ours = self._pending
+        self._pending = []
+        if records is None:
+            self._load()
+        else:
+            for record in records:
+                self._apply_record(record)
+        
+        for record in ours:
+            self._apply_record(record)
+        # Queued verbatim: a re-applied record that is already in memory (our
+        # own links, after an incremental catch-up) queues nothing, yet still
+        # has to reach disk
+        self._pending = ours
+        return True
+    
+    def refresh(self) -> bool:
+        """Pick up changes written by other processes; returns True if there were any.
+        
+        Only the index and journal file signatures are checked when nothing
+        changed, so this is cheap enough to run before every read.
+        """
+        return self._catch_up()
+    
+    @contextmanager
+    def batch(self) -> Iterator['IndexManager']:
+        """Apply many mutations in memory and persist them with a single write.
+        
+        Saves requested inside the block are deferred until it exits. If the
+        block raises, every mutation made in it is discarded by reloading the
+        persisted index, and the exception propagates. Nested batches join
+        the outermost one.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self._save_deferred = False
+                self._load()
+            raise
+        finally:
+            self._batch_depth -= 1
+        
+        if not self._batch_depth and self._save_deferred:
+            self._save_deferred = False
+            self._save_index()
+    
     def _save_index(self):
         """Save index to file."""
-        # Update metadata
-        self.index['metadata']['last_updated'] = datetime.utcnow().isoformat()
-        self.index['metadata']['total_thoughts'] = len(self.index['thoughts'])
-        
-        # Create directory if it doesn't exist
-        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        if self._batch_depth:
+            self._save_deferred = True
+            return
         
         try:
-            with open(self.index_file, 'w', encoding='utf-8') as f:
-                json.dump(self.index, f, indent=2, ensure_ascii=False)
-        except IOError as e:
+            with self._locked():
+                # A stale writer first merges what others wrote meanwhile
+                self._catch_up()
+                
+                # Update metadata
+                self.index['metadata']['last_updated'] = datetime.utcnow().isoformat()
+                self.index['metadata']['total_thoughts'] = len(self.index['thoughts'])
+                self.index['metadata']['revision'] = self.revision + 1
+                self.index['metadata'].update(self._stat_counters())
+                
+                if self.journaled:
+                    self._record({'op': 'meta', 'data': self.index['metadata']})
+                    self.journal.append(self._pending)
+                    
+                    if self.journal.size() > self.compact_threshold:
+                        self.compact()
+                elif self.journal.journal_file.exists():
+                    self.compact()
+                else:
+                    self._write_snapshot()
+        except (IOError, OSError) as e:
             print(f"Warning: Could not save index file: {e}")
+        finally:
+            self._pending = []
+    
+    @property
+    def revision(self) -> int:
+        """Number of saves made to this index, by any process."""
+        return self.index['metadata'].get('revision', 0)
+    
+    def _write_snapshot(self):
+        """Atomically rewrite index.json with the full in-memory index."""
+        snapshot_id = uuid.uuid4().hex
+        self.index['metadata']['snapshot_id'] = snapshot_id
+        self.index['metadata'].update(self._stat_counters())
+        atomic_write(self.index_file, json.dumps(self.index, indent=2, ensure_ascii=False))
+        
+        self._index_signature = file_signature(self.index_file)
+        self._snapshot_id = snapshot_id
+        self._touched_since_snapshot.clear()
+        
+        if self.snapshot_format == 'binary':
+            self._write_binary_snapshot(self.index, self._index_signature)
+        
+        # Keep the persisted search indexes in step with the snapshot they describe
+        if self._text_index is not None:
+            self._text_index.save(self.search_index_file, snapshot_id)
+        if self._minhash_index is not None:
+            self._minhash_index.save(self.minhash_index_file, snapshot_id)
+        if self._vector_index is not None:
+            self._vector_index.save(self.vector_index_file, snapshot_id)
+    
+    def _write_binary_snapshot(self, index: Dict[str, Any], signature: Tuple[int, int, int]):
+        """Mirror an index.json version as a binary snapshot; failures only cost speed."""
+        try:
+            write_snapshot(self.snapshot_file, index, signature)
+        except (IOError, OSError) as e:
+            print(f"Warning: Could not write index snapshot: {e}")
+    
+    def compact(self):
+        """Fold the journal into a fresh index.json snapshot and truncate it.
+        
+        The snapshot is fsynced and renamed into place before the journal is
+        cleared, and journal records are idempotent, so a crash at any point
+        leaves either the old or the new state recoverable.
+        """
+        with self._locked():
+            self._catch_up()
+            self._write_snapshot()
+            self.journal.reset(self._snapshot_id)
+    
+    def _store_content(self, gist_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Move a record's content into the blob store, leaving its hash."""
+        if 'content' not in gist_data:
+            return gist_data
+        
+        # Evolutions are stored as deltas against their parent's body when that is smaller
+        parent = self.index['thoughts'].get(gist_data.get('parent_gist') or '')
+        base = parent.get('content_hash') if parent else None
+        
+        record = dict(gist_data)
+        record['content_hash'] = self.blobs.put(record.pop('content') or '', base=base)
+        return record
+    
+    def _move_contents_to_blobs(self, thoughts: Dict[str, Dict[str, Any]]) -> int:
+        """Replace inline contents of records with blob hashes; returns how many moved."""
+        moved = 0
+        for gist_id, gist_data in thoughts.items():
+            if 'content' in gist_data:
+                thoughts[gist_id] = self._store_content(gist_data)
+                moved += 1
+        return moved
+    
+    def _load_content(self, gist_data: Dict[str, Any]) -> str:
+        """Read the content of a thought record from the blob store."""
+        content_hash = gist_data.get('content_hash')
+        if content_hash is None:
+            return gist_data.get('content') or ''
+        return self.blobs.get(content_hash)
+    
+    def _put_thought(self, gist_id: str, gist_data: Dict[str, Any]):
+        """Store a thought record."""
+        content = gist_data.get('content')
+        gist_data = self._store_content(gist_data)
+        
+        previous = self.index['thoughts'].get(gist_id)
+        if previous is not None:
+            self._count_status(previous.get('status', 'unknown'), -1)
+        self._count_status(gist_data.get('status', 'unknown'), 1)
+        
+        self.index['thoughts'][gist_id] = gist_data
+        self.thought_indexes.add(gist_id, gist_data)
+        self._touched_since_snapshot.add(gist_id)
+        if self._text_index is not None:
+            self._text_index.add(gist_id, self._searchable_fields(gist_data, content))
+        if self._minhash_index is not None:
+            self._minhash_index.add(gist_id, content if content is not None else self._load_content(gist_data))
+        if self._vector_index is not None:
+            self._vector_index.add(gist_id, self._similarity_text(gist_data, content))
+        self._record({'op': 'put', 'id': gist_id, 'data': gist_data})
+    
+    def _delete_thought(self, gist_id: str):
+        """Drop a thought record together with all of its relationships."""
+        previous = self.index['thoughts'].pop(gist_id, None)
+        if previous is not None:
+            self._count_status(previous.get('status', 'unknown'), -1)
+        self.thought_indexes.remove(gist_id)
+        self._remove_all_relationships(gist_id)
+        self._touched_since_snapshot.add(gist_id)
+        if self._text_index is not None:
+            self._text_index.remove(gist_id)
+        if self._minhash_index is not None:
+            self._minhash_index.remove(gist_id)
+        if self._vector_index is not None:
+            self._vector_index.remove(gist_id)
+        self._record({'op': 'del', 'id': gist_id})
     
+    @_refreshing
     def add_gist(self, gist: Gist):
         """Add a gist to the index."""
         if not gist.gist_id:
             raise ValueError("Gist must have an ID to be indexed")
         
-        gist_data = gist.to_dict()
-        self.index['thoughts'][gist.gist_id] = gist_data
+        self._put_thought(gist.gist_id, gist.to_dict())
         
         # If this is an evolution, track the relationship
         if gist.parent_gist:
@@ -83,47 +525,74 @@ class IndexManager:
         
         self._save_index()
     
+    @_refreshing
     def update_gist(self, gist: Gist):
         """Update an existing gist in the index."""
         if not gist.gist_id:
             raise ValueError("Gist must have an ID to be updated")
         
         if gist.gist_id in self.index['thoughts']:
-            self.index['thoughts'][gist.gist_id] = gist.to_dict()
+            self._put_thought(gist.gist_id, gist.to_dict())
             self._save_index()
         else:
             print(f"Warning: Gist {gist.gist_id} not found in index")
     
+    @_refreshing
     def get_gist(self, gist_id: str) -> Optional[Gist]:
         """Retrieve a gist from the index."""
         gist_data = self.index['thoughts'].get(gist_id)
         if gist_data:
-            return Gist.from_dict(gist_data)
+            # The body stays in the blob store until the gist's content is read
+            return Gist.from_dict(gist_data, content_loader=lambda: self._load_content(gist_data))
+        return None
+    
+    @_refreshing
+    def get_record(self, gist_id: str) -> Optional[Dict[str, Any]]:
+        """Raw index record of a gist (its body as ``content_hash``), or None."""
+        return self.index['thoughts'].get(gist_id)
+    
+    @_refreshing
+    def get_content(self, gist_id: str) -> Optional[str]:
+        """Retrieve only the content of a gist."""
+        gist_data = self.index['thoughts'].get(gist_id)
+        if gist_data:
+            return self._load_content(gist_data)
         return None
     
+    @_refreshing
     def remove_gist(self, gist_id: str):
         """Remove a gist from the index (use sparingly)."""
         if gist_id in self.index['thoughts']:
-            del self.index['thoughts'][gist_id]
-            
-            # Clean up relationships
-            self._remove_all_relationships(gist_id)
+            # Clean up the thought and its relationships
+            self._delete_thought(gist_id)
             
             self._save_index()
     
     def list_gists(self, status_filter: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
         """List gists from the index with optional filtering."""
-        thoughts = list(self.index['thoughts'].values())
-        
-        # Filter by status if specified
-        if status_filter:
-            thoughts = [t for t in thoughts if t.get('status') == status_filter]
+        return self.query_gists(status=status_filter, limit=limit)['thoughts']
+    
+    @_refreshing
+    def query_gists(self, status: Optional[str] = None, priority_min: Optional[int] = None,
+                    priority_max: Optional[int] = None, origin: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None,
+                    limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Query gists by combined filters, newest first, with cursor pagination.
         
-        # Sort by timestamp (newest first)
-        thoughts.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+        Returns ``{'thoughts': [...], 'next_cursor': str or None}``; pass
+        ``next_cursor`` back as ``cursor`` to fetch the following page.
+        """
+        gist_ids, next_cursor = self.thought_indexes.query(
+            status=status, priority_min=priority_min, priority_max=priority_max,
+            origin=origin, since=since, until=until, limit=limit, cursor=cursor
+        )
         
-        return thoughts[:limit]
+        return {
+            'thoughts': [self.index['thoughts'][gist_id] for gist_id in gist_ids],
+            'next_cursor': next_cursor
+        }
     
+    @_refreshing
     def link_gists(self, gist_id_1: str, gist_id_2: str, relationship: str = "related"):
         """Create a semantic link between two gists."""
         # Validate both gists exist
@@ -136,53 +605,141 @@ class IndexManager:
         
         self._save_index()
     
-    def _add_relationship(self, from_gist: str, to_gist: str, relationship_type: str):
-        """Add a relationship between two gists."""
-        if from_gist not in self.index['relationships']:
-            self.index['relationships'][from_gist] = []
+    @_refreshing
+    def unlink_gists(self, gist_id_1: str, gist_id_2: str, relationship: str = "related"):
+        """Remove a semantic link between two gists, in both directions."""
+        self._remove_relationship(gist_id_1, gist_id_2, relationship)
+        self._remove_relationship(gist_id_2, gist_id_1, f"reverse_{relationship}")
+        
+        self._save_index()
+    
+    @_refreshing
+    def add_external_edge(self, from_gist: str, to_gist: str, relationship_type: str):
+        """Record one edge from a gist in this index to a gist kept in another one.
+        
+        Sharded indexes link thoughts across shards with an edge in each
+        direction, each stored in the shard of its source.
+        """
+        if from_gist not in self.index['thoughts']:
+            raise ValueError(f"Gist {from_gist} not found in index")
         
+        self._add_relationship(from_gist, to_gist, relationship_type)
+        self._save_index()
+    
+    @_refreshing
+    def remove_external_edge(self, from_gist: str, to_gist: str, relationship_type: str):
+        """Drop one edge from a gist in this index to a gist kept in another one."""
+        self._remove_relationship(from_gist, to_gist, relationship_type)
+        self._save_index()
+    
+    @_refreshing
+    def forget_external(self, gist_id: str):
+        """Drop every edge to a gist kept in another index, e.g. once it was removed there."""
+        if gist_id in self.index['thoughts'] or not self.edges.incoming(gist_id):
+            return
+        
+        self._delete_thought(gist_id)
+        self._save_index()
+    
+    @_refreshing
+    def get_edges(self, gist_id: str) -> List[Dict[str, Any]]:
+        """Edges leaving a gist, including those to gists kept in another index."""
+        return list(self.index['relationships'].get(gist_id, []))
+    
+    def _add_relationship(self, from_gist: str, to_gist: str, relationship_type: str,
+                          created_at: Optional[str] = None):
+        """Add a relationship between two gists."""
         # Check if relationship already exists
-        for rel in self.index['relationships'][from_gist]:
-            if rel['to'] == to_gist and rel['type'] == relationship_type:
-                return  # Relationship already exists
+        if self.edges.contains(from_gist, to_gist, relationship_type):
+            return
         
-        self.index['relationships'][from_gist].append({
+        created_at = created_at or datetime.utcnow().isoformat()
+        rel = {
             'to': to_gist,
             'type': relationship_type,
-            'created_at': datetime.utcnow().isoformat()
-        })
+            'created_at': created_at
+        }
+        self.index['relationships'].setdefault(from_gist, []).append(rel)
+        self.edges.add(from_gist, rel)
+        if is_semantic(relationship_type):
+            self._counters['semantic_edges'] += 1
+        
+        if relationship_type == 'evolved_to':
+            self._track_evolution(lambda: self.evolution.link(from_gist, to_gist))
+        self._record({'op': 'rel', 'from': from_gist, 'to': to_gist,
+                      'type': relationship_type, 'at': created_at})
+    
+    def _remove_relationship(self, from_gist: str, to_gist: str, relationship_type: str):
+        """Remove one relationship between two gists, if it exists."""
+        rel = self.edges.remove(from_gist, to_gist, relationship_type)
+        if rel is None:
+            return
+        
+        relationships = [
+            other for other in self.index['relationships'][from_gist]
+            if (other['to'], other['type']) != (to_gist, relationship_type)
+        ]
+        if relationships:
+            self.index['relationships'][from_gist] = relationships
+        else:
+            del self.index['relationships'][from_gist]
+        if is_semantic(relationship_type):
+            self._counters['semantic_edges'] -= 1
+        
+        if relationship_type == 'evolved_to':
+            self._track_evolution(lambda: self.evolution.unlink(from_gist, to_gist))
+        self._record({'op': 'unrel', 'from': from_gist, 'to': to_gist, 'type': relationship_type})
     
     def _add_evolution_relationship(self, parent_id: str, child_id: str):
         """Add an evolution relationship."""
         self._add_relationship(parent_id, child_id, "evolved_to")
         self._add_relationship(child_id, parent_id, "evolved_from")
-        
-        # Update evolution chain count
-        self.index['metadata']['evolution_chains'] = len(self.get_evolution_chains())
     
     def _remove_all_relationships(self, gist_id: str):
         """Remove all relationships involving a specific gist."""
-        # Remove outgoing relationships
-        if gist_id in self.index['relationships']:
-            del self.index['relationships'][gist_id]
-        
-        # Remove incoming relationships
-        for source_gist, relationships in self.index['relationships'].items():
-            self.index['relationships'][source_gist] = [
-                rel for rel in relationships if rel['to'] != gist_id
-            ]
+        # Outgoing edges go with the source list; incoming ones are found
+        # through the reverse index, so only neighbouring lists are touched
+        self._counters['semantic_edges'] -= sum(
+            1 for rel in self.edges.outgoing(gist_id) if is_semantic(rel['type'])
+        )
+        self._counters['semantic_edges'] -= sum(
+            1 for source, relationship_type in self.edges.incoming(gist_id)
+            if source != gist_id and is_semantic(relationship_type)
+        )
         
-        # Clean up empty relationship lists
-        empty_keys = [
-            key for key, rels in self.index['relationships'].items() 
-            if not rels
-        ]
-        for key in empty_keys:
-            del self.index['relationships'][key]
+        self.index['relationships'].pop(gist_id, None)
+        self._track_evolution(lambda: self.evolution.remove_node(gist_id))
+        
+        for source_gist in self.edges.remove_node(gist_id):
+            if source_gist == gist_id or source_gist not in self.index['relationships']:
+                continue
+            
+            relationships = [
+                rel for rel in self.index['relationships'][source_gist]
+                if rel['to'] != gist_id
+            ]
+            if relationships:
+                self.index['relationships'][source_gist] = relationships
+            else:
+                del self.index['relationships'][source_gist]
+    
+    @_refreshing
+    def get_neighbours(self, gist_id: str, relationship_type: str) -> List[str]:
+        """Get ids of gists linked from a gist by one relationship type."""
+        return self.edges.neighbours(gist_id, relationship_type)
     
-    def get_related_gists(self, gist_id: str) -> List[Dict[str, Any]]:
-        """Get all gists related to the given gist."""
-        relationships = self.index['relationships'].get(gist_id, [])
+    @_refreshing
+    def get_incoming(self, gist_id: str, relationship_type: Optional[str] = None) -> List[str]:
+        """Get ids of gists that link to a gist, optionally by relationship type."""
+        return [source for source, _ in self.edges.incoming(gist_id, relationship_type)]
+    
+    @_refreshing
+    def get_related_gists(self, gist_id: str, relationship_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all gists related to the given gist, optionally by relationship type."""
+        if relationship_type:
+            relationships = self.edges.outgoing(gist_id, relationship_type)
+        else:
+            relationships = self.index['relationships'].get(gist_id, [])
         related_gists = []
         
         for rel in relationships:
@@ -196,59 +753,153 @@ class IndexManager:
         
         return related_gists
     
+    @_refreshing
     def get_evolution_chain(self, gist_id: str) -> List[str]:
-        """Get the full evolution chain for a gist."""
-        # Find the root of the chain
-        current_id = gist_id
-        while True:
-            parents = [
-                rel['to'] for rel in self.index['relationships'].get(current_id, [])
-                if rel['type'] == 'evolved_from'
-            ]
-            if not parents:
-                break
-            current_id = parents[0]  # Take first parent
-        
-        # Build forward chain from root
-        chain = [current_id]
-        while True:
-            children = [
-                rel['to'] for rel in self.index['relationships'].get(current_id, [])
-                if rel['type'] == 'evolved_to'
-            ]
-            if not children:
-                break
-            current_id = children[0]  # Take first child
-            chain.append(current_id)
-        
-        return chain
+        """Get the full evolution chain (tree) for a gist, root first, including all branches."""
+        return self.evolution.chain(gist_id)
+    
+    @_refreshing
+    def get_lineage(self, gist_id: str) -> List[str]:
+        """Get the path from the evolution root down to a gist."""
+        return self.evolution.lineage(gist_id)
+    
+    @_refreshing
+    def get_evolution_tree(self, gist_id: str) -> Dict[str, Any]:
+        """Get the nested evolution tree containing a gist."""
+        return self.evolution.tree(gist_id)
     
+    @_refreshing
     def get_evolution_chains(self) -> List[List[str]]:
         """Get all evolution chains in the network."""
-        chains = []
-        processed_gists = set()
+        return self.evolution.chains()
+    
+    def _searchable_fields(self, gist_data: Dict[str, Any],
+                           content: Optional[str] = None) -> Dict[str, str]:
+        """Texts of a thought that go into the full-text index."""
+        fields = {field: gist_data.get(field) or '' for field in TextIndex.FIELD_WEIGHTS}
+        fields['content'] = content if content is not None else self._load_content(gist_data)
+        return fields
+    
+    def _lazy_index(self, cls: Any, path: Path, text_of: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Load a search index saved with the snapshot, or build it from every thought.
         
-        for gist_id in self.index['thoughts']:
-            if gist_id in processed_gists:
-                continue
-            
-            # Check if this is a root or part of a chain
-            has_parent = any(
-                rel['type'] == 'evolved_from'
-                for rel in self.index['relationships'].get(gist_id, [])
+        ``text_of`` maps a thought record to what the index stores for it.
+        """
+        thoughts = self.index['thoughts']
+        index = cls.load(path, self._snapshot_id)
+        if index is None:
+            return cls.build((gist_id, text_of(gist_data)) for gist_id, gist_data in thoughts.items())
+        
+        # Catch up with journal records applied since the snapshot
+        for gist_id in self._touched_since_snapshot:
+            if gist_id in thoughts:
+                index.add(gist_id, text_of(thoughts[gist_id]))
+            else:
+                index.remove(gist_id)
+        return index
+    
+    @property
+    def text_index(self) -> TextIndex:
+        """Full-text index, loaded from disk or built on first use."""
+        if self._text_index is None:
+            self._text_index = self._lazy_index(TextIndex, self.search_index_file, self._searchable_fields)
+        return self._text_index
+    
+    @property
+    def minhash_index(self) -> MinHashIndex:
+        """Near-duplicate index over thought contents, loaded from disk or built on first use."""
+        if self._minhash_index is None:
+            self._minhash_index = self._lazy_index(MinHashIndex, self.minhash_index_file, self._load_content)
+        return self._minhash_index
+    
+    def _similarity_text(self, gist_data: Dict[str, Any], content: Optional[str] = None) -> str:
+        """Text of a thought that goes into the similarity index: intent and content."""
+        if content is None:
+            content = self._load_content(gist_data)
+        return f"{gist_data.get('intent') or ''}\n{content}"
+    
+    @property
+    def vector_index(self) -> VectorIndex:
+        """Related-thought index (needs NumPy), loaded from disk or built on first use."""
+        if self._vector_index is None:
+            self._vector_index = self._lazy_index(VectorIndex, self.vector_index_file, self._similarity_text)
+        return self._vector_index
+    
+    @_refreshing
+    def analyze(self, top: int = 10) -> Dict[str, Any]:
+        """Rank and cluster the network: PageRank, degrees, components, evolution roots.
+        
+        Needs NumPy; see ``analytics.analyze_network`` for the result layout.
+        """
+        graph = CSRGraph.from_edges(
+            self.index['thoughts'],
+            (
+                (from_gist, rel['to'], rel['type'])
+                for from_gist, rels in self.index['relationships'].items()
+                for rel in rels
             )
-            
-            if not has_parent:
-                # This is a root, build the chain
-                chain = self.get_evolution_chain(gist_id)
-                if len(chain) > 1:  # Only include actual chains
-                    chains.append(chain)
-                    processed_gists.update(chain)
+        )
+        return analyze_network(graph, top)
+    
+    @_refreshing
+    def find_similar(self, content: str, threshold: float = 0.9, limit: Optional[int] = None,
+                     exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Find thoughts whose content nearly matches a text.
+        
+        Returns ``(gist_id, similarity)`` pairs, most similar first, where
+        similarity is the estimated Jaccard similarity of their word shingles.
+        """
+        matches = self.minhash_index.similar(content, threshold, exclude)
+        return matches if limit is None else matches[:limit]
+    
+    @_refreshing
+    def find_duplicates(self, threshold: float = 0.9) -> List[Tuple[str, str, float]]:
+        """Find pairs of indexed thoughts with nearly the same content."""
+        return self.minhash_index.duplicate_pairs(threshold)
+    
+    @_refreshing
+    def similar_thoughts(self, gist_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """The k thoughts whose intent and content read most like a given thought's.
+        
+        Unlike ``get_related_gists`` this needs no explicit links. Results
+        are ``{'gist', 'similarity'}`` dicts, most similar first.
+        """
+        return [
+            {'gist': self.index['thoughts'][other_id], 'similarity': score}
+            for other_id, score in self.vector_index.similar_to(gist_id, k)
+        ]
+    
+    @_refreshing
+    def search_thoughts(self, query: str, fields: List[str] = None, mode: str = 'newest',
+                        limit: Optional[int] = None, prefix: bool = True) -> List[Dict[str, Any]]:
+        """Search thoughts by content.
+        
+        Modes: 'newest' (index match, newest first), 'ranked' (BM25 relevance)
+        and 'substring' (case-insensitive substring scan of every thought).
+        """
+        if mode == 'substring':
+            return self._substring_search(query, fields, limit)
         
-        return chains
+        thoughts = self.index['thoughts']
+        
+        if mode == 'ranked':
+            scores = self.text_index.search(query, fields, prefix)
+            if limit is None:
+                ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            else:
+                ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [thoughts[gist_id] for gist_id, _ in ranked]
+        elif mode == 'newest':
+            matches = [thoughts[gist_id] for gist_id in self.text_index.matches(query, fields, prefix)]
+            if limit is None:
+                return sorted(matches, key=lambda x: x.get('timestamp', ''), reverse=True)
+            return heapq.nlargest(limit, matches, key=lambda x: x.get('timestamp', ''))
+        else:
+            raise ValueError(f"Unsupported search mode: {mode}")
     
-    def search_thoughts(self, query: str, fields: List[str] = None) -> List[Dict[str, Any]]:
-        """Search thoughts by content."""
+    def _substring_search(self, query: str, fields: Optional[List[str]] = None,
+                          limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search thoughts by substring, scanning every thought."""
         if fields is None:
             fields = ['intent', 'content', 'origin_hydra']
         
@@ -257,7 +908,10 @@ class IndexManager:
         
         for gist_data in self.index['thoughts'].values():
             for field in fields:
-                field_value = str(gist_data.get(field, '')).lower()
+                if field == 'content':
+                    field_value = self._load_content(gist_data).lower()
+                else:
+                    field_value = str(gist_data.get(field, '')).lower()
                 if query_lower in field_value:
                     matching_thoughts.append(gist_data)
                     break  # Avoid duplicate matches
@@ -265,82 +919,147 @@ class IndexManager:
         # Sort by timestamp (newest first)
         matching_thoughts.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         
-        return matching_thoughts
+        return matching_thoughts[:limit]
     
+    def _stat_counters(self) -> Dict[str, Any]:
+        """Statistics counters as persisted in the index metadata, kept up to date since."""
+        counters = dict(self._counters)
+        counters['status_breakdown'] = dict(self._counters['status_breakdown'])
+        return counters
+    
+    @_refreshing
+    def stat_counters(self) -> Dict[str, Any]:
+        """The raw counters behind ``get_network_stats``, for summing across shards."""
+        return self._stat_counters()
+    
+    @_refreshing
     def get_network_stats(self) -> Dict[str, Any]:
-        """Get network statistics."""
-        thoughts = self.index['thoughts']
-        relationships = self.index['relationships']
-        
-        status_counts = {}
-        for thought in thoughts.values():
-            status = thought.get('status', 'unknown')
-            status_counts[status] = status_counts.get(status, 0) + 1
+        """Get network statistics from the counters maintained on every mutation."""
+        counters = self._stat_counters()
+        return summarize_network(
+            counters['status_breakdown'], counters['semantic_edges'],
+            counters['evolution_chains'], counters['total_chain_length']
+        )
+    
+    @_refreshing
+    def verify_network_stats(self) -> Dict[str, Tuple[Any, Any]]:
+        """Check the persisted statistics counters against a full recount, repairing any drift.
         
-        # Count semantic links (excluding evolution relationships)
-        semantic_links = 0
-        for rels in relationships.values():
-            semantic_links += len([
-                rel for rel in rels 
-                if not rel['type'].startswith('evolved_')
-            ])
+        Returns ``{counter: (persisted, recounted)}`` for each counter that
+        disagreed; an empty dict means the counters were accurate.
+        """
+        evolution = self._build_evolution()
+        recounted = self._count_stats(evolution)
+        persisted = self._stat_counters()
+        drift = {
+            counter: (persisted[counter], value)
+            for counter, value in recounted.items()
+            if persisted[counter] != value
+        }
         
-        evolution_chains = self.get_evolution_chains()
+        if drift:
+            self.thought_indexes = ThoughtIndexes.build(self.index['thoughts'].items())
+            self.evolution = evolution
+            self._counters = recounted
+            self._save_index()
         
-        return {
-            'total_thoughts': len(thoughts),
-            'active_thoughts': status_counts.get('new', 0) + status_counts.get('processing', 0),
-            'completed_thoughts': status_counts.get('complete', 0),
-            'evolving_thoughts': status_counts.get('evolving', 0),
-            'evolution_chains': len(evolution_chains),
-            'semantic_links': semantic_links // 2,  # Divide by 2 for bidirectional links
-            'status_breakdown': status_counts,
-            'avg_chain_length': (
-                sum(len(chain) for chain in evolution_chains) / len(evolution_chains)
-                if evolution_chains else 0
-            )
-        }
+        return drift
+    
+    @_refreshing
+    def to_index(self) -> Dict[str, Any]:
+        """Copy of the index with thought contents inlined from the blob store."""
+        index = dict(self.index)
+        index['thoughts'] = {}
+        for gist_id, gist_data in self.index['thoughts'].items():
+            record = dict(gist_data)
+            record['content'] = self._load_content(record)
+            record.pop('content_hash', None)
+            index['thoughts'][gist_id] = record
+        return index
     
+    @_refreshing
     def export_network(self, format_type: str = 'json') -> str:
         """Export the entire network in various formats."""
-        if format_type == 'json':
-            return json.dumps(self.index, indent=2)
-        elif format_type == 'dot':
-            # GraphViz DOT format for visualization
-            lines = ['digraph GistGhost {']
-            lines.append('  node [shape=box];')
-            
-            # Add nodes
-            for gist_id, gist_data in self.index['thoughts'].items():
-                label = gist_data.get('intent', 'Unknown')[:30]
-                status = gist_data.get('status', 'unknown')
-                color = {
-                    'new': 'lightblue',
-                    'processing': 'yellow',
-                    'complete': 'lightgreen',
-                    'evolving': 'orange'
-                }.get(status, 'gray')
-                
-                lines.append(f'  "{gist_id}" [label="{label}" fillcolor="{color}" style="filled"];')
-            
-            # Add relationships
-            for from_gist, relationships in self.index['relationships'].items():
-                for rel in relationships:
-                    if rel['type'] in ['evolved_to', 'related']:
-                        style = 'solid' if rel['type'] == 'evolved_to' else 'dashed'
-                        lines.append(f'  "{from_gist}" -> "{rel["to"]}" [style="{style}"];')
-            
-            lines.append('}')
-            return '\n'.join(lines)
+        out = io.StringIO()
+        self.export_stream(out, format_type)
+        return out.getvalue()
+    
+    def _adjacent(self, gist_id: str) -> Iterable[Tuple[str, str]]:
+        """``(other_id, relationship_type)`` for edges leaving or entering a gist."""
+        for rel in self.edges.outgoing(gist_id):
+            yield rel['to'], rel['type']
+        yield from self.edges.incoming(gist_id)
+    
+    @_refreshing
+    def export_stream(self, out: TextIO, format_type: str = 'json', around: Optional[str] = None,
+                      hops: int = 1, relationship_types: Optional[List[str]] = None,
+                      statuses: Optional[List[str]] = None):
+        """Write the network, or the k-hop neighbourhood of one gist, to a text stream.
+        
+        Formats are 'json', 'ndjson', 'dot' and 'graphml'; the JSON formats
+        include thought contents, read from the blob store one at a time.
+        Relationship types and statuses restrict both the walk and the output.
+        """
+        thoughts = self.index['thoughts']
+        relationships = self.index['relationships']
+        types = set(relationship_types) if relationship_types else None
+        
+        def accept(gist_id: str) -> bool:
+            gist_data = thoughts.get(gist_id)
+            return gist_data is not None and (not statuses or gist_data.get('status') in statuses)
+        
+        if around is not None:
+            if around not in thoughts:
+                raise ValueError(f"Gist {around} not found in index")
+            selected: Optional[List[str]] = k_hop(around, hops, self._adjacent, accept, types)
+        elif statuses:
+            selected = [gist_id for gist_id in thoughts if accept(gist_id)]
         else:
-            raise ValueError(f"Unsupported export format: {format_type}")
+            selected = None
+        members: Optional[Set[str]] = set(selected) if selected is not None else None
+        
+        with_content = format_type in ('json', 'ndjson')
+        
+        def thought_records() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            for gist_id in (selected if selected is not None else thoughts):
+                record = thoughts[gist_id]
+                if with_content:
+                    record = dict(record, content=self._load_content(record))
+                    record.pop('content_hash', None)
+                yield gist_id, record
+        
+        def edge_lists() -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+            for from_gist in (selected if selected is not None else relationships):
+                rels = relationships.get(from_gist, [])
+                if members is not None or types is not None:
+                    rels = [
+                        rel for rel in rels
+                        if (members is None or rel['to'] in members)
+                        and (types is None or rel['type'] in types)
+                    ]
+                yield from_gist, rels
+        
+        write_network(out, format_type, thought_records(), edge_lists(), self.index['metadata'])
     
     def backup_index(self, backup_path: Path):
-        """Create a backup of the current index."""
+        """Create a self-contained backup of the current index, contents included."""
         backup_path.parent.mkdir(parents=True, exist_ok=True)
         
         with open(backup_path, 'w', encoding='utf-8') as f:
-            json.dump(self.index, f, indent=2, ensure_ascii=False)
+            json.dump(self.to_index(), f, indent=2, ensure_ascii=False)
+    
+    def prune_blobs(self) -> int:
+        """Delete stored contents no thought refers to; returns how many were removed."""
+        referenced = {
+            gist_data['content_hash']
+            for gist_data in self.index['thoughts'].values()
+            if 'content_hash' in gist_data
+        }
+        return self.blobs.prune(referenced)
+    
+    def storage_stats(self) -> Dict[str, int]:
+        """Sizes of the stored thought bodies and the space delta encoding saves."""
+        return self.blobs.stats()
     
     def restore_index(self, backup_path: Path):
         """Restore index from backup."""
@@ -348,6 +1067,20 @@ class IndexManager:
             raise FileNotFoundError(f"Backup file not found: {backup_path}")
         
         with open(backup_path, 'r', encoding='utf-8') as f:
-            self.index = json.load(f)
+            index = json.load(f)
         
-        self._save_index()
\ No newline at end of file
+        # Replace the snapshot outright; stale journal records, and whatever
+        # other processes wrote before the restore, must not be merged back
+        with self._locked():
+            revision = self.revision
+            self.index = index
+            self._move_contents_to_blobs(self.index['thoughts'])
+            self._rebuild_derived()
+            self._load_counters(trust_metadata=False)
+            
+            self._pending = []
+            self.index['metadata']['last_updated'] = datetime.utcnow().isoformat()
+            self.index['metadata']['total_thoughts'] = len(self.index['thoughts'])
+            self.index['metadata']['revision'] = revision + 1
+            self._write_snapshot()
+            self.journal.reset(self._snapshot_id)
@@ -0,0 +1,232 @@
+"""
+Append-only journal and crash-safe file helpers for the GistGhost index.
+"""
+
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows locks through msvcrt instead
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Whether the missing-locking warning was printed already
+_lock_warned = False
+
+
+def fsync_directory(directory: Path):
+    """Flush a directory entry so a rename inside it survives a crash."""
+    if os.name != 'posix':
+        return
+    
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: Path, data: Union[str, bytes]):
+    """Write text (or bytes) to a file via fsync + atomic rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per writer, so processes racing on the same path don't collide
+    tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex[:12]}.tmp')
+    
+    if isinstance(data, bytes):
+        opened = open(tmp_path, 'wb')
+    else:
+        opened = open(tmp_path, 'w', encoding='utf-8')
+    
+    with opened as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    
+    os.replace(tmp_path, path)
+    fsync_directory(path.parent)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Identify a file version by inode, size and mtime, or None if it is missing."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _lock_region(f: Any):
+    """Lock the first byte of an open file on Windows, waiting as long as it takes."""
+    f.seek(0)
+    while True:
+        try:
+            # Gives up with an error after about ten seconds of retrying
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+@contextmanager
+def file_lock(lock_file: Path) -> Iterator[None]:
+    """Hold an exclusive lock on a file for the duration of the block.
+    
+    Uses ``flock`` on POSIX and a byte-range lock through ``msvcrt`` on
+    Windows. A platform with neither gets a warning once and no locking, so
+    only one process may use the index there.
+    """
+    global _lock_warned
+    if fcntl is None and msvcrt is None:
+        if not _lock_warned:
+            _lock_warned = True
+            print("Warning: File locking is not available; don't share the index between processes")
+        yield
+        return
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(lock_file, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            _lock_region(f)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class IndexJournal:
+    """Append-only log of index mutations, one compact JSON record per line.
+    
+    A journal started by ``reset`` begins with a ``base`` record naming the
+    snapshot it applies to, so readers can tell when the snapshot they loaded
+    was replaced by a concurrent compaction.
+    """
+    
+    def __init__(self, journal_file: Path):
+        """Initialize journal bound to a file."""
+        self.journal_file = journal_file
+        self._valid_size = None
+        self._inode = None
+    
+    def size(self) -> int:
+        """Return the journal size in bytes."""
+        try:
+            return self.journal_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+    
+    def read(self) -> List[Dict[str, Any]]:
+        """Read all complete records from the journal.
+
+        A record torn by a crash mid-append is ignored, and the file is
+        trimmed back to the last complete record before the next append.
+        """
+        records, end, self._inode = self._read(0)
+        self._valid_size = end
+        return records
+    
+    def changed(self) -> bool:
+        """Check whether the journal differs from what was last read or written."""
+        signature = file_signature(self.journal_file)
+        if signature is None:
+            return self._inode is not None
+        return signature[:2] != (self._inode, self._valid_size)
+    
+    def read_new(self) -> Optional[List[Dict[str, Any]]]:
+        """Read records appended since the last read or write.
+        
+        Returns None if the journal was replaced or truncated in the meantime,
+        in which case it has to be read again from the start.
+        """
+        signature = file_signature(self.journal_file)
+        if signature is None or signature[0] != self._inode or signature[1] < (self._valid_size or 0):
+            return None
+        
+        records, end, inode = self._read(self._valid_size or 0)
+        if inode != self._inode:
+            return None
+        self._valid_size = end
+        return records
+    
+    def read_from(self, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Read complete records starting at a byte offset."""
+        records, end, _ = self._read(offset)
+        return records, end
+    
+    def _read(self, offset: int) -> Tuple[List[Dict[str, Any]], int, Optional[int]]:
+        """Read complete records from an offset, with the inode of the file read."""
+        records = []
+        end = offset
+        
+        try:
+            f = open(self.journal_file, 'rb')
+        except FileNotFoundError:
+            return records, end, None
+        
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn tail from an interrupted append
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                end += len(line)
+        
+        return records, end, inode
+    
+    def append(self, records: List[Dict[str, Any]]):
+        """Durably append records to the journal."""
+        if not records:
+            return
+        
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        data = ''.join(
+            json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n'
+            for record in records
+        ).encode('utf-8')
+        
+        with open(self.journal_file, 'ab') as f:
+            if self._valid_size is not None and f.tell() > self._valid_size:
+                f.truncate(self._valid_size)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            self._valid_size = f.tell()
+            self._inode = os.fstat(f.fileno()).st_ino
+    
+    def reset(self, snapshot_id: Optional[str] = None):
+        """Discard all journal records (after they were compacted into a snapshot).
+        
+        The journal is replaced atomically, so readers holding the old file
+        keep a consistent view of it.
+        """
+        if not self.journal_file.exists():
+            self._inode = None
+            self._valid_size = 0
+            return
+        
+        header = ''
+        if snapshot_id is not None:
+            header = json.dumps({'op': 'base', 'snapshot_id': snapshot_id}, separators=(',', ':')) + '\n'
+        
+        atomic_write(self.journal_file, header)
+        signature = file_signature(self.journal_file)
+        self._inode = signature[0]
+        self._valid_size = signature[1]
@@ -0,0 +1,247 @@
+"""
+MinHash signatures and LSH buckets for near-duplicate thought detection.
+"""
+
+import base64
+import hashlib
+import json
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from journal import atomic_write
+from text_index import tokenize
+
+
+# Words per shingle
+SHINGLE_SIZE = 3
+# Signature length, and the LSH bands it is cut into
+NUM_BINS = 32
+BANDS = 8
+ROWS = NUM_BINS // BANDS
+
+_EMPTY_BIN = 0xFFFFFFFF
+# Added per bin of distance when an empty bin borrows a neighbour's value
+_DENSIFY_OFFSET = 0x9E3779B1
+
+
+def _hash64(data: bytes) -> int:
+    """Stable 64-bit hash (Python's own ``hash`` differs between processes)."""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def shingles(text: str) -> Set[str]:
+    """Overlapping word n-grams of a text; short texts are one shingle."""
+    tokens = tokenize(text)
+    if len(tokens) <= SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> Optional[array]:
+    """MinHash signature of a text, or None if it has no words.
+
+    Uses one-permutation hashing: each shingle is hashed once, the hash picks
+    one of ``NUM_BINS`` bins and the bin keeps the smallest value it sees.
+    Bins left empty by short texts borrow from the next filled bin, so equal
+    shingle sets always give equal signatures.
+    """
+    text_shingles = shingles(text)
+    if not text_shingles:
+        return None
+    
+    bins = [_EMPTY_BIN] * NUM_BINS
+    for shingle in text_shingles:
+        value = _hash64(shingle.encode('utf-8'))
+        position = value % NUM_BINS
+        value >>= 32
+        if value < bins[position]:
+            bins[position] = value
+    
+    if _EMPTY_BIN in bins:
+        filled = [position for position, value in enumerate(bins) if value != _EMPTY_BIN]
+        for position in range(NUM_BINS):
+            if bins[position] == _EMPTY_BIN:
+                donor = min(filled, key=lambda other: (other - position) % NUM_BINS)
+                distance = (donor - position) % NUM_BINS
+                bins[position] = (bins[donor] + distance * _DENSIFY_OFFSET) % _EMPTY_BIN
+    
+    return array('I', bins)
+
+
+def similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_BINS
+
+
+def signature_from_bytes(data: bytes) -> array:
+    """Rebuild a signature stored with ``array.tobytes()``."""
+    text_signature = array('I')
+    text_signature.frombytes(data)
+    return text_signature
+
+
+def rank_matches(text_signature: array, candidates: Iterable[Tuple[str, array]],
+                 threshold: float) -> List[Tuple[str, float]]:
+    """Score candidate signatures against one, keeping those at or above a threshold.
+
+    Returned as ``(gist_id, similarity)``, most similar first.
+    """
+    matches = [
+        (doc_id, similarity(text_signature, candidate))
+        for doc_id, candidate in candidates
+    ]
+    matches = [match for match in matches if match[1] >= threshold]
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches
+
+
+def band_keys(text_signature: array) -> List[int]:
+    """One bucket key per LSH band, as signed 64-bit integers (SQLite friendly)."""
+    keys = []
+    for band in range(BANDS):
+        value = _hash64(text_signature[band * ROWS:(band + 1) * ROWS].tobytes())
+        keys.append(value - (1 << 64) if value >= 1 << 63 else value)
+    return keys
+
+
+def duplicate_pairs(buckets: Iterable[List[str]], signature_of: Callable[[str], array],
+                    threshold: float) -> List[Tuple[str, str, float]]:
+    """Pairs from shared LSH buckets whose estimated similarity reaches a threshold.
+
+    Returned as ``(gist_id, gist_id, similarity)``, most similar first.
+    """
+    checked: Set[Tuple[str, str]] = set()
+    pairs = []
+    
+    for bucket in buckets:
+        for i, first in enumerate(bucket):
+            for second in bucket[i + 1:]:
+                pair = (first, second) if first < second else (second, first)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                
+                score = similarity(signature_of(pair[0]), signature_of(pair[1]))
+                if score >= threshold:
+                    pairs.append((pair[0], pair[1], score))
+    
+    pairs.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+    return pairs
+
+
+class MinHashIndex:
+    """In-memory MinHash/LSH index over thought contents.
+
+    Signatures are cut into ``BANDS`` bands; thoughts whose band values all
+    agree land in the same bucket. Looking up a text only compares it with
+    the thoughts sharing at least one of its buckets, so near duplicates are
+    found without scanning the network, and pairs above roughly 60%
+    similarity are found with high probability.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self):
+        """Initialize an empty index."""
+        self.signatures: Dict[str, array] = {}
+        self.buckets: List[Dict[int, List[str]]] = [{} for _ in range(BANDS)]
+    
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self.signatures)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        """Check whether a document is indexed."""
+        return doc_id in self.signatures
+    
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str]]) -> 'MinHashIndex':
+        """Build an index from ``(doc_id, text)`` pairs."""
+        minhash_index = cls()
+        for doc_id, text in documents:
+            minhash_index.add(doc_id, text)
+        return minhash_index
+    
+    def add(self, doc_id: str, text: str):
+        """Index (or re-index) a document; texts without words are skipped."""
+        self.remove(doc_id)
+        
+        text_signature = signature(text)
+        if text_signature is not None:
+            self._insert(doc_id, text_signature)
+    
+    def _insert(self, doc_id: str, text_signature: array):
+        """Store a signature and file the document under its band buckets."""
+        self.signatures[doc_id] = text_signature
+        for band, key in enumerate(band_keys(text_signature)):
+            self.buckets[band].setdefault(key, []).append(doc_id)
+    
+    def remove(self, doc_id: str):
+        """Drop a document from the index."""
+        text_signature = self.signatures.pop(doc_id, None)
+        if text_signature is None:
+            return
+        
+        for band, key in enumerate(band_keys(text_signature)):
+            bucket = self.buckets[band][key]
+            bucket.remove(doc_id)
+            if not bucket:
+                del self.buckets[band][key]
+    
+    def similar(self, text: str, threshold: float,
+                exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Documents similar to a text, as ``(doc_id, similarity)``, most similar first."""
+        text_signature = signature(text)
+        if text_signature is None:
+            return []
+        
+        candidates: Set[str] = set()
+        for band, key in enumerate(band_keys(text_signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+        candidates.discard(exclude)
+        
+        return rank_matches(
+            text_signature,
+            ((doc_id, self.signatures[doc_id]) for doc_id in candidates),
+            threshold
+        )
+    
+    def duplicate_pairs(self, threshold: float) -> List[Tuple[str, str, float]]:
+        """All indexed pairs at or above a similarity threshold."""
+        return duplicate_pairs(
+            (bucket for band in self.buckets for bucket in band.values() if len(bucket) > 1),
+            self.signatures.__getitem__,
+            threshold
+        )
+    
+    def save(self, path: Path, snapshot_id: Optional[str]):
+        """Persist the signatures, stamped with the index snapshot they match."""
+        atomic_write(path, json.dumps({
+            'version': self.VERSION,
+            'snapshot_id': snapshot_id,
+            'signatures': {
+                doc_id: base64.b64encode(text_signature.tobytes()).decode('ascii')
+                for doc_id, text_signature in self.signatures.items()
+            }
+        }, separators=(',', ':'), ensure_ascii=False))
+    
+    @classmethod
+    def load(cls, path: Path, snapshot_id: Optional[str]) -> Optional['MinHashIndex']:
+        """Load persisted signatures if they match the given snapshot."""
+        if not snapshot_id or not path.exists():
+            return None
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (ValueError, IOError):
+            return None
+        
+        if data.get('version') != cls.VERSION or data.get('snapshot_id') != snapshot_id:
+            return None
+        
+        minhash_index = cls()
+        for doc_id, encoded in data['signatures'].items():
+            minhash_index._insert(doc_id, signature_from_bytes(base64.b64decode(encoded)))
+        return minhash_index
@@ -0,0 +1,169 @@
+"""
+Secondary indexes and compound queries over thought metadata.
+"""
+
+import base64
+import bisect
+import heapq
+import json
+from typing import Dict, Iterable, List, Optional, Any, Set, Tuple
+
+
+def encode_cursor(timestamp: str, gist_id: str) -> str:
+    """Encode a pagination cursor pointing just past a thought."""
+    return base64.urlsafe_b64encode(json.dumps([timestamp, gist_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a pagination cursor."""
+    try:
+        timestamp, gist_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, gist_id
+
+
+class ThoughtIndexes:
+    """Secondary indexes by status, priority, origin and timestamp.
+
+    Thoughts are kept in a timestamp-ordered list of ``(timestamp, gist_id)``
+    plus id sets per status, priority bucket and origin. A query either
+    intersects the selective id sets and picks the newest with a heap, or
+    walks the timestamp order from newest down, whichever touches fewer rows.
+    """
+    
+    def __init__(self):
+        """Initialize empty indexes."""
+        self.by_time: List[Tuple[str, str]] = []
+        self.by_status: Dict[str, Set[str]] = {}
+        self.by_priority: Dict[int, Set[str]] = {}
+        self.by_origin: Dict[str, Set[str]] = {}
+        self._keys: Dict[str, Tuple[str, str, int, str]] = {}
+    
+    @staticmethod
+    def _key(gist_data: Dict[str, Any]) -> Tuple[str, str, int, str]:
+        """Indexed fields of a thought record."""
+        return (
+            gist_data.get('timestamp') or '',
+            gist_data.get('status', 'unknown'),
+            gist_data.get('priority') or 5,
+            gist_data.get('origin_hydra') or ''
+        )
+    
+    @classmethod
+    def build(cls, thoughts: Iterable[Tuple[str, Dict[str, Any]]]) -> 'ThoughtIndexes':
+        """Build indexes from ``(gist_id, record)`` pairs in one pass."""
+        indexes = cls()
+        for gist_id, gist_data in thoughts:
+            indexes._insert(gist_id, cls._key(gist_data), ordered=False)
+        indexes.by_time.sort()
+        return indexes
+    
+    def __len__(self) -> int:
+        """Return the number of indexed thoughts."""
+        return len(self._keys)
+    
+    def _insert(self, gist_id: str, key: Tuple[str, str, int, str], ordered: bool = True):
+        """Add a thought under its indexed fields."""
+        timestamp, status, priority, origin = key
+        self._keys[gist_id] = key
+        
+        if ordered:
+            bisect.insort(self.by_time, (timestamp, gist_id))
+        else:
+            self.by_time.append((timestamp, gist_id))
+        
+        self.by_status.setdefault(status, set()).add(gist_id)
+        self.by_priority.setdefault(priority, set()).add(gist_id)
+        self.by_origin.setdefault(origin, set()).add(gist_id)
+    
+    def add(self, gist_id: str, gist_data: Dict[str, Any]):
+        """Index (or re-index) a thought."""
+        key = self._key(gist_data)
+        if self._keys.get(gist_id) == key:
+            return
+        self.remove(gist_id)
+        self._insert(gist_id, key)
+    
+    def remove(self, gist_id: str):
+        """Drop a thought from the indexes."""
+        key = self._keys.pop(gist_id, None)
+        if key is None:
+            return
+        
+        timestamp, status, priority, origin = key
+        position = bisect.bisect_left(self.by_time, (timestamp, gist_id))
+        del self.by_time[position]
+        
+        for buckets, value in ((self.by_status, status), (self.by_priority, priority),
+                               (self.by_origin, origin)):
+            bucket = buckets[value]
+            bucket.discard(gist_id)
+            if not bucket:
+                del buckets[value]
+    
+    def status_counts(self) -> Dict[str, int]:
+        """Number of thoughts per status."""
+        return {status: len(ids) for status, ids in self.by_status.items()}
+    
+    def query(self, status: Optional[str] = None, priority_min: Optional[int] = None,
+              priority_max: Optional[int] = None, origin: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """Ids of matching thoughts, newest first, and the cursor for the next page."""
+        # Upper bound of the (timestamp, gist_id) order: the cursor or `until`
+        upper = decode_cursor(cursor) if cursor else None
+        if until is not None and (upper is None or (until, '\U0010ffff') < upper):
+            upper = (until, '\U0010ffff')
+        lower = (since, '') if since is not None else None
+        
+        low = priority_min if priority_min is not None else float('-inf')
+        high = priority_max if priority_max is not None else float('inf')
+        
+        def matches(gist_id: str) -> bool:
+            _, item_status, item_priority, item_origin = self._keys[gist_id]
+            return (
+                (status is None or item_status == status)
+                and (origin is None or item_origin == origin)
+                and low <= item_priority <= high
+            )
+        
+        def in_range(entry: Tuple[str, str]) -> bool:
+            return (upper is None or entry < upper) and (lower is None or entry >= lower)
+        
+        # Each id-set filter is a union of buckets; use the most selective one
+        filters: List[List[Set[str]]] = []
+        if status is not None:
+            filters.append([self.by_status.get(status, set())])
+        if origin is not None:
+            filters.append([self.by_origin.get(origin, set())])
+        if priority_min is not None or priority_max is not None:
+            filters.append([
+                ids for priority, ids in self.by_priority.items() if low <= priority <= high
+            ])
+        sizes = [sum(len(ids) for ids in buckets) for buckets in filters]
+        
+        if filters and min(sizes) ** 2 < max(limit, 1) * max(len(self._keys), 1):
+            # Selective filter: scan its ids and keep the newest with a heap
+            candidates = (
+                gist_id for ids in filters[sizes.index(min(sizes))] for gist_id in ids
+            )
+            entries = (
+                (self._keys[gist_id][0], gist_id) for gist_id in candidates if matches(gist_id)
+            )
+            page = heapq.nlargest(limit + 1, (entry for entry in entries if in_range(entry)))
+        else:
+            # Broad filters: walk the timestamp order from the upper bound down
+            end = bisect.bisect_left(self.by_time, upper) if upper is not None else len(self.by_time)
+            page = []
+            for position in range(end - 1, -1, -1):
+                entry = self.by_time[position]
+                if lower is not None and entry < lower:
+                    break
+                if matches(entry[1]):
+                    page.append(entry)
+                    if len(page) > limit:
+                        break
+        
+        next_cursor = encode_cursor(*page[limit - 1]) if len(page) > limit and limit > 0 else None
+        return [gist_id for _, gist_id in page[:limit]], next_cursor
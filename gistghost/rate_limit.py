@@ -0,0 +1,202 @@
+"""
+Rate-limit-aware scheduling of GitHub API requests.
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Mapping, Optional, Tuple
+
+
+# Requests that may go out back to back before pacing kicks in
+DEFAULT_BURST = 60
+
+# Retries of a rate-limited, failed or unreachable request before giving up
+DEFAULT_MAX_RETRIES = 5
+
+# Longest the scheduler waits for a rate limit to reset; beyond it the request fails
+DEFAULT_MAX_WAIT = 300.0
+
+# Priority of requests that aren't about one thought (same as a thought's default)
+DEFAULT_PRIORITY = 5
+
+WaiterEntry = Tuple[int, int]
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Seconds to wait before retry ``attempt`` (0-based): exponential, with jitter."""
+    ceiling = min(cap, base * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class RateLimitScheduler:
+    """Paces requests to the quota GitHub reports, most important first.
+
+    Every response's ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` headers
+    retune a token bucket: it refills at the rate that spreads the remaining
+    quota evenly until the reset, and holds at most ``burst`` tokens (never
+    more than the quota left). It is full whenever a fresh quota is seen.
+    Until the first response only one request is sent, to learn the quota;
+    if responses carry no rate-limit headers, requests go out unpaced. An
+    exhausted quota, or a ``Retry-After`` from a secondary limit, blocks
+    every request until it is over.
+
+    Requests waiting for a token are served highest ``priority`` first (the
+    thought's 1-10 priority), then in arrival order, so when quota is scarce
+    important writes go first. Responses that cost no quota (``304 Not
+    Modified``) give their token back.
+    """
+    
+    def __init__(self, burst: int = DEFAULT_BURST, max_retries: int = DEFAULT_MAX_RETRIES,
+                 max_wait: float = DEFAULT_MAX_WAIT):
+        """Create a scheduler; timings are in seconds."""
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        
+        self.remaining: Optional[int] = None
+        self.limit: Optional[int] = None
+        self._reset_at: Optional[float] = None  # Epoch seconds the current window ends
+        # One probe request until the quota is known
+        self._tokens = 1.0
+        self._rate: Optional[float] = None  # Tokens per second; None until the quota is known
+        self._unmetered = False
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        
+        self._waiters = []
+        self._arrivals = itertools.count()
+        # Created inside the running event loop on first use
+        self._wakeup: Optional[asyncio.Event] = None
+    
+    def _refill(self, now: float):
+        """Add the tokens earned since the last refill."""
+        if self._rate is not None:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+    
+    def _capacity(self) -> float:
+        """Most tokens the bucket may hold."""
+        if self.remaining is None:
+            return self.burst
+        return max(1, min(self.burst, self.remaining))
+    
+    def _wait_time(self, now: float) -> Optional[float]:
+        """Seconds until the next token may be taken; None if only a response can tell."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._tokens >= 1 or self._unmetered:
+            return 0.0
+        if not self._rate:
+            return None
+        return (1 - self._tokens) / self._rate
+    
+    def _notify(self):
+        """Wake every waiter to recheck the bucket."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+            self._wakeup = None
+    
+    async def acquire(self, priority: int = DEFAULT_PRIORITY):
+        """Wait for this request's turn and take a token.
+
+        Fails at once if requests are blocked for longer than ``max_wait``.
+        """
+        entry: WaiterEntry = (-priority, next(self._arrivals))
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                now = time.monotonic()
+                if self._blocked_until - now > self.max_wait:
+                    raise Exception("GitHub API rate limit exceeded. Please try again later.")
+                self._refill(now)
+                wait = None
+                if self._waiters[0] == entry:
+                    wait = self._wait_time(now)
+                    if wait is not None and wait <= 0:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        # The next in line may be able to go too
+                        self._notify()
+                        return
+                
+                if self._wakeup is None:
+                    self._wakeup = asyncio.Event()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._notify()
+            raise
+    
+    def refund(self):
+        """Give back the token of a request that cost no quota (or was never answered)."""
+        self._refill(time.monotonic())
+        self._tokens = min(self._capacity(), self._tokens + 1)
+        self._notify()
+    
+    def observe(self, headers: Mapping[str, str]) -> Optional[float]:
+        """Retune the bucket from a response's headers.
+
+        Returns how long requests are now blocked for (the quota is exhausted
+        or the response carried ``Retry-After``), or None.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        blocked = None
+        
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset is not None:
+            try:
+                remaining_count, reset_at = int(remaining), float(reset)
+            except ValueError:
+                remaining_count = reset_at = None
+            # Late responses from a window that already ended say nothing about this one
+            if reset_at is not None and (self._reset_at is None or reset_at >= self._reset_at):
+                self.remaining = remaining_count
+                limit = headers.get('X-RateLimit-Limit')
+                if limit is not None and limit.isdigit():
+                    self.limit = int(limit)
+                
+                if self._reset_at is None or reset_at > self._reset_at:
+                    # A fresh quota (the first one seen, or a new window): start with a full bucket
+                    self._reset_at = reset_at
+                    self._tokens = self._capacity()
+                else:
+                    self._tokens = min(self._tokens, self._capacity())
+                
+                until_reset = max(0.0, reset_at - time.time())
+                if self.remaining > 0:
+                    self._rate = self.remaining / max(1.0, until_reset)
+                else:
+                    # One probe once the window resets; its response retunes the bucket
+                    self._rate = 0.0
+                    self._tokens = 1.0
+                    blocked = until_reset
+        elif self._rate is None:
+            # No rate limit reported: nothing to pace
+            self._unmetered = True
+        
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                blocked = max(blocked or 0.0, float(retry_after))
+            except ValueError:
+                pass
+        
+        if blocked is not None:
+            self.block(blocked)
+        self._notify()
+        return blocked
+    
+    def block(self, seconds: float):
+        """Hold back every request for ``seconds``."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._notify()
@@ -0,0 +1,498 @@
+"""
+Delta replication of the thought index between gistghost nodes.
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import struct
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from gist import Gist
+from journal import atomic_write, file_lock
+
+
+# Thoughts fetched per page when scanning the local index
+PAGE_SIZE = 1000
+
+# Largest message accepted from a peer
+MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+
+# Seconds a socket peer may stay silent before the sync is abandoned
+SOCKET_TIMEOUT = 60.0
+
+NONCE_BYTES = 32
+
+Dot = Tuple[str, int]
+EdgeKey = Tuple[str, str, str]
+Address = Union[str, Tuple[str, int]]
+
+
+def fingerprint(record: Dict[str, Any]) -> str:
+    """Stable hash of an index record, to notice local edits between syncs."""
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def parse_address(address: str) -> Address:
+    """``host:port`` for TCP, anything else is a Unix socket path."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host.strip('[]'), int(port)
+    return address
+
+
+def is_local_address(address: Address) -> bool:
+    """Whether an address can only be reached from this machine."""
+    if isinstance(address, str):
+        return True
+    host = address[0]
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _open_socket(address: Address) -> socket.socket:
+    """Unconnected socket of the right family for an address."""
+    if isinstance(address, str):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix sockets are not available here; serve on 127.0.0.1:PORT instead")
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET6 if ':' in address[0] else socket.AF_INET, socket.SOCK_STREAM)
+
+
+def _recv_exactly(conn: socket.socket, size: int) -> bytes:
+    """Read exactly ``size`` bytes from a socket."""
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("Replication peer closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(conn: socket.socket, message: Any):
+    """Send one JSON message, prefixed with its length."""
+    data = json.dumps(message, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    conn.sendall(struct.pack('>I', len(data)) + data)
+
+
+def recv_message(conn: socket.socket) -> Any:
+    """Receive one JSON message sent by ``send_message``."""
+    (size,) = struct.unpack('>I', _recv_exactly(conn, 4))
+    if size > MAX_MESSAGE_BYTES:
+        raise ConnectionError(f"Replication message of {size} bytes is too large")
+    return json.loads(_recv_exactly(conn, size).decode('utf-8'))
+
+
+def _proof(secret: bytes, role: bytes, nonce: str) -> str:
+    """HMAC proving knowledge of the shared secret for a peer's challenge."""
+    return hmac.new(secret, role + bytes.fromhex(nonce), hashlib.sha256).hexdigest()
+
+
+def _authenticate(conn: socket.socket, secret: bytes, serving: bool):
+    """Mutual challenge-response over the shared secret; raises if the peer fails it.
+
+    The secret itself never crosses the wire, and the fresh nonces stop a
+    recorded exchange from being replayed.
+    """
+    ours = os.urandom(NONCE_BYTES).hex()
+    mine, theirs = (b'server', b'client') if serving else (b'client', b'server')
+    
+    send_message(conn, {'nonce': ours})
+    challenge = recv_message(conn)
+    if not isinstance(challenge, dict) or not isinstance(challenge.get('nonce'), str):
+        raise ConnectionError("Malformed replication handshake")
+    send_message(conn, {'proof': _proof(secret, mine, challenge['nonce'])})
+    
+    answer = recv_message(conn)
+    expected = _proof(secret, theirs, ours)
+    if not isinstance(answer, dict) or not hmac.compare_digest(str(answer.get('proof')), expected):
+        raise ConnectionError("Replication peer failed authentication")
+
+
+def _covered(dot: List[Any], version_vector: Dict[str, int]) -> bool:
+    """Whether a version vector has already seen a dot ``[node, counter]``."""
+    return dot[1] <= version_vector.get(dot[0], 0)
+
+
+class Replica:
+    """CRDT replica of one node's index: thoughts, links and a version vector.
+
+    Every change gets a dot ``(node, counter)`` from a Lamport clock.
+
+    - Thoughts are last-writer-wins registers. The value with the larger
+      ``[counter, node]`` stamp wins, and a removal is a tombstone value.
+    - Links are an add-wins set. An add tags the link with a fresh dot, and
+      a removal only cancels the dots it has seen, so a concurrent re-add
+      survives. Evolution edges need no entries of their own, because they
+      follow from each thought's ``parent_gist``.
+    - The version vector maps each node to the largest counter seen from it.
+      A delta for a peer is everything carrying a dot its vector doesn't
+      cover.
+
+    Merging is a union of registers and dot sets, so it is commutative,
+    associative and idempotent, and nodes converge whatever order deltas
+    arrive in.
+
+    The index stays the source of truth. Local edits, by any process, are
+    noticed by comparing the index with the replica state before each sync.
+    Remote changes are applied through the normal index API. The state is
+    kept in ``replica.json`` next to the index.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, index_manager: Any, state_dir: Path):
+        """Attach a replica to an index; its state lives in ``state_dir``."""
+        self.index_manager = index_manager
+        self.state_file = state_dir / 'replica.json'
+        self.lock_file = state_dir / 'replica.lock'
+        self.state = self._load_state()
+    
+    @property
+    def node_id(self) -> str:
+        """Identity of this replica."""
+        return self.state['node']
+    
+    @property
+    def version_vector(self) -> Dict[str, int]:
+        """Largest counter seen from every node."""
+        return self.state['vv']
+    
+    def _load_state(self) -> Dict[str, Any]:
+        """Read the replica state, starting a fresh one if there is none."""
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == self.VERSION:
+                return state
+        
+        return {
+            'version': self.VERSION,
+            'node': uuid.uuid4().hex,
+            'clock': 0,
+            'vv': {},
+            'peers': {},
+            'thoughts': {},
+            'edges': {}
+        }
+    
+    def _save_state(self):
+        """Persist the replica state."""
+        atomic_write(self.state_file, json.dumps(self.state, separators=(',', ':')))
+    
+    def _tick(self) -> List[Any]:
+        """Next local dot, as ``[node, counter]``."""
+        self.state['clock'] += 1
+        self.state['vv'][self.node_id] = self.state['clock']
+        return [self.node_id, self.state['clock']]
+    
+    def _see(self, dot: List[Any]):
+        """Advance the Lamport clock past a dot received from another node."""
+        self.state['clock'] = max(self.state['clock'], dot[1])
+    
+    @staticmethod
+    def _edge_key(from_gist: str, to_gist: str, relationship_type: str) -> str:
+        """Key of a link in the edge set."""
+        return json.dumps([from_gist, to_gist, relationship_type])
+    
+    def _local_records(self) -> Iterator[Dict[str, Any]]:
+        """Every thought record of the index, a page at a time."""
+        cursor = None
+        while True:
+            page = self.index_manager.query_gists(limit=PAGE_SIZE, cursor=cursor)
+            yield from page['thoughts']
+            cursor = page['next_cursor']
+            if not cursor:
+                return
+    
+    def observe(self) -> int:
+        """Record local edits made since the last sync; returns how many were found."""
+        thoughts = self.state['thoughts']
+        edges = self.state['edges']
+        present: Set[str] = set()
+        linked: Set[str] = set()
+        changes = 0
+        
+        for record in self._local_records():
+            gist_id = record['gist_id']
+            present.add(gist_id)
+            register = thoughts.get(gist_id)
+            current = fingerprint(record)
+            if register is None or register['deleted'] or register['fingerprint'] != current:
+                thoughts[gist_id] = {'stamp': self._tick(), 'deleted': False, 'fingerprint': current}
+                changes += 1
+            
+            for rel in self.index_manager.get_edges(gist_id):
+                if rel['type'].startswith(('evolved_', 'reverse_')):
+                    continue
+                key = self._edge_key(gist_id, rel['to'], rel['type'])
+                linked.add(key)
+                entry = edges.setdefault(key, {'adds': [], 'removed': [], 'removals': []})
+                if not entry['adds']:
+                    entry['adds'].append(self._tick())
+                    changes += 1
+        
+        for gist_id, register in thoughts.items():
+            if not register['deleted'] and gist_id not in present:
+                thoughts[gist_id] = {'stamp': self._tick(), 'deleted': True, 'fingerprint': None}
+                changes += 1
+        
+        for key, entry in edges.items():
+            from_gist, to_gist, _ = json.loads(key)
+            # A link to a thought that is gone locally disappears with the thought
+            if entry['adds'] and key not in linked and {from_gist, to_gist} <= present:
+                entry['removed'].extend(entry['adds'])
+                entry['adds'] = []
+                entry['removals'].append(self._tick())
+                changes += 1
+        
+        return changes
+    
+    def delta(self, version_vector: Dict[str, int]) -> Dict[str, Any]:
+        """Everything a replica with the given version vector hasn't seen yet."""
+        thoughts = {}
+        for gist_id, register in self.state['thoughts'].items():
+            if _covered(register['stamp'], version_vector):
+                continue
+            record = None
+            if not register['deleted']:
+                gist = self.index_manager.get_gist(gist_id)
+                record = gist.to_dict() if gist else None
+            thoughts[gist_id] = {
+                'stamp': register['stamp'],
+                'deleted': register['deleted'] or record is None,
+                'record': record
+            }
+        
+        edges = {
+            key: entry for key, entry in self.state['edges'].items()
+            if not all(
+                _covered(dot, version_vector)
+                for dot in entry['adds'] + entry['removed'] + entry['removals']
+            )
+        }
+        return {'node': self.node_id, 'vv': dict(self.version_vector), 'thoughts': thoughts, 'edges': edges}
+    
+    def merge(self, delta: Dict[str, Any]) -> int:
+        """Apply a delta from another replica; returns how many entries changed."""
+        thoughts = self.state['thoughts']
+        edges = self.state['edges']
+        changed = 0
+        touched: Set[str] = set()
+        
+        # Parents first, so evolutions find the thought they evolved from
+        incoming = sorted(
+            delta['thoughts'].items(),
+            key=lambda item: (item[1]['record'] or {}).get('timestamp') or ''
+        )
+        with self.index_manager.batch():
+            for gist_id, remote in incoming:
+                self._see(remote['stamp'])
+                local = thoughts.get(gist_id)
+                if local is not None and _stamp(local['stamp']) >= _stamp(remote['stamp']):
+                    continue
+                
+                if remote['deleted']:
+                    self.index_manager.remove_gist(gist_id)
+                    current = None
+                else:
+                    gist = Gist.from_dict(remote['record'])
+                    if self.index_manager.get_record(gist_id) is None:
+                        self.index_manager.add_gist(gist)
+                    else:
+                        self.index_manager.update_gist(gist)
+                    current = fingerprint(self.index_manager.get_record(gist_id))
+                
+                thoughts[gist_id] = {
+                    'stamp': remote['stamp'],
+                    'deleted': remote['deleted'],
+                    'fingerprint': current
+                }
+                touched.add(gist_id)
+                changed += 1
+            
+            for key, remote in delta['edges'].items():
+                for dot in remote['adds'] + remote['removed'] + remote['removals']:
+                    self._see(dot)
+                entry = edges.setdefault(key, {'adds': [], 'removed': [], 'removals': []})
+                merged = _merge_edge(entry, remote)
+                if merged != entry:
+                    edges[key] = merged
+                    touched.add(key)
+                    changed += 1
+            
+            self._materialize_links(touched)
+        
+        for node, counter in delta['vv'].items():
+            self.version_vector[node] = max(self.version_vector.get(node, 0), counter)
+        self.state['peers'][delta['node']] = dict(delta['vv'])
+        return changed
+    
+    def _materialize_links(self, touched: Set[str]):
+        """Bring the links that involve touched thoughts or edges in line with the merged state.
+        
+        Live links are created where both ends exist; removed ones are unlinked.
+        """
+        for key, entry in self.state['edges'].items():
+            from_gist, to_gist, relationship_type = json.loads(key)
+            if key not in touched and from_gist not in touched and to_gist not in touched:
+                continue
+            if not entry['adds']:
+                if to_gist in self.index_manager.get_neighbours(from_gist, relationship_type):
+                    self.index_manager.unlink_gists(from_gist, to_gist, relationship_type)
+                continue
+            if self.index_manager.get_record(from_gist) is None:
+                continue
+            if self.index_manager.get_record(to_gist) is None:
+                continue
+            self.index_manager.link_gists(from_gist, to_gist, relationship_type)
+        
+        # Linking changed index records only through edges, but refresh the
+        # fingerprints so the next observe() doesn't mistake them for edits
+        for gist_id in touched:
+            register = self.state['thoughts'].get(gist_id)
+            record = self.index_manager.get_record(gist_id) if register else None
+            if record is not None:
+                register['fingerprint'] = fingerprint(record)
+    
+    def sync_file(self, exchange_dir: Path) -> Dict[str, int]:
+        """Sync through a shared directory, such as a mounted or synced folder.
+
+        Reads the other nodes' ``<node>.delta.json`` bundles, then writes this
+        node's bundle. It holds whatever the other nodes haven't seen, going by
+        the version vectors they last published. Returns the number of changes
+        merged from each peer.
+        """
+        exchange_dir.mkdir(parents=True, exist_ok=True)
+        merged = {}
+        
+        with file_lock(self.lock_file):
+            self.state = self._load_state()
+            self.observe()
+            
+            for bundle in sorted(exchange_dir.glob('*.delta.json')):
+                if bundle.name == f'{self.node_id}.delta.json':
+                    continue
+                with open(bundle, 'r', encoding='utf-8') as f:
+                    delta = json.load(f)
+                merged[delta['node']] = self.merge(delta)
+            
+            # The least any peer is known to have seen
+            peers = list(self.state['peers'].values())
+            floor = {
+                node: min(peer.get(node, 0) for peer in peers)
+                for node in self.version_vector
+            } if peers else {}
+            atomic_write(
+                exchange_dir / f'{self.node_id}.delta.json',
+                json.dumps(self.delta(floor), ensure_ascii=False)
+            )
+            self._save_state()
+        
+        return merged
+    
+    def serve(self, address: Address, secret: bytes, once: bool = False,
+              ready: Optional[Any] = None, allow_remote: bool = False):
+        """Answer sync requests from other nodes on a socket.
+
+        Peers must prove they know ``secret`` before anything else is read,
+        and messages are plain JSON, never pickles. Only loopback addresses
+        and Unix sockets are served unless ``allow_remote`` is set; traffic
+        is not encrypted, so reach remote nodes through a tunnel instead
+        where possible. ``ready`` (e.g. a ``threading.Event``) is set once
+        the socket listens.
+        """
+        if not secret:
+            raise ValueError("A replication secret is required")
+        if not allow_remote and not is_local_address(address):
+            raise ValueError(f"Refusing to serve on non-local address {address[0]} without allow_remote")
+        
+        with _open_socket(address) as listener:
+            if isinstance(address, str):
+                if os.path.exists(address):
+                    os.unlink(address)  # Left behind by an earlier server
+                listener.bind(address)
+                os.chmod(address, 0o600)
+            else:
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                listener.bind(address)
+            listener.listen()
+            if ready is not None:
+                ready.set()
+            
+            while True:
+                conn, _ = listener.accept()
+                with conn:
+                    conn.settimeout(SOCKET_TIMEOUT)
+                    try:
+                        _authenticate(conn, secret, serving=True)
+                        self._answer(conn)
+                    except (ConnectionError, OSError, ValueError, KeyError, TypeError) as e:
+                        print(f"Warning: replication sync failed: {e}")
+                if once:
+                    return
+    
+    def _answer(self, conn: socket.socket):
+        """Serve one authenticated sync: swap deltas with the connected peer."""
+        with file_lock(self.lock_file):
+            self.state = self._load_state()
+            self.observe()
+            peer_vv = recv_message(conn)
+            send_message(conn, self.delta(peer_vv))
+            self.merge(recv_message(conn))
+            self._save_state()
+    
+    def sync_socket(self, address: Address, secret: bytes) -> Dict[str, int]:
+        """Sync both ways with a node serving on a socket.
+
+        The two nodes prove to each other that they share ``secret``, swap
+        version vectors, and each sends only what the other is missing.
+        Returns the number of changes merged from the peer.
+        """
+        if not secret:
+            raise ValueError("A replication secret is required")
+        
+        with file_lock(self.lock_file):
+            self.state = self._load_state()
+            self.observe()
+            
+            with _open_socket(address) as conn:
+                conn.settimeout(SOCKET_TIMEOUT)
+                conn.connect(address)
+                _authenticate(conn, secret, serving=False)
+                send_message(conn, dict(self.version_vector))
+                delta = recv_message(conn)
+                merged = self.merge(delta)
+                send_message(conn, self.delta(delta['vv']))
+            
+            self._save_state()
+        
+        return {delta['node']: merged}
+
+
+def _stamp(dot: List[Any]) -> Tuple[int, str]:
+    """Total order of dots for last-writer-wins: counter first, node id on ties."""
+    return dot[1], dot[0]
+
+
+def _merge_edge(local: Dict[str, List], remote: Dict[str, List]) -> Dict[str, List]:
+    """Union of two add-wins entries: dots added anywhere and not removed anywhere stay."""
+    removed = {tuple(dot) for dot in local['removed'] + remote['removed']}
+    adds = {tuple(dot) for dot in local['adds'] + remote['adds']} - removed
+    removals = {tuple(dot) for dot in local['removals'] + remote['removals']}
+    return {
+        'adds': sorted(list(dot) for dot in adds),
+        'removed': sorted(list(dot) for dot in removed),
+        'removals': sorted(list(dot) for dot in removals)
+    }
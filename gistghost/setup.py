@@ -37,6 +37,10 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "analytics": ["numpy>=1.20"],
+        "http2": ["httpx[http2]>=0.23.0"],
+    },
     entry_points={
         "console_scripts": [
             "gistghost=gistghost:main",
@@ -0,0 +1,514 @@
+"""
+Thought index partitioned into per-origin shards, with federated queries.
+"""
+
+import heapq
+from contextlib import ExitStack, contextmanager
+from itertools import islice, zip_longest
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from urllib.parse import quote, unquote
+
+from gist import Gist
+from analytics import CSRGraph, analyze_network
+from exporter import k_hop, write_network
+from index_manager import summarize_network
+from query_index import encode_cursor
+
+
+# Shard of thoughts that carry no origin_hydra
+DEFAULT_ORIGIN = 'unknown'
+
+# Thoughts fetched per page when walking a whole shard
+PAGE_SIZE = 1000
+
+
+def shard_name(origin: str) -> str:
+    """Directory name of an origin's shard (reversible, and never '.' or '..')."""
+    return quote(origin, safe='').replace('.', '%2E')
+
+
+def _newest_first(record: Dict[str, Any]) -> Tuple[str, str]:
+    """Sort key of the newest-first order, matching pagination cursors."""
+    return record.get('timestamp') or '', record['gist_id']
+
+
+class ShardedIndexManager:
+    """Thought index split into one independent index per ``origin_hydra``.
+
+    Each shard is an ordinary index (``IndexManager`` or
+    ``SQLiteIndexManager``) in ``<shards_dir>/<origin>/``, opened on first
+    use by ``open_shard(directory)``. A shard has its own lock, journal and
+    blobs, so another process can open and serve one shard directly.
+
+    A thought lives in the shard of its origin. The exception is an
+    evolution, which joins its parent's shard so that evolution chains
+    never span shards. A link between thoughts in different shards is
+    stored as one edge per direction, each in the shard of its source, and
+    the far end is only looked up when a query follows the link.
+
+    Queries fan out over the shards and merge their top-k results. With
+    ``origins`` set, only those shards are ever opened, so a node that only
+    cares about its own thoughts loads only its own shard.
+    """
+    
+    def __init__(self, shards_dir: Path, open_shard: Callable[[Path], Any],
+                 origins: Optional[Iterable[str]] = None):
+        """Initialize a sharded index rooted at a directory."""
+        self.shards_dir = shards_dir
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
+        self.open_shard = open_shard
+        self.origins = set(origins) if origins else None
+        self.shards: Dict[str, Any] = {}
+        # Shard origin of every gist located so far
+        self._home: Dict[str, str] = {}
+        self._batch: Optional[ExitStack] = None
+        self._batched: set = set()
+    
+    def shard_origins(self) -> List[str]:
+        """Origins with a shard on disk (restricted to ``origins`` if given)."""
+        found = {
+            unquote(path.name) for path in self.shards_dir.iterdir() if path.is_dir()
+        } | set(self.shards)
+        if self.origins is not None:
+            found &= self.origins
+        return sorted(found)
+    
+    def shard(self, origin: str, create: bool = False) -> Optional[Any]:
+        """The shard of an origin, opened on first use; None if it doesn't exist."""
+        origin = origin or DEFAULT_ORIGIN
+        if origin not in self.shards:
+            if self.origins is not None and origin not in self.origins:
+                if create:
+                    raise ValueError(f"Origin {origin} is outside this node's shards")
+                return None
+            
+            directory = self.shards_dir / shard_name(origin)
+            if not directory.exists() and not create:
+                return None
+            directory.mkdir(parents=True, exist_ok=True)
+            self.shards[origin] = self.open_shard(directory)
+        return self.shards[origin]
+    
+    def _all_shards(self) -> Iterator[Tuple[str, Any]]:
+        """``(origin, shard)`` for every shard, opening them as needed."""
+        for origin in self.shard_origins():
+            yield origin, self.shard(origin)
+    
+    def _writing(self, shard: Any) -> Any:
+        """Join a shard to the open batch, if any, before writing to it."""
+        if self._batch is not None and id(shard) not in self._batched:
+            self._batch.enter_context(shard.batch())
+            self._batched.add(id(shard))
+        return shard
+    
+    def _locate(self, gist_id: str) -> Optional[Tuple[str, Any]]:
+        """``(origin, shard)`` holding a gist, probing shards already open first."""
+        origin = self._home.get(gist_id)
+        if origin is not None:
+            shard = self.shard(origin)
+            if shard is not None and shard.get_record(gist_id) is not None:
+                return origin, shard
+            del self._home[gist_id]
+        
+        for origin in sorted(self.shard_origins(), key=lambda origin: origin not in self.shards):
+            shard = self.shard(origin)
+            if shard.get_record(gist_id) is not None:
+                self._home[gist_id] = origin
+                return origin, shard
+        return None
+    
+    def _record_of(self, gist_id: str) -> Optional[Dict[str, Any]]:
+        """Index record of a gist in whichever shard holds it."""
+        located = self._locate(gist_id)
+        return located[1].get_record(gist_id) if located else None
+    
+    def refresh(self) -> bool:
+        """Pick up changes other processes made to any open shard."""
+        return any([shard.refresh() for shard in self.shards.values()])
+    
+    @property
+    def revision(self) -> int:
+        """Total number of saves made to all shards, by any process."""
+        return sum(shard.revision for _, shard in self._all_shards())
+    
+    @contextmanager
+    def batch(self) -> Iterator['ShardedIndexManager']:
+        """Group mutations; each shard written to joins the batch and saves once at the end."""
+        if self._batch is not None:
+            yield self
+            return
+        
+        with ExitStack() as stack:
+            self._batch = stack
+            try:
+                yield self
+            finally:
+                self._batch = None
+                self._batched = set()
+    
+    def add_gist(self, gist: Gist):
+        """Add a gist to its origin's shard, or to its parent's shard if it is an evolution."""
+        if not gist.gist_id:
+            raise ValueError("Gist must have an ID to be indexed")
+        
+        parent = self._locate(gist.parent_gist) if gist.parent_gist else None
+        origin = parent[0] if parent else gist.origin_hydra or DEFAULT_ORIGIN
+        self._writing(self.shard(origin, create=True)).add_gist(gist)
+        self._home[gist.gist_id] = origin
+    
+    def update_gist(self, gist: Gist):
+        """Update an existing gist in the shard that holds it."""
+        if not gist.gist_id:
+            raise ValueError("Gist must have an ID to be updated")
+        
+        located = self._locate(gist.gist_id)
+        if located is None:
+            print(f"Warning: Gist {gist.gist_id} not found in index")
+            return
+        self._writing(located[1]).update_gist(gist)
+    
+    def get_gist(self, gist_id: str) -> Optional[Gist]:
+        """Retrieve a gist from whichever shard holds it."""
+        located = self._locate(gist_id)
+        return located[1].get_gist(gist_id) if located else None
+    
+    def get_record(self, gist_id: str) -> Optional[Dict[str, Any]]:
+        """Raw index record of a gist, or None."""
+        return self._record_of(gist_id)
+    
+    def get_content(self, gist_id: str) -> Optional[str]:
+        """Retrieve only the content of a gist."""
+        located = self._locate(gist_id)
+        return located[1].get_content(gist_id) if located else None
+    
+    def remove_gist(self, gist_id: str):
+        """Remove a gist, and the edges other shards keep to it."""
+        located = self._locate(gist_id)
+        if located is None:
+            return
+        
+        origin, shard = located
+        linked = {rel['to'] for rel in shard.get_edges(gist_id)}
+        self._writing(shard).remove_gist(gist_id)
+        self._home.pop(gist_id, None)
+        
+        for other_id in linked:
+            other = self._locate(other_id)
+            if other is not None and other[0] != origin:
+                self._writing(other[1]).forget_external(gist_id)
+    
+    def list_gists(self, status_filter: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """List gists from every shard with optional filtering."""
+        return self.query_gists(status=status_filter, limit=limit)['thoughts']
+    
+    def query_gists(self, status: Optional[str] = None, priority_min: Optional[int] = None,
+                    priority_max: Optional[int] = None, origin: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None,
+                    limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Query every shard with the same filters and merge their newest-first pages.
+
+        Cursors mark a position in the global (timestamp, gist_id) order, so
+        one cursor pages through all shards at once.
+        """
+        pages = [
+            shard.query_gists(
+                status=status, priority_min=priority_min, priority_max=priority_max,
+                origin=origin, since=since, until=until, limit=limit, cursor=cursor
+            )
+            for _, shard in self._all_shards()
+        ]
+        merged = heapq.merge(
+            *(page['thoughts'] for page in pages), key=_newest_first, reverse=True
+        )
+        thoughts = list(islice(merged, limit + 1))
+        more = len(thoughts) > limit or any(page['next_cursor'] for page in pages)
+        thoughts = thoughts[:limit]
+        
+        next_cursor = None
+        if more and thoughts:
+            next_cursor = encode_cursor(*_newest_first(thoughts[-1]))
+        return {'thoughts': thoughts, 'next_cursor': next_cursor}
+    
+    def link_gists(self, gist_id_1: str, gist_id_2: str, relationship: str = "related"):
+        """Create a semantic link between two gists, in one shard or across two."""
+        first = self._locate(gist_id_1)
+        second = self._locate(gist_id_2)
+        if first is None or second is None:
+            raise ValueError("Both gists must exist in the index before linking")
+        
+        if first[0] == second[0]:
+            self._writing(first[1]).link_gists(gist_id_1, gist_id_2, relationship)
+            return
+        
+        self._writing(first[1]).add_external_edge(gist_id_1, gist_id_2, relationship)
+        self._writing(second[1]).add_external_edge(gist_id_2, gist_id_1, f"reverse_{relationship}")
+    
+    def unlink_gists(self, gist_id_1: str, gist_id_2: str, relationship: str = "related"):
+        """Remove a semantic link between two gists, in one shard or across two."""
+        first = self._locate(gist_id_1)
+        second = self._locate(gist_id_2)
+        if first is not None and second is not None and first[0] == second[0]:
+            self._writing(first[1]).unlink_gists(gist_id_1, gist_id_2, relationship)
+            return
+        
+        if first is not None:
+            self._writing(first[1]).remove_external_edge(gist_id_1, gist_id_2, relationship)
+        if second is not None:
+            self._writing(second[1]).remove_external_edge(gist_id_2, gist_id_1, f"reverse_{relationship}")
+    
+    def get_edges(self, gist_id: str) -> List[Dict[str, Any]]:
+        """Edges leaving a gist."""
+        located = self._locate(gist_id)
+        return located[1].get_edges(gist_id) if located else []
+    
+    def get_neighbours(self, gist_id: str, relationship_type: str) -> List[str]:
+        """Get ids of gists linked from a gist by one relationship type."""
+        return [rel['to'] for rel in self.get_edges(gist_id) if rel['type'] == relationship_type]
+    
+    def get_related_gists(self, gist_id: str, relationship_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all gists related to the given gist, looking up linked gists in other shards."""
+        related_gists = []
+        for rel in self.get_edges(gist_id):
+            if relationship_type and rel['type'] != relationship_type:
+                continue
+            related_gist_data = self._record_of(rel['to'])
+            if related_gist_data:
+                related_gists.append({
+                    'gist': related_gist_data,
+                    'relationship': rel['type'],
+                    'created_at': rel['created_at']
+                })
+        return related_gists
+    
+    def get_evolution_chain(self, gist_id: str) -> List[str]:
+        """Get the full evolution chain (tree) for a gist, root first."""
+        located = self._locate(gist_id)
+        return located[1].get_evolution_chain(gist_id) if located else [gist_id]
+    
+    def get_lineage(self, gist_id: str) -> List[str]:
+        """Get the path from the evolution root down to a gist."""
+        located = self._locate(gist_id)
+        return located[1].get_lineage(gist_id) if located else [gist_id]
+    
+    def get_evolution_chains(self) -> List[List[str]]:
+        """Get all evolution chains in the network."""
+        return [
+            evolution_chain for _, shard in self._all_shards()
+            for evolution_chain in shard.get_evolution_chains()
+        ]
+    
+    def search_thoughts(self, query: str, fields: List[str] = None, mode: str = 'newest',
+                        limit: Optional[int] = None, prefix: bool = True) -> List[Dict[str, Any]]:
+        """Search every shard and merge the results.
+
+        'newest' and 'substring' results are merged newest first. Relevance
+        scores from different shards are not comparable (each shard has its
+        own term statistics), so 'ranked' results are interleaved by rank.
+        """
+        results = [
+            shard.search_thoughts(query, fields, mode, limit, prefix)
+            for _, shard in self._all_shards()
+        ]
+        
+        if mode == 'ranked':
+            merged = (
+                record for tier in zip_longest(*results)
+                for record in tier if record is not None
+            )
+        else:
+            merged = heapq.merge(
+                *results, key=lambda record: record.get('timestamp', ''), reverse=True
+            )
+        return list(islice(merged, limit))
+    
+    def find_similar(self, content: str, threshold: float = 0.9, limit: Optional[int] = None,
+                     exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Find thoughts in any shard whose content nearly matches a text."""
+        matches = [
+            match for _, shard in self._all_shards()
+            for match in shard.find_similar(content, threshold, limit, exclude)
+        ]
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches if limit is None else matches[:limit]
+    
+    def find_duplicates(self, threshold: float = 0.9) -> List[Tuple[str, str, float]]:
+        """Find pairs of thoughts with nearly the same content within each shard."""
+        pairs = [
+            pair for _, shard in self._all_shards()
+            for pair in shard.find_duplicates(threshold)
+        ]
+        pairs.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+        return pairs
+    
+    def similar_thoughts(self, gist_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """The k thoughts most like a given one, from the shard that holds it."""
+        located = self._locate(gist_id)
+        return located[1].similar_thoughts(gist_id, k) if located else []
+    
+    def stat_counters(self) -> Dict[str, Any]:
+        """The statistics counters of every shard, summed."""
+        totals: Dict[str, Any] = {
+            'status_breakdown': {},
+            'semantic_edges': 0,
+            'evolution_chains': 0,
+            'total_chain_length': 0
+        }
+        for _, shard in self._all_shards():
+            counters = shard.stat_counters()
+            for status, count in (counters['status_breakdown'] or {}).items():
+                totals['status_breakdown'][status] = totals['status_breakdown'].get(status, 0) + count
+            for counter in ('semantic_edges', 'evolution_chains', 'total_chain_length'):
+                totals[counter] += counters[counter] or 0
+        return totals
+    
+    def get_network_stats(self) -> Dict[str, Any]:
+        """Network statistics over all shards.
+
+        Cross-shard links keep one edge in each shard and evolution chains
+        stay within a shard, so summing the shards' counters is exact.
+        """
+        counters = self.stat_counters()
+        return summarize_network(
+            counters['status_breakdown'], counters['semantic_edges'],
+            counters['evolution_chains'], counters['total_chain_length']
+        )
+    
+    def verify_network_stats(self) -> Dict[str, Tuple[Any, Any]]:
+        """Recompute every shard's counters; drift is reported as ``'<origin>: <counter>'``."""
+        return {
+            f"{origin}: {counter}": values
+            for origin, shard in self._all_shards()
+            for counter, values in shard.verify_network_stats().items()
+        }
+    
+    def storage_stats(self) -> Dict[str, int]:
+        """Blob storage sizes summed over all shards."""
+        totals: Dict[str, int] = {}
+        for _, shard in self._all_shards():
+            for key, value in shard.storage_stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+    
+    def prune_blobs(self) -> int:
+        """Delete unreferenced contents in every shard; returns how many were removed."""
+        return sum(shard.prune_blobs() for _, shard in self._all_shards())
+    
+    def _records(self) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        """``(shard, record)`` for every thought, a page at a time."""
+        for _, shard in self._all_shards():
+            cursor = None
+            while True:
+                page = shard.query_gists(limit=PAGE_SIZE, cursor=cursor)
+                for record in page['thoughts']:
+                    yield shard, record
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+    
+    def analyze(self, top: int = 10) -> Dict[str, Any]:
+        """Rank and cluster the network across all shards (needs NumPy)."""
+        graph = CSRGraph.from_edges(
+            (record['gist_id'] for _, record in self._records()),
+            (
+                (record['gist_id'], rel['to'], rel['type'])
+                for shard, record in self._records()
+                for rel in shard.get_edges(record['gist_id'])
+            )
+        )
+        return analyze_network(graph, top)
+    
+    def _adjacent(self, gist_id: str) -> Iterable[Tuple[str, str]]:
+        """``(other_id, relationship_type)`` for the edges of a gist.
+
+        Every link and evolution is stored in both directions, so outgoing
+        edges reach all neighbours.
+        """
+        return [(rel['to'], rel['type']) for rel in self.get_edges(gist_id)]
+    
+    def export_stream(self, out: TextIO, format_type: str = 'json', around: Optional[str] = None,
+                      hops: int = 1, relationship_types: Optional[List[str]] = None,
+                      statuses: Optional[List[str]] = None):
+        """Write the network, or the k-hop neighbourhood of one gist, to a text stream.
+
+        See ``IndexManager.export_stream``; neighbourhoods follow links into
+        other shards.
+        """
+        types = set(relationship_types) if relationship_types else None
+        
+        def accept(gist_id: str) -> bool:
+            record = self._record_of(gist_id)
+            return record is not None and (not statuses or record.get('status') in statuses)
+        
+        if around is not None:
+            if self._locate(around) is None:
+                raise ValueError(f"Gist {around} not found in index")
+            selected = [
+                (self._locate(gist_id)[1], self._record_of(gist_id))
+                for gist_id in k_hop(around, hops, self._adjacent, accept, types)
+            ]
+        else:
+            selected = None
+        members = {record['gist_id'] for _, record in selected} if selected is not None else None
+        
+        def chosen() -> Iterator[Tuple[Any, Dict[str, Any]]]:
+            for shard, record in (selected if selected is not None else self._records()):
+                if members is not None or not statuses or record.get('status') in statuses:
+                    yield shard, record
+        
+        with_content = format_type in ('json', 'ndjson')
+        
+        def thought_records() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            for shard, record in chosen():
+                if with_content:
+                    record = dict(record, content=shard.get_content(record['gist_id']))
+                    record.pop('content_hash', None)
+                yield record['gist_id'], record
+        
+        def edge_lists() -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+            exported = members
+            if exported is None and statuses:
+                exported = {record['gist_id'] for _, record in chosen()}
+            for shard, record in chosen():
+                rels = shard.get_edges(record['gist_id'])
+                if exported is not None or types is not None:
+                    rels = [
+                        rel for rel in rels
+                        if (exported is None or rel['to'] in exported)
+                        and (types is None or rel['type'] in types)
+                    ]
+                yield record['gist_id'], rels
+        
+        write_network(out, format_type, thought_records(), edge_lists(), {'shards': self.shard_origins()})
+    
+    def import_index(self, index: Dict[str, Any]):
+        """Distribute an index.json document (contents inlined) over the shards.
+
+        Parents are added before their evolutions so each chain lands in one
+        shard; links are then recreated, within or across shards.
+        """
+        thoughts = index.get('thoughts', {})
+        added = set()
+        
+        with self.batch():
+            for gist_id in thoughts:
+                # Walk up to the first ancestor already added, then add downwards
+                lineage = []
+                while gist_id in thoughts and gist_id not in added and gist_id not in lineage:
+                    lineage.append(gist_id)
+                    gist_id = thoughts[gist_id].get('parent_gist')
+                for gist_id in reversed(lineage):
+                    gist = Gist.from_dict(dict(thoughts[gist_id], gist_id=gist_id))
+                    self.add_gist(gist)
+                    added.add(gist_id)
+                    if gist.parent_gist and gist.parent_gist not in thoughts:
+                        # The parent was removed; don't resurrect the evolution edges to it
+                        self._writing(self.shard(self._home[gist_id])).forget_external(gist.parent_gist)
+            
+            for from_gist, rels in index.get('relationships', {}).items():
+                for rel in rels:
+                    relationship_type = rel['type']
+                    if relationship_type.startswith(('evolved_', 'reverse_')):
+                        continue
+                    if from_gist in thoughts and rel['to'] in thoughts:
+                        self.link_gists(from_gist, rel['to'], relationship_type)
@@ -0,0 +1,112 @@
+"""
+Binary snapshot of the index, for fast startup.
+"""
+
+import gc
+import pickle
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from journal import atomic_write
+
+
+SNAPSHOT_MAGIC = b'GGSNAP'
+SNAPSHOT_VERSION = 1
+
+# Magic, format version, then the (inode, size, mtime_ns) of the index.json it mirrors
+_HEADER = struct.Struct('>6sHQQq')
+
+# Record fields whose values repeat across thoughts and edges
+SHARED_FIELDS = frozenset([
+    'gist_id', 'parent_gist', 'origin_hydra', 'status', 'file_format', 'version', 'to', 'type'
+])
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Unpickler that only rebuilds plain containers and scalars."""
+    
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f"Unexpected object in snapshot: {module}.{name}")
+
+
+def _share_strings(index: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy an index so equal ids, statuses, types and keys are one string object.
+
+    Pickle writes a repeated object once and refers back to it by number, so
+    gist ids referenced from many edges cost a few bytes each, and the loaded
+    index shares those strings instead of holding a copy per reference.
+    """
+    strings: Dict[str, str] = {}
+    
+    def shared(value: Any) -> Any:
+        return strings.setdefault(value, value) if isinstance(value, str) else value
+    
+    def record(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            shared(key): shared(value) if key in SHARED_FIELDS else value
+            for key, value in data.items()
+        }
+    
+    return {
+        'thoughts': {
+            shared(gist_id): record(gist_data)
+            for gist_id, gist_data in index['thoughts'].items()
+        },
+        'relationships': {
+            shared(from_gist): [record(rel) for rel in rels]
+            for from_gist, rels in index['relationships'].items()
+        },
+        'metadata': index['metadata']
+    }
+
+
+def write_snapshot(path: Path, index: Dict[str, Any], signature: Tuple[int, int, int]):
+    """Atomically write a binary copy of an index tagged with its index.json signature."""
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, *signature)
+    atomic_write(path, header + pickle.dumps(_share_strings(index), protocol=5))
+
+
+def read_snapshot(path: Path, signature: Optional[Tuple[int, int, int]]) -> Optional[Dict[str, Any]]:
+    """Load a binary snapshot if it mirrors the index.json with this signature.
+
+    Returns None when there is no usable snapshot (missing, another format
+    version, written for a different index.json, or damaged) so the caller
+    falls back to parsing JSON.
+    """
+    if signature is None:
+        return None
+    
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            
+            magic, version, *snapshot_signature = _HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+            if tuple(snapshot_signature) != tuple(signature):
+                return None
+            
+            # Loading creates millions of containers at once; cyclic GC passes
+            # over them would only slow the load down
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                index = _SnapshotUnpickler(f).load()
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError,
+            OverflowError, MemoryError, struct.error) as e:
+        # A damaged pickle can fail in many ways; any of them means "use the JSON"
+        print(f"Warning: Ignoring unreadable index snapshot: {e}")
+        return None
+    
+    if not isinstance(index, dict) or not {'thoughts', 'relationships', 'metadata'} <= index.keys():
+        print("Warning: Ignoring malformed index snapshot")
+        return None
+    return index
@@ -0,0 +1,1250 @@
+"""
+SQLite storage backend for the GistGhost thought network.
+"""
+
+import io
+import json
+import sqlite3
+from contextlib import contextmanager
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Set, TextIO, Tuple
+from datetime import datetime
+from gist import Gist
+from analytics import CSRGraph, analyze_network
+from blob_store import BlobStore
+from evolution import EvolutionTracker
+from exporter import k_hop, write_network
+from minhash import BANDS, band_keys, duplicate_pairs, rank_matches, signature, signature_from_bytes
+from index_manager import IndexManager, is_semantic, summarize_network
+from query_index import decode_cursor, encode_cursor
+from text_index import TextIndex, tokenize
+from vector_index import VectorIndex
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thoughts (
+    gist_id TEXT PRIMARY KEY,
+    origin_hydra TEXT,
+    intent TEXT,
+    priority INTEGER,
+    content_hash TEXT,
+    parent_gist TEXT,
+    status TEXT,
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_thoughts_status ON thoughts(status, timestamp);
+CREATE INDEX IF NOT EXISTS idx_thoughts_timestamp ON thoughts(timestamp, gist_id);
+CREATE INDEX IF NOT EXISTS idx_thoughts_origin ON thoughts(origin_hydra, timestamp);
+CREATE INDEX IF NOT EXISTS idx_thoughts_priority ON thoughts(priority);
+CREATE INDEX IF NOT EXISTS idx_thoughts_parent ON thoughts(parent_gist);
+
+-- Thought bodies, stored once per distinct content
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+);
+CREATE VIEW IF NOT EXISTS thought_texts AS
+    SELECT t.rowid AS rowid, t.intent AS intent, b.content AS content,
+           t.origin_hydra AS origin_hydra, t.timestamp AS timestamp, t.data AS data
+    FROM thoughts t LEFT JOIN blobs b ON b.hash = t.content_hash;
+
+CREATE TABLE IF NOT EXISTS relationships (
+    from_gist TEXT NOT NULL,
+    to_gist TEXT NOT NULL,
+    type TEXT NOT NULL,
+    created_at TEXT,
+    PRIMARY KEY (from_gist, to_gist, type)
+);
+CREATE INDEX IF NOT EXISTS idx_relationships_to ON relationships(to_gist);
+CREATE INDEX IF NOT EXISTS idx_relationships_type ON relationships(type, from_gist);
+
+-- Place of every thought in an evolution tree of more than one thought:
+-- its parent, root, depth and subtree size, maintained on every edit
+CREATE TABLE IF NOT EXISTS evolution (
+    gist_id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    root_id TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evolution_parent ON evolution(parent_id);
+CREATE INDEX IF NOT EXISTS idx_evolution_root ON evolution(root_id);
+
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- MinHash signatures of thought contents (NULL if they have no words), and
+-- the LSH bucket of each signature band
+CREATE TABLE IF NOT EXISTS minhash (
+    gist_id TEXT PRIMARY KEY,
+    signature BLOB
+);
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    gist_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, gist_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_minhash_bands_gist ON minhash_bands(gist_id);
+"""
+
+# Full-text index kept in step with the thoughts table by triggers; contents
+# are read from the blobs table, which must be written before the thought row
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS thoughts_fts USING fts5(
+    intent, content, origin_hydra, content='thought_texts', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS thoughts_fts_insert AFTER INSERT ON thoughts BEGIN
+    INSERT INTO thoughts_fts (rowid, intent, content, origin_hydra)
+    VALUES (new.rowid, new.intent,
+            (SELECT content FROM blobs WHERE hash = new.content_hash), new.origin_hydra);
+END;
+CREATE TRIGGER IF NOT EXISTS thoughts_fts_delete AFTER DELETE ON thoughts BEGIN
+    INSERT INTO thoughts_fts (thoughts_fts, rowid, intent, content, origin_hydra)
+    VALUES ('delete', old.rowid, old.intent,
+            (SELECT content FROM blobs WHERE hash = old.content_hash), old.origin_hydra);
+END;
+CREATE TRIGGER IF NOT EXISTS thoughts_fts_update AFTER UPDATE ON thoughts BEGIN
+    INSERT INTO thoughts_fts (thoughts_fts, rowid, intent, content, origin_hydra)
+    VALUES ('delete', old.rowid, old.intent,
+            (SELECT content FROM blobs WHERE hash = old.content_hash), old.origin_hydra);
+    INSERT INTO thoughts_fts (rowid, intent, content, origin_hydra)
+    VALUES (new.rowid, new.intent,
+            (SELECT content FROM blobs WHERE hash = new.content_hash), new.origin_hydra);
+END;
+"""
+
+# Common table expressions walking up from, and down below, one thought
+ANCESTORS = (
+    'WITH RECURSIVE ancestors(id) AS (SELECT ? UNION ALL SELECT e.parent_id FROM evolution e '
+    'JOIN ancestors a ON e.gist_id = a.id WHERE e.parent_id IS NOT NULL) '
+)
+DESCENDANTS = (
+    'WITH RECURSIVE descendants(id) AS (SELECT ? UNION ALL SELECT e.gist_id FROM evolution e '
+    'JOIN descendants d ON e.parent_id = d.id) '
+)
+
+
+class SQLiteIndexManager:
+    """Thought network index stored in SQLite, queried on demand.
+
+    Exposes the same public API as ``IndexManager`` but only loads the rows
+    a call needs, so memory and startup time don't grow with the network.
+    """
+    
+    # Seconds a writer waits for another process's transaction to finish
+    LOCK_TIMEOUT = 30.0
+    
+    def __init__(self, db_file: Path):
+        """Open (and create if needed) the SQLite index."""
+        self.db_file = db_file
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Concurrent writers queue on the database lock instead of failing
+        self.conn = sqlite3.connect(str(db_file), timeout=self.LOCK_TIMEOUT)
+        self._batch_depth = 0
+        self._seen_revision = None
+        # Similarity vectors are kept in memory, see ``vector_index``
+        self._vector_index: Optional[VectorIndex] = None
+        self._vector_data_version = None
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        # INSERT OR REPLACE must fire the delete trigger of the FTS table
+        self.conn.execute('PRAGMA recursive_triggers=ON')
+        self._move_contents_to_blobs()
+        self.conn.executescript(SCHEMA)
+        self.has_fts = self._create_fts()
+        
+        if self._get_metadata('version') is None:
+            now = datetime.utcnow().isoformat()
+            self._set_metadata({
+                'version': '1.0.0',
+                'created_at': now,
+                'last_updated': now,
+                'evolution_chains': 0
+            })
+            self.conn.commit()
+        
+        # Databases created before the evolution table get it filled once
+        if self._get_metadata('evolution_indexed') is None:
+            with self.conn:
+                self._rebuild_evolution(self._evolution_from_edges())
+                self._set_metadata({'evolution_indexed': True})
+        
+        # Databases created before the statistics counters get them counted once
+        if self._get_metadata('status_breakdown') is None:
+            self._set_metadata(self._count_stats())
+            self.conn.commit()
+        
+        # ...and older thoughts get near-duplicate signatures once
+        if self._get_metadata('minhash_indexed') is None:
+            with self.conn:
+                for gist_id, content in self.conn.execute(
+                    'SELECT t.gist_id, b.content FROM thoughts t '
+                    'LEFT JOIN blobs b ON b.hash = t.content_hash'
+                ).fetchall():
+                    self._index_signature(gist_id, content or '')
+                self._set_metadata({'minhash_indexed': True})
+    
+    def _move_contents_to_blobs(self):
+        """Upgrade databases that kept thought bodies inline in the thoughts table.
+        
+        The table is copied rather than altered, as DROP COLUMN needs SQLite
+        3.35; an upgrade cut short resumes from the renamed old table.
+        """
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(thoughts)')]
+        if 'content' in columns:
+            # The old search table reads thoughts.content; it is rebuilt afterwards
+            for trigger in ('thoughts_fts_insert', 'thoughts_fts_delete', 'thoughts_fts_update'):
+                self.conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            self.conn.execute('DROP TABLE IF EXISTS thoughts_fts')
+            self.conn.execute('DROP VIEW IF EXISTS thought_texts')
+            # SCHEMA recreates the indexes on the new table under the same names
+            for index, in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'thoughts' "
+                'AND sql IS NOT NULL'
+            ).fetchall():
+                self.conn.execute(f'DROP INDEX {index}')
+            self.conn.execute('ALTER TABLE thoughts RENAME TO thoughts_inline')
+        elif self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'thoughts_inline'"
+        ).fetchone() is None:
+            return
+        
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            for rowid, data in self.conn.execute('SELECT rowid, data FROM thoughts_inline').fetchall():
+                record = self._store_content(json.loads(data))
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO thoughts '
+                    '(rowid, gist_id, origin_hydra, intent, priority, content_hash, parent_gist, status, '
+                    'timestamp, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (rowid,) + self._thought_row(record)
+                )
+            self.conn.execute('DROP TABLE thoughts_inline')
+    
+    def _create_fts(self) -> bool:
+        """Create the FTS5 search table, if this SQLite build supports it."""
+        existed = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'thoughts_fts'"
+        ).fetchone() is not None
+        
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        
+        if not existed:
+            self.rebuild_search_index()
+        return True
+    
+    def rebuild_search_index(self):
+        """Rebuild the FTS table from the thoughts table."""
+        with self.conn:
+            self.conn.execute("INSERT INTO thoughts_fts (thoughts_fts) VALUES ('rebuild')")
+    
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+    
+    def _get_metadata(self, key: str) -> Any:
+        """Read a metadata value."""
+        row = self.conn.execute('SELECT value FROM metadata WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def _set_metadata(self, values: Dict[str, Any]):
+        """Write metadata values (caller commits)."""
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)',
+            [(key, json.dumps(value)) for key, value in values.items()]
+        )
+    
+    @contextmanager
+    def batch(self) -> Iterator['SQLiteIndexManager']:
+        """Run many mutations in one transaction, committed when the block exits.
+        
+        If the block raises, the transaction is rolled back and the exception
+        propagates. Nested batches join the outermost one.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self.conn.rollback()
+                self._vector_index = None
+            raise
+        finally:
+            self._batch_depth -= 1
+        
+        if not self._batch_depth:
+            self._commit()
+    
+    def _begin(self):
+        """Open a write transaction holding the database write lock.
+        
+        The statistics counters are read, modified and written back, so the
+        lock is taken before they are read rather than at the first write.
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute('BEGIN IMMEDIATE')
+    
+    def _commit(self):
+        """Stamp last_updated, bump the revision and commit the current transaction."""
+        if self._batch_depth:
+            return
+        
+        self._set_metadata({
+            'last_updated': datetime.utcnow().isoformat(),
+            'revision': self.revision + 1
+        })
+        self.conn.commit()
+    
+    @property
+    def revision(self) -> int:
+        """Number of committed writes to this index, by any process."""
+        return self._get_metadata('revision') or 0
+    
+    def refresh(self) -> bool:
+        """Check whether other processes changed the index since the last call.
+        
+        Queries always read the latest committed data, so there is nothing
+        to reload; this only compares revisions.
+        """
+        revision = self.revision
+        changed = revision != self._seen_revision
+        self._seen_revision = revision
+        return changed
+    
+    def _store_content(self, gist_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Move a record's content into the blobs table, leaving its hash."""
+        if 'content' not in gist_data:
+            return gist_data
+        
+        record = dict(gist_data)
+        content = record.pop('content') or ''
+        record['content_hash'] = BlobStore.hash_content(content)
+        self.conn.execute(
+            'INSERT OR IGNORE INTO blobs (hash, content) VALUES (?, ?)',
+            (record['content_hash'], content)
+        )
+        return record
+    
+    def _load_content(self, content_hash: Optional[str]) -> str:
+        """Read a thought body from the blobs table."""
+        row = self.conn.execute('SELECT content FROM blobs WHERE hash = ?', (content_hash,)).fetchone()
+        return row[0] if row else ''
+    
+    @staticmethod
+    def _thought_row(gist_data: Dict[str, Any]) -> tuple:
+        """Flatten a thought record into a table row."""
+        return (
+            gist_data['gist_id'],
+            gist_data.get('origin_hydra'),
+            gist_data.get('intent'),
+            gist_data.get('priority'),
+            gist_data.get('content_hash'),
+            gist_data.get('parent_gist'),
+            gist_data.get('status'),
+            gist_data.get('timestamp'),
+            json.dumps(gist_data, ensure_ascii=False)
+        )
+    
+    def _put_thought(self, gist_data: Dict[str, Any]):
+        """Insert or replace a thought row."""
+        row = self.conn.execute(
+            'SELECT status FROM thoughts WHERE gist_id = ?', (gist_data['gist_id'],)
+        ).fetchone()
+        status_counts = self._get_metadata('status_breakdown') or {}
+        if row:
+            self._count_status(status_counts, row[0], -1)
+        self._count_status(status_counts, gist_data.get('status', 'unknown'), 1)
+        self._set_metadata({'status_breakdown': status_counts})
+        self._write_thought(gist_data)
+    
+    def _write_thought(self, gist_data: Dict[str, Any]):
+        """Insert or replace a thought row without touching the counters."""
+        record = self._store_content(gist_data)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO thoughts '
+            '(gist_id, origin_hydra, intent, priority, content_hash, parent_gist, status, timestamp, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            self._thought_row(record)
+        )
+        
+        if 'content' in gist_data:
+            content = gist_data['content'] or ''
+        else:
+            content = self._load_content(record.get('content_hash'))
+        self._index_signature(record['gist_id'], content)
+        if self._vector_index is not None:
+            self._vector_index.add(record['gist_id'], f"{record.get('intent') or ''}\n{content}")
+    
+    def _index_signature(self, gist_id: str, content: str):
+        """Store the MinHash signature of a thought and file it under its LSH buckets."""
+        self.conn.execute('DELETE FROM minhash_bands WHERE gist_id = ?', (gist_id,))
+        text_signature = signature(content)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO minhash (gist_id, signature) VALUES (?, ?)',
+            (gist_id, text_signature.tobytes() if text_signature is not None else None)
+        )
+        if text_signature is not None:
+            self.conn.executemany(
+                'INSERT INTO minhash_bands (band, bucket, gist_id) VALUES (?, ?, ?)',
+                [(band, key, gist_id) for band, key in enumerate(band_keys(text_signature))]
+            )
+    
+    def _exists(self, gist_id: str) -> bool:
+        """Check whether a thought is indexed."""
+        return self.conn.execute(
+            'SELECT 1 FROM thoughts WHERE gist_id = ?', (gist_id,)
+        ).fetchone() is not None
+    
+    def add_gist(self, gist: Gist):
+        """Add a gist to the index."""
+        if not gist.gist_id:
+            raise ValueError("Gist must have an ID to be indexed")
+        
+        self._begin()
+        self._put_thought(gist.to_dict())
+        
+        # If this is an evolution, track the relationship
+        if gist.parent_gist:
+            self._add_relationship(gist.parent_gist, gist.gist_id, "evolved_to")
+            self._add_relationship(gist.gist_id, gist.parent_gist, "evolved_from")
+            self._link_evolution(gist.parent_gist, gist.gist_id)
+        
+        self._commit()
+    
+    def update_gist(self, gist: Gist):
+        """Update an existing gist in the index."""
+        if not gist.gist_id:
+            raise ValueError("Gist must have an ID to be updated")
+        
+        if self._exists(gist.gist_id):
+            self._begin()
+            self._put_thought(gist.to_dict())
+            self._commit()
+        else:
+            print(f"Warning: Gist {gist.gist_id} not found in index")
+    
+    def get_gist(self, gist_id: str) -> Optional[Gist]:
+        """Retrieve a gist from the index."""
+        row = self.conn.execute('SELECT data FROM thoughts WHERE gist_id = ?', (gist_id,)).fetchone()
+        if row:
+            gist_data = json.loads(row[0])
+            return Gist.from_dict(
+                gist_data, content_loader=lambda: self._load_content(gist_data.get('content_hash'))
+            )
+        return None
+    
+    def get_record(self, gist_id: str) -> Optional[Dict[str, Any]]:
+        """Raw index record of a gist (its body as ``content_hash``), or None."""
+        row = self.conn.execute('SELECT data FROM thoughts WHERE gist_id = ?', (gist_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def get_content(self, gist_id: str) -> Optional[str]:
+        """Retrieve only the content of a gist."""
+        row = self.conn.execute(
+            'SELECT content_hash FROM thoughts WHERE gist_id = ?', (gist_id,)
+        ).fetchone()
+        if row:
+            return self._load_content(row[0])
+        return None
+    
+    def remove_gist(self, gist_id: str):
+        """Remove a gist from the index (use sparingly)."""
+        if not self._exists(gist_id):
+            return
+        
+        self._begin()
+        row = self.conn.execute('SELECT status FROM thoughts WHERE gist_id = ?', (gist_id,)).fetchone()
+        if row:
+            status_counts = self._get_metadata('status_breakdown') or {}
+            self._count_status(status_counts, row[0], -1)
+            self._set_metadata({'status_breakdown': status_counts})
+            
+            self.conn.execute('DELETE FROM thoughts WHERE gist_id = ?', (gist_id,))
+            self.conn.execute('DELETE FROM minhash WHERE gist_id = ?', (gist_id,))
+            self.conn.execute('DELETE FROM minhash_bands WHERE gist_id = ?', (gist_id,))
+            if self._vector_index is not None:
+                self._vector_index.remove(gist_id)
+            self._drop_relationships(gist_id)
+        
+        # Also ends the transaction if another process removed it first
+        self._commit()
+    
+    def _drop_relationships(self, gist_id: str):
+        """Delete every edge to or from a gist, keeping the counters in step."""
+        semantic_removed = sum(
+            1 for relationship_type, in self.conn.execute(
+                'SELECT type FROM relationships WHERE from_gist = ? OR to_gist = ?',
+                (gist_id, gist_id)
+            )
+            if is_semantic(relationship_type)
+        )
+        self.conn.execute(
+            'DELETE FROM relationships WHERE from_gist = ? OR to_gist = ?', (gist_id, gist_id)
+        )
+        self._remove_evolution_node(gist_id)
+        
+        self._set_metadata({'semantic_edges': self._get_metadata('semantic_edges') - semantic_removed})
+    
+    def list_gists(self, status_filter: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """List gists from the index with optional filtering."""
+        return self.query_gists(status=status_filter, limit=limit)['thoughts']
+    
+    def query_gists(self, status: Optional[str] = None, priority_min: Optional[int] = None,
+                    priority_max: Optional[int] = None, origin: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None,
+                    limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Query gists by combined filters, newest first, with cursor pagination."""
+        conditions = []
+        params: List[Any] = []
+        
+        for condition, value in (('status = ?', status), ('origin_hydra = ?', origin),
+                                 ('priority >= ?', priority_min), ('priority <= ?', priority_max),
+                                 ('timestamp >= ?', since), ('timestamp <= ?', until)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        
+        if cursor:
+            timestamp, gist_id = decode_cursor(cursor)
+            conditions.append('(timestamp < ? OR (timestamp = ? AND gist_id < ?))')
+            params.extend([timestamp, timestamp, gist_id])
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.conn.execute(
+            f'SELECT timestamp, gist_id, data FROM thoughts {where} '
+            'ORDER BY timestamp DESC, gist_id DESC LIMIT ?',
+            params + [limit + 1]
+        ).fetchall()
+        
+        next_cursor = encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit and limit > 0 else None
+        return {
+            'thoughts': [json.loads(data) for _, _, data in rows[:limit]],
+            'next_cursor': next_cursor
+        }
+    
+    def link_gists(self, gist_id_1: str, gist_id_2: str, relationship: str = "related"):
+        """Create a semantic link between two gists."""
+        # Validate both gists exist
+        if not self._exists(gist_id_1) or not self._exists(gist_id_2):
+            raise ValueError("Both gists must exist in the index before linking")
+        
+        # Create bidirectional relationship
+        self._begin()
+        self._add_relationship(gist_id_1, gist_id_2, relationship)
+        self._add_relationship(gist_id_2, gist_id_1, f"reverse_{relationship}")
+        
+        self._commit()
+    
+    def unlink_gists(self, gist_id_1: str, gist_id_2: str, relationship: str = "related"):
+        """Remove a semantic link between two gists, in both directions."""
+        self._begin()
+        self._remove_relationship(gist_id_1, gist_id_2, relationship)
+        self._remove_relationship(gist_id_2, gist_id_1, f"reverse_{relationship}")
+        
+        self._commit()
+    
+    def add_external_edge(self, from_gist: str, to_gist: str, relationship_type: str):
+        """Record one edge from a gist in this index to a gist kept in another one.
+        
+        Sharded indexes link thoughts across shards with an edge in each
+        direction, each stored in the shard of its source.
+        """
+        if not self._exists(from_gist):
+            raise ValueError(f"Gist {from_gist} not found in index")
+        
+        self._begin()
+        self._add_relationship(from_gist, to_gist, relationship_type)
+        self._commit()
+    
+    def remove_external_edge(self, from_gist: str, to_gist: str, relationship_type: str):
+        """Drop one edge from a gist in this index to a gist kept in another one."""
+        self._begin()
+        self._remove_relationship(from_gist, to_gist, relationship_type)
+        self._commit()
+    
+    def forget_external(self, gist_id: str):
+        """Drop every edge to a gist kept in another index, e.g. once it was removed there."""
+        if self._exists(gist_id) or not self.get_incoming(gist_id):
+            return
+        
+        self._begin()
+        self._drop_relationships(gist_id)
+        self._commit()
+    
+    def get_edges(self, gist_id: str) -> List[Dict[str, Any]]:
+        """Edges leaving a gist, including those to gists kept in another index."""
+        return [
+            {'to': to_gist, 'type': relationship_type, 'created_at': created_at}
+            for to_gist, relationship_type, created_at in self.conn.execute(
+                'SELECT to_gist, type, created_at FROM relationships WHERE from_gist = ? ORDER BY rowid',
+                (gist_id,)
+            )
+        ]
+    
+    def _add_relationship(self, from_gist: str, to_gist: str, relationship_type: str,
+                          created_at: Optional[str] = None):
+        """Add a relationship between two gists (duplicates are ignored)."""
+        cursor = self.conn.execute(
+            'INSERT OR IGNORE INTO relationships (from_gist, to_gist, type, created_at) '
+            'VALUES (?, ?, ?, ?)',
+            (from_gist, to_gist, relationship_type, created_at or datetime.utcnow().isoformat())
+        )
+        if cursor.rowcount and is_semantic(relationship_type):
+            self._set_metadata({'semantic_edges': self._get_metadata('semantic_edges') + 1})
+    
+    def _remove_relationship(self, from_gist: str, to_gist: str, relationship_type: str):
+        """Remove one relationship between two gists, if it exists."""
+        cursor = self.conn.execute(
+            'DELETE FROM relationships WHERE from_gist = ? AND to_gist = ? AND type = ?',
+            (from_gist, to_gist, relationship_type)
+        )
+        if cursor.rowcount and is_semantic(relationship_type):
+            self._set_metadata({'semantic_edges': self._get_metadata('semantic_edges') - 1})
+        if cursor.rowcount and relationship_type == 'evolved_to':
+            self._unlink_evolution(from_gist, to_gist)
+    
+    def get_neighbours(self, gist_id: str, relationship_type: str) -> List[str]:
+        """Get ids of gists linked from a gist by one relationship type."""
+        rows = self.conn.execute(
+            'SELECT to_gist FROM relationships WHERE from_gist = ? AND type = ? ORDER BY rowid',
+            (gist_id, relationship_type)
+        )
+        return [row[0] for row in rows]
+    
+    def get_incoming(self, gist_id: str, relationship_type: Optional[str] = None) -> List[str]:
+        """Get ids of gists that link to a gist, optionally by relationship type."""
+        query = 'SELECT from_gist FROM relationships WHERE to_gist = ?'
+        params = [gist_id]
+        if relationship_type:
+            query += ' AND type = ?'
+            params.append(relationship_type)
+        return [row[0] for row in self.conn.execute(query, params)]
+    
+    def get_related_gists(self, gist_id: str, relationship_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all gists related to the given gist, optionally by relationship type."""
+        query = (
+            'SELECT t.data, r.type, r.created_at FROM relationships r '
+            'JOIN thoughts t ON t.gist_id = r.to_gist WHERE r.from_gist = ?'
+        )
+        params = [gist_id]
+        if relationship_type:
+            query += ' AND r.type = ?'
+            params.append(relationship_type)
+        rows = self.conn.execute(query + ' ORDER BY r.rowid', params)
+        
+        return [
+            {
+                'gist': json.loads(data),
+                'relationship': relationship_type,
+                'created_at': created_at
+            }
+            for data, relationship_type, created_at in rows
+        ]
+    
+    def _evolution_node(self, gist_id: str) -> Tuple[Optional[str], str, int, int]:
+        """``(parent, root, depth, subtree size)`` of a thought in its evolution tree."""
+        row = self.conn.execute(
+            'SELECT parent_id, root_id, depth, size FROM evolution WHERE gist_id = ?', (gist_id,)
+        ).fetchone()
+        return tuple(row) if row else (None, gist_id, 0, 1)
+    
+    def _link_evolution(self, parent_id: str, child_id: str):
+        """Graft a child's tree below its parent, like ``EvolutionTracker.link``.
+        
+        Only the parent's ancestors and the child's subtree are updated.
+        """
+        child_parent, _, _, child_size = self._evolution_node(child_id)
+        if child_parent is not None or parent_id == child_id:
+            return
+        # The child is a root, so it can only be the parent's ancestor as its root
+        _, root_id, parent_depth, _ = self._evolution_node(parent_id)
+        if root_id == child_id:
+            return
+        root_size = self._evolution_node(root_id)[3]
+        
+        self.conn.execute(
+            'INSERT OR IGNORE INTO evolution (gist_id, parent_id, root_id, depth, size) '
+            'VALUES (?, NULL, ?, 0, 1)',
+            (parent_id, parent_id)
+        )
+        self.conn.execute(
+            ANCESTORS + 'UPDATE evolution SET size = size + ? WHERE gist_id IN (SELECT id FROM ancestors)',
+            (parent_id, child_size)
+        )
+        
+        if child_size > 1:
+            self.conn.execute(
+                'UPDATE evolution SET root_id = ?, depth = depth + ? WHERE root_id = ?',
+                (root_id, parent_depth + 1, child_id)
+            )
+            self.conn.execute('UPDATE evolution SET parent_id = ? WHERE gist_id = ?', (parent_id, child_id))
+        else:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO evolution (gist_id, parent_id, root_id, depth, size) '
+                'VALUES (?, ?, ?, ?, 1)',
+                (child_id, parent_id, root_id, parent_depth + 1)
+            )
+        self._update_chain_counters([root_size, child_size], [root_size + child_size])
+    
+    def _unlink_evolution(self, parent_id: str, child_id: str):
+        """Split a child's subtree off into a tree of its own."""
+        child_parent, root_id, child_depth, child_size = self._evolution_node(child_id)
+        if child_parent != parent_id:
+            return
+        root_size = self._evolution_node(root_id)[3]
+        
+        self.conn.execute(
+            ANCESTORS + 'UPDATE evolution SET size = size - ? WHERE gist_id IN (SELECT id FROM ancestors)',
+            (parent_id, child_size)
+        )
+        self.conn.execute(
+            DESCENDANTS + 'UPDATE evolution SET root_id = ?, depth = depth - ? '
+            'WHERE gist_id IN (SELECT id FROM descendants)',
+            (child_id, child_id, child_depth)
+        )
+        self.conn.execute('UPDATE evolution SET parent_id = NULL WHERE gist_id = ?', (child_id,))
+        # Thoughts left on their own need no rows
+        self.conn.execute(
+            'DELETE FROM evolution WHERE gist_id IN (?, ?) AND parent_id IS NULL AND size = 1',
+            (parent_id, child_id)
+        )
+        self._update_chain_counters([root_size], [root_size - child_size, child_size])
+    
+    def _remove_evolution_node(self, gist_id: str):
+        """Drop a thought from its evolution tree; its children become roots of their own."""
+        parent_id = self._evolution_node(gist_id)[0]
+        if parent_id is not None:
+            self._unlink_evolution(parent_id, gist_id)
+        for child_id, in self.conn.execute(
+            'SELECT gist_id FROM evolution WHERE parent_id = ? ORDER BY rowid', (gist_id,)
+        ).fetchall():
+            self._unlink_evolution(gist_id, child_id)
+    
+    def _evolution_from_edges(self) -> EvolutionTracker:
+        """Evolution forest of the evolved_to edges, built from scratch."""
+        return EvolutionTracker.from_edges(self.conn.execute(
+            "SELECT from_gist, to_gist FROM relationships WHERE type = 'evolved_to' ORDER BY rowid"
+        ))
+    
+    def _rebuild_evolution(self, evolution: EvolutionTracker):
+        """Rewrite the evolution table from a tracker (caller commits)."""
+        self.conn.execute('DELETE FROM evolution')
+        self.conn.executemany(
+            'INSERT INTO evolution (gist_id, parent_id, root_id, depth, size) VALUES (?, ?, ?, ?, ?)',
+            (
+                (gist_id, evolution.parent.get(gist_id), evolution.root_of(gist_id),
+                 evolution.depth_of(gist_id), evolution.size_of(gist_id))
+                for gist_id in evolution.size
+            )
+        )
+    
+    def _evolution_root(self, gist_id: str) -> str:
+        """Root of a gist's evolution tree."""
+        return self._evolution_node(gist_id)[1]
+    
+    def _evolution_children(self, root_id: str) -> Dict[str, List[str]]:
+        """Children of every thought in an evolution tree, in the order they evolved."""
+        children: Dict[str, List[str]] = {}
+        for parent_id, child_id in self.conn.execute(
+            'SELECT r.from_gist, r.to_gist FROM evolution e JOIN relationships r '
+            "ON r.from_gist = e.parent_id AND r.to_gist = e.gist_id AND r.type = 'evolved_to' "
+            'WHERE e.root_id = ? ORDER BY r.rowid',
+            (root_id,)
+        ):
+            children.setdefault(parent_id, []).append(child_id)
+        return children
+    
+    def get_evolution_chain(self, gist_id: str) -> List[str]:
+        """Get the full evolution chain (tree) for a gist, root first, including all branches."""
+        root_id = self._evolution_root(gist_id)
+        children = self._evolution_children(root_id)
+        chain = []
+        stack = [root_id]
+        while stack:
+            current_id = stack.pop()
+            chain.append(current_id)
+            stack.extend(reversed(children.get(current_id, ())))
+        
+        return chain
+    
+    def get_lineage(self, gist_id: str) -> List[str]:
+        """Get the path from the evolution root down to a gist."""
+        lineage = [gist_id]
+        seen = {gist_id}
+        while True:
+            parent_id = self._evolution_node(lineage[-1])[0]
+            if parent_id is None or parent_id in seen:
+                break
+            seen.add(parent_id)
+            lineage.append(parent_id)
+        
+        return list(reversed(lineage))
+    
+    def get_evolution_tree(self, gist_id: str) -> Dict[str, Any]:
+        """Get the nested evolution tree containing a gist."""
+        root_id = self._evolution_root(gist_id)
+        children = self._evolution_children(root_id)
+        placed = {
+            node_id: (depth, size)
+            for node_id, depth, size in self.conn.execute(
+                'SELECT gist_id, depth, size FROM evolution WHERE root_id = ?', (root_id,)
+            )
+        }
+        
+        def node(node_id: str) -> Dict[str, Any]:
+            depth, size = placed.get(node_id, (0, 1))
+            return {'gist_id': node_id, 'depth': depth, 'size': size, 'children': []}
+        
+        tree = node(root_id)
+        stack = [tree]
+        while stack:
+            current = stack.pop()
+            for child_id in children.get(current['gist_id'], ()):
+                child = node(child_id)
+                current['children'].append(child)
+                stack.append(child)
+        
+        return tree
+    
+    def _evolution_roots(self) -> List[str]:
+        """Roots of the evolution trees with more than one thought."""
+        rows = self.conn.execute('SELECT gist_id FROM evolution WHERE parent_id IS NULL ORDER BY rowid')
+        return [row[0] for row in rows]
+    
+    def get_evolution_chains(self) -> List[List[str]]:
+        """Get all evolution chains in the network."""
+        return [self.get_evolution_chain(root_id) for root_id in self._evolution_roots()]
+    
+    def analyze(self, top: int = 10) -> Dict[str, Any]:
+        """Rank and cluster the network: PageRank, degrees, components, evolution roots.
+        
+        Needs NumPy; see ``analytics.analyze_network`` for the result layout.
+        """
+        graph = CSRGraph.from_edges(
+            [row[0] for row in self.conn.execute('SELECT gist_id FROM thoughts')],
+            self.conn.execute('SELECT from_gist, to_gist, type FROM relationships')
+        )
+        return analyze_network(graph, top)
+    
+    def find_similar(self, content: str, threshold: float = 0.9, limit: Optional[int] = None,
+                     exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Find thoughts whose content nearly matches a text.
+        
+        Returns ``(gist_id, similarity)`` pairs, most similar first, where
+        similarity is the estimated Jaccard similarity of their word shingles.
+        """
+        text_signature = signature(content)
+        if text_signature is None:
+            return []
+        
+        params = [
+            value for band, key in enumerate(band_keys(text_signature)) for value in (band, key)
+        ]
+        rows = self.conn.execute(
+            'SELECT gist_id, signature FROM minhash WHERE gist_id IN ('
+            'SELECT gist_id FROM minhash_bands WHERE '
+            + ' OR '.join(['(band = ? AND bucket = ?)'] * BANDS) + ')',
+            params
+        )
+        matches = rank_matches(
+            text_signature,
+            (
+                (gist_id, signature_from_bytes(data))
+                for gist_id, data in rows if gist_id != exclude
+            ),
+            threshold
+        )
+        return matches if limit is None else matches[:limit]
+    
+    def find_duplicates(self, threshold: float = 0.9) -> List[Tuple[str, str, float]]:
+        """Find pairs of indexed thoughts with nearly the same content."""
+        buckets = [
+            members.split('\x1f') for members, in self.conn.execute(
+                'SELECT group_concat(gist_id, char(31)) FROM minhash_bands '
+                'GROUP BY band, bucket HAVING COUNT(*) > 1'
+            )
+        ]
+        signatures: Dict[str, Any] = {}
+        
+        def signature_of(gist_id: str):
+            if gist_id not in signatures:
+                row = self.conn.execute(
+                    'SELECT signature FROM minhash WHERE gist_id = ?', (gist_id,)
+                ).fetchone()
+                signatures[gist_id] = signature_from_bytes(row[0])
+            return signatures[gist_id]
+        
+        return duplicate_pairs(buckets, signature_of, threshold)
+    
+    @property
+    def vector_index(self) -> VectorIndex:
+        """Related-thought index (needs NumPy), built in memory on first use.
+        
+        Writes through this connection keep it current; a commit by another
+        process changes ``PRAGMA data_version`` and the index is rebuilt.
+        """
+        data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if self._vector_index is None or data_version != self._vector_data_version:
+            self._vector_index = VectorIndex.build(
+                (gist_id, f"{intent or ''}\n{content or ''}")
+                for gist_id, intent, content in self.conn.execute(
+                    'SELECT t.gist_id, t.intent, b.content FROM thoughts t '
+                    'LEFT JOIN blobs b ON b.hash = t.content_hash'
+                )
+            )
+            self._vector_data_version = data_version
+        return self._vector_index
+    
+    def similar_thoughts(self, gist_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """The k thoughts whose intent and content read most like a given thought's.
+        
+        Unlike ``get_related_gists`` this needs no explicit links. Results
+        are ``{'gist', 'similarity'}`` dicts, most similar first.
+        """
+        similar = []
+        for other_id, score in self.vector_index.similar_to(gist_id, k):
+            row = self.conn.execute('SELECT data FROM thoughts WHERE gist_id = ?', (other_id,)).fetchone()
+            if row:
+                similar.append({'gist': json.loads(row[0]), 'similarity': score})
+        return similar
+    
+    def search_thoughts(self, query: str, fields: List[str] = None, mode: str = 'newest',
+                        limit: Optional[int] = None, prefix: bool = True) -> List[Dict[str, Any]]:
+        """Search thoughts by content.
+
+        Modes: 'newest' (index match, newest first), 'ranked' (BM25 relevance)
+        and 'substring' (case-insensitive substring scan of every thought).
+        """
+        if mode not in ('newest', 'ranked', 'substring'):
+            raise ValueError(f"Unsupported search mode: {mode}")
+        if mode == 'substring' or not self.has_fts:
+            return self._substring_search(query, fields, limit)
+        
+        columns = [
+            field for field in (fields or TextIndex.FIELD_WEIGHTS)
+            if field in TextIndex.FIELD_WEIGHTS
+        ]
+        terms = tokenize(query)
+        if not columns or not terms:
+            return []
+        
+        star = '*' if prefix else ''
+        match = '{%s} : %s' % (' '.join(columns), ' '.join(f'"{term}"{star}' for term in terms))
+        weights = ', '.join(str(weight) for weight in TextIndex.FIELD_WEIGHTS.values())
+        order = f'bm25(thoughts_fts, {weights})' if mode == 'ranked' else 't.timestamp DESC'
+        
+        rows = self.conn.execute(
+            'SELECT t.data FROM thoughts_fts JOIN thoughts t ON t.rowid = thoughts_fts.rowid '
+            f'WHERE thoughts_fts MATCH ? ORDER BY {order} LIMIT ?',
+            (match, -1 if limit is None else limit)
+        )
+        
+        return [json.loads(row[0]) for row in rows]
+    
+    def _substring_search(self, query: str, fields: Optional[List[str]] = None,
+                          limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search thoughts by substring, scanning every thought."""
+        if fields is None:
+            fields = ['intent', 'content', 'origin_hydra']
+        
+        columns = [field for field in fields if field in ('intent', 'content', 'origin_hydra')]
+        if not columns:
+            return []
+        
+        where = ' OR '.join(f'instr(lower({column}), ?) > 0' for column in columns)
+        rows = self.conn.execute(
+            f'SELECT data FROM thought_texts WHERE {where} ORDER BY timestamp DESC LIMIT ?',
+            [query.lower()] * len(columns) + [-1 if limit is None else limit]
+        )
+        
+        return [json.loads(row[0]) for row in rows]
+    
+    @staticmethod
+    def _count_status(status_counts: Dict[str, int], status: Optional[str], delta: int):
+        """Adjust the count of one status, dropping statuses that reach zero."""
+        status = status or 'unknown'
+        status_counts[status] = status_counts.get(status, 0) + delta
+        if not status_counts[status]:
+            del status_counts[status]
+    
+    def _update_chain_counters(self, before: List[int], after: List[int]):
+        """Apply the change in chain counts when trees of some sizes become others."""
+        before = [size for size in before if size > 1]
+        after = [size for size in after if size > 1]
+        self._set_metadata({
+            'evolution_chains': self._get_metadata('evolution_chains') - len(before) + len(after),
+            'total_chain_length': self._get_metadata('total_chain_length') - sum(before) + sum(after)
+        })
+    
+    def _count_stats(self, evolution: Optional[EvolutionTracker] = None) -> Dict[str, Any]:
+        """Compute the statistics counters from scratch.
+        
+        Chains are counted from the relationships, not the evolution table.
+        """
+        status_counts = {
+            status or 'unknown': count
+            for status, count in self.conn.execute(
+                'SELECT status, COUNT(*) FROM thoughts GROUP BY status'
+            )
+        }
+        
+        # Count semantic links (excluding evolution relationships)
+        semantic_edges = self.conn.execute(
+            "SELECT COUNT(*) FROM relationships WHERE type NOT LIKE 'evolved\\_%' ESCAPE '\\'"
+        ).fetchone()[0]
+        
+        if evolution is None:
+            evolution = self._evolution_from_edges()
+        
+        return {
+            'status_breakdown': status_counts,
+            'semantic_edges': semantic_edges,
+            'evolution_chains': evolution.chain_count,
+            'total_chain_length': evolution.total_chain_length
+        }
+    
+    def _stat_counters(self) -> Dict[str, Any]:
+        """Maintained statistics counters, as stored in the metadata table."""
+        return {
+            counter: self._get_metadata(counter)
+            for counter in ('status_breakdown', 'semantic_edges', 'evolution_chains', 'total_chain_length')
+        }
+    
+    def stat_counters(self) -> Dict[str, Any]:
+        """The raw counters behind ``get_network_stats``, for summing across shards."""
+        return self._stat_counters()
+    
+    def get_network_stats(self) -> Dict[str, Any]:
+        """Get network statistics from the counters maintained on every mutation."""
+        counters = self._stat_counters()
+        return summarize_network(
+            counters['status_breakdown'], counters['semantic_edges'],
+            counters['evolution_chains'], counters['total_chain_length']
+        )
+    
+    def verify_network_stats(self) -> Dict[str, Tuple[Any, Any]]:
+        """Recompute the statistics counters from scratch and repair any drift."""
+        self._begin()
+        maintained = self._stat_counters()
+        evolution = self._evolution_from_edges()
+        recomputed = self._count_stats(evolution)
+        drift = {
+            counter: (maintained[counter], value)
+            for counter, value in recomputed.items()
+            if maintained[counter] != value
+        }
+        
+        if drift:
+            self._set_metadata(recomputed)
+            self._rebuild_evolution(evolution)
+            self._commit()
+        elif not self._batch_depth:
+            self.conn.commit()
+        
+        return drift
+    
+    def to_index(self) -> Dict[str, Any]:
+        """Materialize the database in the index.json layout, contents inlined."""
+        thoughts = {}
+        for data, content in self.conn.execute('SELECT data, content FROM thought_texts'):
+            record = json.loads(data)
+            record.pop('content_hash', None)
+            record['content'] = content or ''
+            thoughts[record['gist_id']] = record
+        
+        relationships: Dict[str, List[Dict[str, Any]]] = {}
+        for from_gist, to_gist, relationship_type, created_at in self.conn.execute(
+            'SELECT from_gist, to_gist, type, created_at FROM relationships ORDER BY rowid'
+        ):
+            relationships.setdefault(from_gist, []).append({
+                'to': to_gist,
+                'type': relationship_type,
+                'created_at': created_at
+            })
+        
+        return {
+            'thoughts': thoughts,
+            'relationships': relationships,
+            'metadata': self._index_metadata()
+        }
+    
+    def _index_metadata(self) -> Dict[str, Any]:
+        """Metadata in the index.json layout."""
+        metadata = {
+            key: json.loads(value)
+            for key, value in self.conn.execute('SELECT key, value FROM metadata')
+        }
+        metadata['total_thoughts'] = self.conn.execute('SELECT COUNT(*) FROM thoughts').fetchone()[0]
+        return metadata
+    
+    def export_network(self, format_type: str = 'json') -> str:
+        """Export the entire network in various formats."""
+        out = io.StringIO()
+        self.export_stream(out, format_type)
+        return out.getvalue()
+    
+    def _adjacent(self, gist_id: str) -> Iterable[Tuple[str, str]]:
+        """``(other_id, relationship_type)`` for edges leaving or entering a gist."""
+        return self.conn.execute(
+            'SELECT to_gist, type FROM relationships WHERE from_gist = ? '
+            'UNION ALL SELECT from_gist, type FROM relationships WHERE to_gist = ?',
+            (gist_id, gist_id)
+        ).fetchall()
+    
+    def export_stream(self, out: TextIO, format_type: str = 'json', around: Optional[str] = None,
+                      hops: int = 1, relationship_types: Optional[List[str]] = None,
+                      statuses: Optional[List[str]] = None):
+        """Write the network, or the k-hop neighbourhood of one gist, to a text stream.
+        
+        Rows are streamed from the database as they are written, so the
+        export never holds the whole network in memory.
+        """
+        types = set(relationship_types) if relationship_types else None
+        
+        def accept(gist_id: str) -> bool:
+            row = self.conn.execute('SELECT status FROM thoughts WHERE gist_id = ?', (gist_id,)).fetchone()
+            return row is not None and (not statuses or row[0] in statuses)
+        
+        selected: Optional[List[str]] = None
+        if around is not None:
+            if not self.conn.execute('SELECT 1 FROM thoughts WHERE gist_id = ?', (around,)).fetchone():
+                raise ValueError(f"Gist {around} not found in index")
+            selected = k_hop(around, hops, self._adjacent, accept, types)
+        
+        members: Optional[Set[str]] = None
+        if selected is not None:
+            members = set(selected)
+        elif statuses:
+            placeholders = ', '.join('?' * len(statuses))
+            members = {
+                row[0] for row in self.conn.execute(
+                    f'SELECT gist_id FROM thoughts WHERE status IN ({placeholders})', statuses
+                )
+            }
+        
+        with_content = format_type in ('json', 'ndjson')
+        thought_query = (
+            'SELECT t.gist_id, t.data, b.content FROM thoughts t '
+            'LEFT JOIN blobs b ON b.hash = t.content_hash'
+        )
+        
+        def thought_rows() -> Iterator[Tuple[str, str, Optional[str]]]:
+            if selected is not None:
+                for gist_id in selected:
+                    yield self.conn.execute(thought_query + ' WHERE t.gist_id = ?', (gist_id,)).fetchone()
+            elif statuses:
+                placeholders = ', '.join('?' * len(statuses))
+                yield from self.conn.execute(thought_query + f' WHERE t.status IN ({placeholders})', statuses)
+            else:
+                yield from self.conn.execute(thought_query)
+        
+        def thought_records() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            for gist_id, data, content in thought_rows():
+                record = json.loads(data)
+                if with_content:
+                    record.pop('content_hash', None)
+                    record['content'] = content or ''
+                yield gist_id, record
+        
+        def edge_lists() -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+            rows = self.conn.execute(
+                'SELECT from_gist, to_gist, type, created_at FROM relationships ORDER BY from_gist, rowid'
+            )
+            for from_gist, group in groupby(rows, key=lambda row: row[0]):
+                if members is not None and from_gist not in members:
+                    continue
+                yield from_gist, [
+                    {'to': to_gist, 'type': relationship_type, 'created_at': created_at}
+                    for _, to_gist, relationship_type, created_at in group
+                    if (members is None or to_gist in members)
+                    and (types is None or relationship_type in types)
+                ]
+        
+        write_network(out, format_type, thought_records(), edge_lists(), self._index_metadata())
+    
+    def import_index(self, index: Dict[str, Any]):
+        """Bulk load thoughts and relationships from an index.json document."""
+        with self.conn:
+            for gist_id, gist_data in index.get('thoughts', {}).items():
+                self._write_thought(dict(gist_data, gist_id=gist_id))
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO relationships (from_gist, to_gist, type, created_at) '
+                'VALUES (?, ?, ?, ?)',
+                (
+                    (from_gist, rel['to'], rel['type'], rel.get('created_at'))
+                    for from_gist, rels in index.get('relationships', {}).items()
+                    for rel in rels
+                )
+            )
+            
+            metadata = dict(index.get('metadata', {}))
+            metadata.pop('total_thoughts', None)
+            self._set_metadata(metadata)
+            self._rebuild_evolution(self._evolution_from_edges())
+            
+            # Counters in the imported metadata may not match this database
+            self._set_metadata(self._count_stats())
+    
+    @classmethod
+    def migrate_from_json(cls, index_file: Path, db_file: Path) -> 'SQLiteIndexManager':
+        """One-shot migration of an index.json (plus journal) into a SQLite index."""
+        manager = cls(db_file)
+        # Journaled mode only reads index.journal instead of folding it into index.json
+        manager.import_index(IndexManager(index_file, journaled=True).to_index())
+        return manager
+    
+    def prune_blobs(self) -> int:
+        """Delete stored contents no thought refers to; returns how many were removed."""
+        with self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM blobs WHERE hash NOT IN '
+                '(SELECT content_hash FROM thoughts WHERE content_hash IS NOT NULL)'
+            )
+        return cursor.rowcount
+    
+    def storage_stats(self) -> Dict[str, int]:
+        """Sizes of the stored thought bodies.
+        
+        Bodies stay whole in the blobs table because the full-text index and
+        the thought_texts view read them directly, so nothing is delta encoded.
+        """
+        blobs, stored_bytes = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(length(CAST(content AS BLOB))), 0) FROM blobs'
+        ).fetchone()
+        return {
+            'blobs': blobs,
+            'delta_blobs': 0,
+            'stored_bytes': stored_bytes,
+            'content_bytes': stored_bytes,
+            'saved_bytes': 0
+        }
+    
+    def backup_index(self, backup_path: Path):
+        """Create a backup of the current index in index.json format."""
+        backup_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(backup_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_index(), f, indent=2, ensure_ascii=False)
+    
+    def restore_index(self, backup_path: Path):
+        """Restore index from an index.json backup."""
+        if not backup_path.exists():
+            raise FileNotFoundError(f"Backup file not found: {backup_path}")
+        
+        with open(backup_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        
+        with self.conn:
+            self.conn.execute('DELETE FROM thoughts')
+            self.conn.execute('DELETE FROM relationships')
+        self._vector_index = None
+        self.import_index(index)
@@ -0,0 +1,226 @@
+"""
+Inverted full-text index over thought fields.
+"""
+
+import bisect
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from journal import atomic_write
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class TextIndex:
+    """Incrementally maintained inverted index with per-field postings.
+
+    Each document keeps a forward map ``{field: {token: tf}}`` so it can be
+    removed or replaced without re-reading its old text. Postings map
+    ``field -> token -> {doc_id: tf}``, and a sorted vocabulary serves prefix
+    lookups. Ranking uses BM25 summed over fields with per-field weights.
+    """
+    
+    VERSION = 1
+    FIELD_WEIGHTS = {'intent': 2.0, 'content': 1.0, 'origin_hydra': 0.5}
+    K1 = 1.2
+    B = 0.75
+    
+    def __init__(self):
+        """Initialize an empty index."""
+        self.docs: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.postings: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.field_lengths: Dict[str, int] = {}
+        self.doc_lengths: Dict[str, Dict[str, int]] = {}
+        self.vocabulary: List[str] = []
+        self._token_refs: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self.docs)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        """Check whether a document is indexed."""
+        return doc_id in self.docs
+    
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, Dict[str, str]]]) -> 'TextIndex':
+        """Build an index from ``(doc_id, fields)`` pairs in one pass."""
+        text_index = cls()
+        for doc_id, fields in documents:
+            text_index._insert(doc_id, cls._analyze(fields), update_vocabulary=False)
+        text_index.vocabulary = sorted(text_index._token_refs)
+        return text_index
+    
+    @staticmethod
+    def _analyze(fields: Dict[str, str]) -> Dict[str, Dict[str, int]]:
+        """Turn field texts into per-field token counts."""
+        doc = {}
+        for field, text in fields.items():
+            counts: Dict[str, int] = {}
+            for token in tokenize(str(text or '')):
+                counts[token] = counts.get(token, 0) + 1
+            if counts:
+                doc[field] = counts
+        return doc
+    
+    def add(self, doc_id: str, fields: Dict[str, str]):
+        """Index (or re-index) a document from its field texts."""
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        
+        self._insert(doc_id, self._analyze(fields))
+    
+    def _insert(self, doc_id: str, doc: Dict[str, Dict[str, int]], update_vocabulary: bool = True):
+        """Add a tokenized document to the postings."""
+        self.docs[doc_id] = doc
+        
+        for field, counts in doc.items():
+            field_postings = self.postings.setdefault(field, {})
+            length = sum(counts.values())
+            self.field_lengths[field] = self.field_lengths.get(field, 0) + length
+            self.doc_lengths.setdefault(field, {})[doc_id] = length
+            
+            for token, tf in counts.items():
+                field_postings.setdefault(token, {})[doc_id] = tf
+                
+                refs = self._token_refs.get(token, 0)
+                if not refs and update_vocabulary:
+                    bisect.insort(self.vocabulary, token)
+                self._token_refs[token] = refs + 1
+    
+    def remove(self, doc_id: str):
+        """Drop a document from the index."""
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        
+        for field, counts in doc.items():
+            field_postings = self.postings[field]
+            self.field_lengths[field] -= self.doc_lengths[field].pop(doc_id)
+            
+            for token in counts:
+                postings = field_postings[token]
+                del postings[doc_id]
+                if not postings:
+                    del field_postings[token]
+                
+                self._token_refs[token] -= 1
+                if not self._token_refs[token]:
+                    del self._token_refs[token]
+                    position = bisect.bisect_left(self.vocabulary, token)
+                    del self.vocabulary[position]
+    
+    def expand(self, term: str, prefix: bool = True) -> List[str]:
+        """Vocabulary tokens matching a query term (by prefix if requested)."""
+        if not prefix:
+            return [term] if term in self._token_refs else []
+        
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + '\U0010ffff')
+        return self.vocabulary[start:end]
+    
+    def search(self, query: str, fields: Optional[List[str]] = None,
+               prefix: bool = True) -> Dict[str, float]:
+        """Return BM25 scores of documents matching every query term."""
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        
+        fields = fields or list(self.FIELD_WEIGHTS)
+        total_docs = len(self.docs)
+        scores: Optional[Dict[str, float]] = None
+        
+        for term in terms:
+            term_scores: Dict[str, float] = {}
+            
+            for token in self.expand(term, prefix):
+                for field in fields:
+                    postings = self.postings.get(field, {}).get(token)
+                    if not postings:
+                        continue
+                    
+                    weight = self.FIELD_WEIGHTS.get(field, 1.0)
+                    lengths = self.doc_lengths[field]
+                    avg_length = self.field_lengths[field] / total_docs
+                    idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    
+                    for doc_id, tf in postings.items():
+                        norm = tf + self.K1 * (1 - self.B + self.B * lengths[doc_id] / avg_length)
+                        term_scores[doc_id] = (
+                            term_scores.get(doc_id, 0.0)
+                            + weight * idf * tf * (self.K1 + 1) / norm
+                        )
+            
+            # Every query term has to match somewhere in the document
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    doc_id: score + term_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in term_scores
+                }
+            if not scores:
+                return {}
+        
+        return scores
+    
+    def matches(self, query: str, fields: Optional[List[str]] = None,
+                prefix: bool = True) -> Set[str]:
+        """Return ids of documents matching every query term, unscored."""
+        terms = tokenize(query)
+        if not terms:
+            return set()
+        
+        fields = fields or list(self.FIELD_WEIGHTS)
+        matched: Optional[Set[str]] = None
+        
+        for term in terms:
+            term_docs: Set[str] = set()
+            for token in self.expand(term, prefix):
+                for field in fields:
+                    term_docs.update(self.postings.get(field, {}).get(token, ()))
+            
+            matched = term_docs if matched is None else matched & term_docs
+            if not matched:
+                return set()
+        
+        return matched
+    
+    def save(self, path: Path, snapshot_id: Optional[str]):
+        """Persist the forward index, stamped with the index snapshot it matches."""
+        atomic_write(path, json.dumps({
+            'version': self.VERSION,
+            'snapshot_id': snapshot_id,
+            'docs': self.docs
+        }, separators=(',', ':'), ensure_ascii=False))
+    
+    @classmethod
+    def load(cls, path: Path, snapshot_id: Optional[str]) -> Optional['TextIndex']:
+        """Load a persisted index if it matches the given snapshot."""
+        if not snapshot_id or not path.exists():
+            return None
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (ValueError, IOError):
+            return None
+        
+        if data.get('version') != cls.VERSION or data.get('snapshot_id') != snapshot_id:
+            return None
+        
+        text_index = cls()
+        for doc_id, doc in data['docs'].items():
+            text_index._insert(doc_id, doc, update_vocabulary=False)
+        text_index.vocabulary = sorted(text_index._token_refs)
+        return text_index
@@ -0,0 +1,187 @@
+"""
+Hashed TF-IDF vectors for finding related thoughts.
+"""
+
+import hashlib
+import io
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Related-thought lookups are optional; the rest of gistghost runs without NumPy
+    np = None
+
+from journal import atomic_write
+from text_index import tokenize
+
+
+# Width of the hashed term vectors; each thought costs DIMENSIONS * 4 bytes
+DIMENSIONS = 1024
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token: str) -> int:
+    """Vector position of a token (stable across processes, unlike ``hash``)."""
+    digest = hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'big') % DIMENSIONS
+
+
+def term_vector(text: str) -> Optional['np.ndarray']:
+    """Unit-length vector of sublinear term frequencies, or None if the text has no words."""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    
+    counts = np.bincount([_bucket(token) for token in tokens], minlength=DIMENSIONS)
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    present = counts > 0
+    vector[present] = 1.0 + np.log(counts[present])
+    return vector / np.linalg.norm(vector)
+
+
+class VectorIndex:
+    """Hashed TF-IDF index answering "which thoughts read like this one?".
+
+    Each thought is a row of a float32 matrix holding its normalised term
+    frequencies, with terms hashed into ``DIMENSIONS`` columns. IDF weights
+    only the query, as in BM25, so adding a thought never re-weights stored
+    rows, and top-k is one matrix-vector product over the whole network.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self):
+        """Initialize an empty index (needs NumPy)."""
+        if np is None:
+            raise ImportError("Related-thought lookups need NumPy: pip install numpy")
+        
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.matrix = np.zeros((0, DIMENSIONS), dtype=np.float32)
+        self.document_frequency = np.zeros(DIMENSIONS, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self.ids)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        """Check whether a document is indexed."""
+        return doc_id in self.rows
+    
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str]]) -> 'VectorIndex':
+        """Build an index from ``(doc_id, text)`` pairs."""
+        vector_index = cls()
+        for doc_id, text in documents:
+            vector_index.add(doc_id, text)
+        return vector_index
+    
+    def add(self, doc_id: str, text: str):
+        """Index (or re-index) a document; texts without words are skipped."""
+        self.remove(doc_id)
+        
+        vector = term_vector(text)
+        if vector is not None:
+            self._insert(doc_id, vector)
+    
+    def _insert(self, doc_id: str, vector: 'np.ndarray'):
+        """Append a row, growing the matrix by doubling."""
+        row = len(self.ids)
+        if row == len(self.matrix):
+            grown = np.zeros((max(16, 2 * row), DIMENSIONS), dtype=np.float32)
+            grown[:row] = self.matrix
+            self.matrix = grown
+        
+        self.matrix[row] = vector
+        self.ids.append(doc_id)
+        self.rows[doc_id] = row
+        self.document_frequency += vector > 0
+    
+    def remove(self, doc_id: str):
+        """Drop a document, moving the last row into its place."""
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return
+        
+        self.document_frequency -= self.matrix[row] > 0
+        last = len(self.ids) - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+    
+    def idf(self) -> 'np.ndarray':
+        """Smoothed inverse document frequency of every column."""
+        return np.log((1.0 + len(self.ids)) / (1.0 + self.document_frequency)) + 1.0
+    
+    def similar(self, text: str, k: int = 10,
+                exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Documents most similar to a text, as ``(doc_id, cosine similarity)``."""
+        vector = term_vector(text)
+        if vector is None:
+            return []
+        return self._top(vector, k, exclude)
+    
+    def similar_to(self, doc_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Documents most similar to an indexed one, itself excluded."""
+        row = self.rows.get(doc_id)
+        if row is None:
+            return []
+        return self._top(self.matrix[row].copy(), k, doc_id)
+    
+    def _top(self, vector: 'np.ndarray', k: int, exclude: Optional[str]) -> List[Tuple[str, float]]:
+        """Score every row against an IDF-weighted query and keep the best k."""
+        query = vector * self.idf().astype(np.float32)
+        query /= np.linalg.norm(query)
+        
+        scores = self.matrix[:len(self.ids)] @ query
+        if exclude in self.rows:
+            scores[self.rows[exclude]] = 0.0
+        
+        count = min(k, len(scores))
+        if count <= 0:
+            return []
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.lexsort((best, -scores[best]))]
+        return [(self.ids[row], float(scores[row])) for row in best if scores[row] > 0]
+    
+    def save(self, path: Path, snapshot_id: Optional[str]):
+        """Persist the vectors, stamped with the index snapshot they match."""
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            header=np.array(json.dumps({'version': self.VERSION, 'snapshot_id': snapshot_id})),
+            ids=np.array(self.ids, dtype=str),
+            matrix=self.matrix[:len(self.ids)]
+        )
+        atomic_write(path, buffer.getvalue())
+    
+    @classmethod
+    def load(cls, path: Path, snapshot_id: Optional[str]) -> Optional['VectorIndex']:
+        """Load persisted vectors if they match the given snapshot."""
+        if np is None or not snapshot_id or not path.exists():
+            return None
+        
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data['header']))
+                ids = data['ids'].tolist()
+                matrix = data['matrix']
+        except (ValueError, IOError, KeyError):
+            return None
+        
+        if header.get('version') != cls.VERSION or header.get('snapshot_id') != snapshot_id:
+            return None
+        if matrix.shape != (len(ids), DIMENSIONS):
+            return None
+        
+        vector_index = cls()
+        vector_index.ids = ids
+        vector_index.rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        vector_index.matrix = matrix.astype(np.float32, copy=False)
+        vector_index.document_frequency = (matrix > 0).sum(axis=0)
+        return vector_index
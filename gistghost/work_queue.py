@@ -0,0 +1,265 @@
+"""
+Priority queue of new thoughts, leased out to worker processes.
+"""
+
+import heapq
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from journal import atomic_write, file_lock
+
+
+# Seconds a worker may hold a thought before it is handed to another one
+DEFAULT_LEASE_SECONDS = 300
+
+# Thoughts fetched per page when rebuilding the heap
+PAGE_SIZE = 1000
+
+# Returned-to-queue events kept for other processes to replay into their heaps
+RETURNED_LOG_SIZE = 1024
+
+# Statuses a worker may finish a thought with; giving it back goes through release
+FINAL_STATUSES = ['complete', 'evolving']
+
+HeapEntry = Tuple[int, str, str]
+
+
+def _entry(record: Dict[str, Any]) -> HeapEntry:
+    """Heap order of a thought: highest priority first, then oldest first."""
+    return -record.get('priority', 5), record.get('timestamp') or '', record['gist_id']
+
+
+class WorkQueue:
+    """Leases ``new`` thoughts to workers, highest priority and oldest first.
+
+    Taking a lease moves the thought to ``processing`` in the index and
+    records who holds it until when. A worker finishes with ``complete`` (or
+    gives the thought back with ``release``), passing the lease token it got.
+    Leases that run out are reclaimed: the thought goes back to ``new`` and
+    the stale token stops working, so a slow worker can't finish a thought
+    someone else has taken over.
+
+    Leases live in ``queue.json``, and every operation holds ``queue.lock``,
+    so any number of local processes can share one queue. Each process
+    keeps its own heap and rebuilds it from the index only when something
+    other than the queue wrote to the index. To tell, the queue remembers
+    the index revision its last write produced and the revision its unbroken
+    run of writes started at. Thoughts returned to the queue are logged, so
+    other processes push them back onto their heaps without a rebuild.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, index_manager: Any, state_dir: Path,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """Attach a queue to an index; its leases live in ``state_dir``."""
+        self.index_manager = index_manager
+        self.state_file = state_dir / 'queue.json'
+        self.lock_file = state_dir / 'queue.lock'
+        self.lease_seconds = lease_seconds
+        
+        self._heap: Optional[List[HeapEntry]] = None
+        self._heap_revision = -1
+        self._heap_seq = 0
+    
+    def _load_state(self) -> Dict[str, Any]:
+        """Read the shared queue state."""
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == self.VERSION:
+                return state
+        
+        return {'version': self.VERSION, 'base': -1, 'revision': -1, 'seq': 0, 'returned': [], 'leases': {}}
+    
+    def _save_state(self, state: Dict[str, Any]):
+        """Persist the shared queue state."""
+        atomic_write(self.state_file, json.dumps(state, separators=(',', ':')))
+    
+    def _current_revision(self) -> int:
+        """Index revision, after picking up writes by other processes."""
+        self.index_manager.refresh()
+        return self.index_manager.revision
+    
+    def _sync_heap(self, state: Dict[str, Any]):
+        """Bring this process's heap up to date with the index and the queue state."""
+        revision = self._current_revision()
+        if revision != state['revision']:
+            # Someone else wrote to the index: the run of queue writes is broken
+            state['base'] = state['revision'] = revision
+        
+        oldest_logged = state['returned'][0][0] if state['returned'] else state['seq'] + 1
+        fresh = (
+            self._heap is not None
+            and state['base'] <= self._heap_revision <= state['revision']
+            and self._heap_seq + 1 >= oldest_logged
+        )
+        if not fresh:
+            self._rebuild_heap()
+            self._heap_seq = state['seq']
+        else:
+            for seq, gist_id in state['returned']:
+                if seq > self._heap_seq:
+                    record = self.index_manager.get_record(gist_id)
+                    if record is not None:
+                        heapq.heappush(self._heap, _entry(record))
+            self._heap_seq = state['seq']
+        self._heap_revision = revision
+    
+    def _rebuild_heap(self):
+        """Collect every ``new`` thought of the index into a fresh heap."""
+        heap = []
+        cursor = None
+        while True:
+            page = self.index_manager.query_gists(status='new', limit=PAGE_SIZE, cursor=cursor)
+            heap.extend(_entry(record) for record in page['thoughts'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        heapq.heapify(heap)
+        self._heap = heap
+    
+    def _set_status(self, state: Dict[str, Any], gist_id: str, status: str) -> bool:
+        """Change a thought's status, keeping the queue's run of index writes unbroken."""
+        gist = self.index_manager.get_gist(gist_id)
+        if gist is None:
+            return False
+        
+        # Assigned directly: update_status would reset the timestamp, and with it the thought's age
+        gist.status = status
+        self.index_manager.update_gist(gist)
+        
+        revision = self._current_revision()
+        if revision != state['revision'] + 1:
+            # Another process wrote meanwhile; its change is in this revision too
+            state['base'] = revision
+        state['revision'] = revision
+        if self._heap_revision == revision - 1:
+            self._heap_revision = revision
+        return True
+    
+    def _return(self, state: Dict[str, Any], gist_id: str):
+        """Put a leased thought back to ``new`` and log it for the other processes' heaps."""
+        if self._set_status(state, gist_id, 'new'):
+            state['seq'] += 1
+            state['returned'].append([state['seq'], gist_id])
+            del state['returned'][:-RETURNED_LOG_SIZE]
+    
+    def _reclaim(self, state: Dict[str, Any], now: float) -> List[str]:
+        """Return thoughts whose lease ran out to the queue."""
+        expired = [
+            gist_id for gist_id, lease in state['leases'].items() if lease['expires'] <= now
+        ]
+        for gist_id in expired:
+            del state['leases'][gist_id]
+            record = self.index_manager.get_record(gist_id)
+            if record is not None and record.get('status') == 'processing':
+                self._return(state, gist_id)
+        return expired
+    
+    def lease(self, worker: Optional[str] = None,
+              seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Take the next thought, moving it to ``processing``; None if the queue is empty.
+
+        Returns ``{'gist_id', 'token', 'worker', 'expires'}``; pass the token
+        back to ``renew``, ``complete`` or ``release``.
+        """
+        seconds = self.lease_seconds if seconds is None else seconds
+        
+        with file_lock(self.lock_file):
+            state = self._load_state()
+            now = time.time()
+            self._sync_heap(state)
+            self._reclaim(state, now)
+            self._sync_heap(state)
+            
+            leased = None
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                gist_id = entry[2]
+                record = self.index_manager.get_record(gist_id)
+                # Entries go stale when a thought is leased, edited or removed
+                if record is None or record.get('status') != 'new' or _entry(record) != entry:
+                    continue
+                if gist_id in state['leases']:
+                    continue
+                
+                if self._set_status(state, gist_id, 'processing'):
+                    leased = {
+                        'gist_id': gist_id,
+                        'token': uuid.uuid4().hex,
+                        'worker': worker,
+                        'expires': now + seconds
+                    }
+                    state['leases'][gist_id] = leased
+                    break
+            
+            self._save_state(state)
+            return leased
+    
+    def _holding(self, state: Dict[str, Any], gist_id: str, token: str) -> bool:
+        """Whether a token still holds an unexpired lease on a thought."""
+        lease = state['leases'].get(gist_id)
+        return lease is not None and lease['token'] == token and lease['expires'] > time.time()
+    
+    def renew(self, gist_id: str, token: str, seconds: Optional[float] = None) -> bool:
+        """Extend a lease still held; False if it already ran out or was taken over."""
+        seconds = self.lease_seconds if seconds is None else seconds
+        
+        with file_lock(self.lock_file):
+            state = self._load_state()
+            if not self._holding(state, gist_id, token):
+                return False
+            state['leases'][gist_id]['expires'] = time.time() + seconds
+            self._save_state(state)
+            return True
+    
+    def complete(self, gist_id: str, token: str, status: str = 'complete') -> bool:
+        """Finish a leased thought, setting its final status; False if the lease was lost."""
+        if status not in FINAL_STATUSES:
+            raise ValueError(f"Invalid final status. Must be one of: {FINAL_STATUSES}")
+        
+        with file_lock(self.lock_file):
+            state = self._load_state()
+            if not self._holding(state, gist_id, token):
+                return False
+            del state['leases'][gist_id]
+            self._sync_heap(state)
+            self._set_status(state, gist_id, status)
+            self._save_state(state)
+            return True
+    
+    def release(self, gist_id: str, token: str) -> bool:
+        """Give a leased thought back to the queue unprocessed; False if the lease was lost."""
+        with file_lock(self.lock_file):
+            state = self._load_state()
+            if not self._holding(state, gist_id, token):
+                return False
+            del state['leases'][gist_id]
+            self._sync_heap(state)
+            self._return(state, gist_id)
+            self._save_state(state)
+            return True
+    
+    def reclaim(self) -> List[str]:
+        """Return every thought whose lease ran out to the queue; returns their ids."""
+        with file_lock(self.lock_file):
+            state = self._load_state()
+            self._sync_heap(state)
+            expired = self._reclaim(state, time.time())
+            self._save_state(state)
+            return expired
+    
+    def stats(self) -> Dict[str, int]:
+        """Number of thoughts waiting and leased out."""
+        with file_lock(self.lock_file):
+            state = self._load_state()
+            self._sync_heap(state)
+            waiting = {
+                entry[2] for entry in self._heap
+                if (self.index_manager.get_record(entry[2]) or {}).get('status') == 'new'
+            }
+            return {'queued': len(waiting), 'leased': len(state['leases'])}
@@ -0,0 +1,164 @@
+"""
+In-process stand-in for the GitHub gists API, with rate-limit headers.
+"""
+
+import hashlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGitHub:
+    """Serves ``/gists`` from memory on a local port.
+
+    With ``limit`` set, every response carries ``X-RateLimit-*`` headers and
+    requests past the quota get a ``403`` until the window resets, every
+    ``reset_in`` seconds. Responses queued in ``fail_next`` as ``(status,
+    headers)`` are sent instead of the next answers.
+    """
+    
+    def __init__(self, limit=None, reset_in=60):
+        self.limit = limit
+        self.remaining = limit
+        self.reset_in = reset_in
+        self.reset_at = time.time() + reset_in
+        self.store = {}
+        self.calls = []
+        self.fail_next = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def statuses(self):
+        """Status codes sent so far, in order."""
+        return [status for _, _, status in self.calls]
+    
+    def _rate_limit_headers(self):
+        """Spend one request of the quota; returns its headers and whether it was over."""
+        if self.limit is None:
+            return {}, False
+        if time.time() >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = time.time() + self.reset_in
+        
+        over = self.remaining <= 0
+        if not over:
+            self.remaining -= 1
+        return {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(int(self.reset_at) + 1)
+        }, over
+    
+    def _gist(self, gist_id):
+        gist = self.store[gist_id]
+        return {
+            'id': gist_id,
+            'html_url': f'https://gist.example/{gist_id}',
+            'git_pull_url': '',
+            'git_push_url': '',
+            'created_at': gist['created_at'],
+            'updated_at': gist['updated_at'],
+            'description': gist['description'],
+            'files': {
+                name: {'filename': name, 'content': file['content']}
+                for name, file in gist['files'].items()
+            }
+        }
+    
+    def _route(self, method, path, body):
+        parts = path.split('?')[0].strip('/').split('/')
+        if parts == ['user']:
+            return 200, {'login': 'tester'}
+        if parts == ['gists'] and method == 'POST':
+            gist_id = f'h{next(self._ids):04d}'
+            now = str(time.time())
+            self.store[gist_id] = {
+                'description': body['description'], 'files': dict(body['files']),
+                'created_at': now, 'updated_at': now
+            }
+            return 201, self._gist(gist_id)
+        if parts[0] != 'gists' or len(parts) != 2 or parts[1] not in self.store:
+            return 404, {'message': 'Not Found'}
+        
+        gist_id = parts[1]
+        if method == 'DELETE':
+            del self.store[gist_id]
+            return 204, None
+        if method == 'PATCH':
+            for name, file in body.get('files', {}).items():
+                if file is None:
+                    self.store[gist_id]['files'].pop(name, None)
+                else:
+                    self.store[gist_id]['files'][name] = file
+            self.store[gist_id]['updated_at'] = str(time.time())
+        return 200, self._gist(gist_id)
+    
+    def _handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, *args):
+                pass
+            
+            def _reply(self, status, body, headers):
+                data = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def _serve(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                with fake._lock:
+                    status, answer, headers = self._answer(method, body)
+                    fake.calls.append((method, self.path, status))
+                self._reply(status, answer, headers)
+            
+            def _answer(self, method, body):
+                if fake.fail_next:
+                    status, headers = fake.fail_next.pop(0)
+                    return status, {'message': 'You have exceeded a secondary rate limit'}, headers
+                
+                headers, over = fake._rate_limit_headers()
+                if over:
+                    return 403, {'message': 'API rate limit exceeded'}, headers
+                
+                status, answer = fake._route(method, self.path, body)
+                if method == 'GET' and status == 200:
+                    encoded = json.dumps(answer, sort_keys=True).encode('utf-8')
+                    digest = hashlib.sha256(encoded).hexdigest()
+                    headers['ETag'] = f'"{digest}"'
+                    if self.headers.get('If-None-Match') == headers['ETag']:
+                        return 304, None, headers
+                return status, answer, headers
+            
+            def do_GET(self):
+                self._serve('GET')
+            
+            def do_POST(self):
+                self._serve('POST')
+            
+            def do_PATCH(self):
+                self._serve('PATCH')
+            
+            def do_DELETE(self):
+                self._serve('DELETE')
+        
+        return Handler
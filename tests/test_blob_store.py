@@ -0,0 +1,94 @@
+"""
+Tests for the content-addressed blob store and its delta encoding.
+"""
+
+import pytest
+
+from blob_store import BlobStore, diff, patch
+
+
+def long_body(n, edit=''):
+    """A body large enough to be delta-encoded, with one variable sentence."""
+    return ''.join(f'Sentence {i} of the thought about topic {n}. ' for i in range(60)) + edit
+
+
+def test_identical_contents_share_one_blob(tmp_path):
+    store = BlobStore(tmp_path)
+    first = store.put('same body')
+    assert store.put('same body') == first
+    assert store.get(first) == 'same body'
+    assert store.stats()['blobs'] == 1
+
+
+def test_diff_and_patch_round_trip():
+    base = 'one two three four\nfive'
+    for content in ('one two 2.5 three four\nfive', '', 'brand new', base + ' six'):
+        assert patch(base, diff(base, content)) == content
+
+
+def test_evolution_is_stored_as_delta_and_rebuilt(tmp_path):
+    store = BlobStore(tmp_path)
+    base = store.put(long_body(1))
+    evolved = store.put(long_body(1, 'One more idea.'), base=base)
+    
+    assert store.delta_path_for(evolved).exists()
+    assert not store.path_for(evolved).exists()
+    assert BlobStore(tmp_path).get(evolved) == long_body(1, 'One more idea.')
+    assert store.stats()['saved_bytes'] > 0
+
+
+def test_chains_are_checkpointed(tmp_path):
+    store = BlobStore(tmp_path)
+    hashes = [store.put(long_body(1))]
+    for n in range(2 * BlobStore.CHECKPOINT_INTERVAL):
+        hashes.append(store.put(long_body(1, f'Edit {n}.'), base=hashes[-1]))
+    
+    full = [content_hash for content_hash in hashes if store.path_for(content_hash).exists()]
+    assert full == hashes[::BlobStore.CHECKPOINT_INTERVAL]
+    reopened = BlobStore(tmp_path)
+    assert reopened.get(hashes[-1]) == long_body(1, f'Edit {2 * BlobStore.CHECKPOINT_INTERVAL - 1}.')
+
+
+def test_small_or_unrelated_bodies_are_stored_in_full(tmp_path):
+    store = BlobStore(tmp_path)
+    base = store.put(long_body(1))
+    small = store.put('short', base=base)
+    unrelated = store.put(long_body(2).upper(), base=base)
+    assert store.path_for(small).exists()
+    assert store.path_for(unrelated).exists()
+
+
+def test_corrupt_delta_is_detected(tmp_path):
+    store = BlobStore(tmp_path)
+    base = store.put(long_body(1))
+    evolved = store.put(long_body(1, 'Extra.'), base=base)
+    
+    path = store.delta_path_for(evolved)
+    path.write_text(path.read_text(encoding='utf-8').replace('Extra.', 'Forged'), encoding='utf-8')
+    with pytest.raises(ValueError):
+        BlobStore(tmp_path).get(evolved)
+
+
+def test_prune_keeps_bases_of_referenced_deltas(tmp_path):
+    store = BlobStore(tmp_path)
+    base = store.put(long_body(1))
+    evolved = store.put(long_body(1, 'Extra.'), base=base)
+    orphan = store.put('nobody refers to this')
+    
+    assert store.prune({evolved}) == 1
+    assert orphan not in store
+    assert BlobStore(tmp_path).get(evolved) == long_body(1, 'Extra.')
+
+
+def test_newlines_are_stored_byte_for_byte(tmp_path):
+    store = BlobStore(tmp_path)
+    content = 'windows\r\nold mac\runix\nété '
+    content_hash = store.put(content)
+    assert store.path_for(content_hash).read_bytes() == content.encode('utf-8')
+    assert BlobStore(tmp_path).get(content_hash) == content
+    
+    base = store.put(long_body(1).replace('. ', '.\r\n'))
+    evolved_content = long_body(1, 'Extra.\r\n').replace('. ', '.\r\n')
+    evolved = store.put(evolved_content, base=base)
+    assert store.delta_path_for(evolved).exists()
+    assert BlobStore(tmp_path).get(evolved) == evolved_content
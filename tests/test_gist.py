@@ -0,0 +1,28 @@
+"""
+Tests for the Gist thought cell.
+"""
+
+from gist import Gist
+
+
+def test_content_is_loaded_once_on_first_access():
+    loads = []
+    
+    def loader():
+        loads.append(1)
+        return 'lazy body'
+    
+    gist = Gist(origin_hydra='test', intent='idea', content_loader=loader)
+    assert loads == []
+    assert gist.content == 'lazy body'
+    assert gist.content == 'lazy body'
+    assert loads == [1]
+
+
+def test_content_without_loader_keeps_value_given():
+    assert Gist(origin_hydra='test', intent='idea').content == ''
+    assert Gist(origin_hydra='test', intent='idea', content=None).content is None
+    
+    gist = Gist(origin_hydra='test', intent='idea', content_loader=lambda: 'unused')
+    gist.content = None
+    assert gist.content is None
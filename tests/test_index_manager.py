@@ -0,0 +1,338 @@
+"""
+Tests for the JSON and SQLite index managers, and the JSON one shared by several processes.
+"""
+
+import json
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from gist import Gist
+from index_manager import IndexManager
+from sqlite_index import SQLiteIndexManager
+
+
+LINKERS = 4
+LINKS_PER_PROCESS = 11
+
+
+def make_gist(gist_id, parent=None):
+    return Gist(gist_id=gist_id, origin_hydra='test', intent=f'intent {gist_id}',
+                content=f'body {gist_id}', parent_gist=parent)
+
+
+# Ways to open an index in a directory, one per backend and mode
+BACKENDS = {
+    'journaled': lambda directory: IndexManager(directory / 'index.json', journaled=True),
+    'json': lambda directory: IndexManager(directory / 'index.json'),
+    'sqlite': lambda directory: SQLiteIndexManager(directory / 'index.db')
+}
+
+
+@pytest.fixture(params=list(BACKENDS))
+def open_index(request):
+    return BACKENDS[request.param]
+
+
+def link_from_process(index_file, worker, start):
+    """Add this worker's links through its own, long-lived manager."""
+    manager = IndexManager(index_file, journaled=True)
+    start.wait()
+    for n in range(LINKS_PER_PROCESS):
+        manager.link_gists('hub', f'leaf{worker}_{n}', 'related')
+
+
+def links_on_disk(index_file):
+    """Semantic links a fresh manager reads back from index.json and the journal."""
+    return IndexManager(index_file, journaled=True).get_network_stats()['semantic_links']
+
+
+@pytest.mark.parametrize('journaled', [True, False])
+def test_concurrent_links_all_persist(tmp_path, journaled):
+    index_file = tmp_path / 'index.json'
+    manager = IndexManager(index_file, journaled=journaled)
+    with manager.batch():
+        manager.add_gist(make_gist('hub'))
+        for worker in range(LINKERS):
+            for n in range(LINKS_PER_PROCESS):
+                manager.add_gist(make_gist(f'leaf{worker}_{n}'))
+    
+    start = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=link_from_process, args=(index_file, worker, start))
+        for worker in range(LINKERS)
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    
+    assert links_on_disk(index_file) == LINKERS * LINKS_PER_PROCESS
+
+
+def test_evolution_from_stale_manager_persists_edges(tmp_path):
+    index_file = tmp_path / 'index.json'
+    writer = IndexManager(index_file, journaled=True)
+    writer.add_gist(make_gist('other'))
+    stale = IndexManager(index_file, journaled=True)
+    writer.add_gist(make_gist('root'))
+    
+    # The stale manager has read the journal, but not the record adding 'root'
+    stale.add_gist(make_gist('child', parent='root'))
+    
+    reread = IndexManager(index_file, journaled=True)
+    assert reread.get_neighbours('root', 'evolved_to') == ['child']
+    assert reread.get_neighbours('child', 'evolved_from') == ['root']
+    assert reread.get_network_stats()['evolution_chains'] == 1
+
+
+
+def build_network(manager):
+    """A few thoughts, links and an evolution chain, then updates and removals."""
+    with manager.batch():
+        for gist_id in ('a', 'b', 'c', 'd'):
+            manager.add_gist(make_gist(gist_id))
+        manager.add_gist(make_gist('a2', parent='a'))
+        manager.add_gist(make_gist('a3', parent='a2'))
+        manager.link_gists('a', 'b')
+        manager.link_gists('b', 'c', 'supports')
+    
+    done = manager.get_gist('c')
+    done.status = 'complete'
+    manager.update_gist(done)
+    manager.remove_gist('d')
+    manager.remove_gist('a3')
+
+
+def test_counters_stay_exact_through_mutations(tmp_path, open_index):
+    manager = open_index(tmp_path)
+    build_network(manager)
+    
+    stats = manager.get_network_stats()
+    assert stats['status_breakdown'] == {'new': 3, 'complete': 1}
+    assert stats['semantic_links'] == 2
+    assert stats['evolution_chains'] == 1
+    assert manager.verify_network_stats() == {}
+    assert open_index(tmp_path).stat_counters() == manager.stat_counters()
+
+
+def test_counters_read_back_without_recount(tmp_path, monkeypatch, open_index):
+    manager = open_index(tmp_path)
+    build_network(manager)
+    expected = manager.stat_counters()
+    
+    def recount(self, evolution=None):
+        raise AssertionError('counters recounted on open')
+    
+    monkeypatch.setattr(type(manager), '_count_stats', recount)
+    assert open_index(tmp_path).stat_counters() == expected
+
+
+def test_chain_counters_follow_splits_and_joins(tmp_path, open_index):
+    manager = open_index(tmp_path)
+    manager.add_gist(make_gist('a'))
+    for parent, child in (('a', 'b'), ('b', 'c'), ('c', 'd'), ('b', 'e'), ('x', 'y')):
+        manager.add_gist(make_gist(child, parent=parent))
+    assert manager.stat_counters()['evolution_chains'] == 2
+    assert manager.stat_counters()['total_chain_length'] == 7
+    
+    # Removing 'b' leaves a alone and splits c-d from e
+    manager.remove_gist('b')
+    assert manager.stat_counters()['evolution_chains'] == 2
+    assert manager.stat_counters()['total_chain_length'] == 4
+    
+    # Re-adding 'c' below 'y' joins the two chains
+    manager.remove_gist('c')
+    manager.add_gist(make_gist('c', parent='y'))
+    assert manager.get_evolution_chain('c') == ['x', 'y', 'c']
+    assert manager.stat_counters()['evolution_chains'] == 1
+    assert manager.stat_counters()['total_chain_length'] == 3
+    assert manager.verify_network_stats() == {}
+
+
+def test_evolution_queries(tmp_path, open_index):
+    manager = open_index(tmp_path)
+    manager.add_gist(make_gist('root'))
+    for parent, child in (('root', 'a'), ('a', 'a1'), ('root', 'b'), ('a', 'a2')):
+        manager.add_gist(make_gist(child, parent=parent))
+    manager.add_gist(make_gist('loner'))
+    
+    assert manager.get_evolution_chain('a2') == ['root', 'a', 'a1', 'a2', 'b']
+    assert manager.get_lineage('a1') == ['root', 'a', 'a1']
+    assert manager.get_lineage('loner') == ['loner']
+    assert manager.get_evolution_chains() == [['root', 'a', 'a1', 'a2', 'b']]
+    
+    tree = manager.get_evolution_tree('b')
+    assert (tree['gist_id'], tree['depth'], tree['size']) == ('root', 0, 5)
+    a = tree['children'][0]
+    assert (a['gist_id'], a['depth'], a['size']) == ('a', 1, 3)
+    assert [child['gist_id'] for child in a['children']] == ['a1', 'a2']
+    
+    manager.remove_gist('a')
+    assert manager.get_evolution_chain('root') == ['root', 'b']
+    assert manager.get_evolution_chain('a2') == ['a2']
+    assert manager.get_lineage('b') == ['root', 'b']
+
+
+def test_links_and_unlinks(tmp_path, open_index):
+    manager = open_index(tmp_path)
+    for gist_id in ('a', 'b', 'c'):
+        manager.add_gist(make_gist(gist_id))
+    manager.link_gists('a', 'b')
+    manager.link_gists('a', 'b')
+    manager.link_gists('c', 'b', 'supports')
+    
+    assert manager.get_neighbours('a', 'related') == ['b']
+    assert manager.get_neighbours('b', 'reverse_related') == ['a']
+    assert sorted(manager.get_incoming('b')) == ['a', 'c']
+    assert [rel['gist']['gist_id'] for rel in manager.get_related_gists('a')] == ['b']
+    assert manager.get_network_stats()['semantic_links'] == 2
+    with pytest.raises(ValueError):
+        manager.link_gists('a', 'missing')
+    
+    manager.unlink_gists('a', 'b')
+    manager.unlink_gists('a', 'b')
+    assert manager.get_edges('a') == []
+    assert manager.get_neighbours('b', 'reverse_related') == []
+    assert manager.get_network_stats()['semantic_links'] == 1
+    assert open_index(tmp_path).get_neighbours('c', 'supports') == ['b']
+    assert manager.verify_network_stats() == {}
+
+
+def comparable(manager):
+    """Everything the two backends should agree on about a network."""
+    thoughts = manager.query_gists(limit=100)['thoughts']
+    return {
+        'stats': manager.get_network_stats(),
+        'thoughts': sorted((record['gist_id'], record['status']) for record in thoughts),
+        'contents': {record['gist_id']: manager.get_content(record['gist_id']) for record in thoughts},
+        'edges': {
+            record['gist_id']: [(rel['to'], rel['type']) for rel in manager.get_edges(record['gist_id'])]
+            for record in thoughts
+        },
+        'chains': manager.get_evolution_chains(),
+        'tree': manager.get_evolution_tree('a2'),
+        'search': [record['gist_id'] for record in manager.search_thoughts('intent', mode='substring')]
+    }
+
+
+def test_backends_agree(tmp_path):
+    (tmp_path / 'json').mkdir()
+    (tmp_path / 'sqlite').mkdir()
+    managers = [BACKENDS[name](tmp_path / name) for name in ('json', 'sqlite')]
+    for manager in managers:
+        build_network(manager)
+    
+    assert comparable(managers[0]) == comparable(managers[1])
+
+
+def test_migrate_from_json(tmp_path):
+    manager = IndexManager(tmp_path / 'index.json', journaled=True)
+    build_network(manager)
+    
+    migrated = SQLiteIndexManager.migrate_from_json(tmp_path / 'index.json', tmp_path / 'index.db')
+    assert comparable(migrated) == comparable(manager)
+    assert migrated.verify_network_stats() == {}
+    assert migrated.get_gist('a2').content == 'body a2'
+
+
+def write_inline_database(db_file):
+    """A database in the old layout, with thought bodies in thoughts.content."""
+    conn = sqlite3.connect(str(db_file))
+    conn.executescript(
+        'CREATE TABLE thoughts (gist_id TEXT PRIMARY KEY, origin_hydra TEXT, intent TEXT, '
+        'priority INTEGER, content TEXT, parent_gist TEXT, status TEXT, timestamp TEXT, data TEXT NOT NULL);'
+        'CREATE INDEX idx_thoughts_status ON thoughts(status, timestamp);'
+    )
+    for gist_id in ('a', 'b'):
+        record = make_gist(gist_id).to_dict()
+        conn.execute(
+            'INSERT INTO thoughts (gist_id, intent, content, status, timestamp, data) VALUES (?, ?, ?, ?, ?, ?)',
+            (gist_id, record['intent'], record['content'], record['status'], record['timestamp'],
+             json.dumps(record))
+        )
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize('interrupted', [False, True])
+def test_inline_contents_move_to_blobs(tmp_path, interrupted):
+    db_file = tmp_path / 'index.db'
+    write_inline_database(db_file)
+    if interrupted:
+        # Cut short after the old table was renamed
+        conn = sqlite3.connect(str(db_file))
+        conn.execute('DROP INDEX idx_thoughts_status')
+        conn.execute('ALTER TABLE thoughts RENAME TO thoughts_inline')
+        conn.close()
+    
+    manager = SQLiteIndexManager(db_file)
+    columns = [row[1] for row in manager.conn.execute('PRAGMA table_info(thoughts)')]
+    assert 'content' not in columns
+    assert manager.get_content('b') == 'body b'
+    assert manager.get_network_stats()['total_thoughts'] == 2
+    assert [record['gist_id'] for record in manager.search_thoughts('body a')] == ['a']
+    tables = {row[0]: row[1] for row in manager.conn.execute('SELECT name, tbl_name FROM sqlite_master')}
+    assert tables['idx_thoughts_status'] == 'thoughts'
+    assert 'thoughts_inline' not in tables
+
+
+def test_full_text_index_follows_edits(tmp_path):
+    manager = SQLiteIndexManager(tmp_path / 'index.db')
+    if not manager.has_fts:
+        pytest.skip('SQLite built without FTS5')
+    
+    def found(query):
+        return [record['gist_id'] for record in manager.search_thoughts(query)]
+    
+    manager.add_gist(make_gist('a'))
+    manager.add_gist(make_gist('b'))
+    assert sorted(found('intent')) == ['a', 'b']
+    
+    gist = manager.get_gist('a')
+    gist.intent = 'rewritten thought'
+    manager.update_gist(gist)
+    assert found('rewritten') == ['a']
+    assert found('intent') == ['b']
+    
+    manager.remove_gist('b')
+    assert found('intent') == []
+    
+    # A rebuilt index matches the one the triggers kept
+    manager.rebuild_search_index()
+    assert found('rewritten') == ['a']
+
+
+def test_verify_repairs_tampered_counters(tmp_path):
+    index_file = tmp_path / 'index.json'
+    build_network(IndexManager(index_file))
+    
+    index = json.loads(index_file.read_text())
+    index['metadata']['semantic_edges'] = 40
+    index['metadata']['status_breakdown'] = {'new': 9}
+    index_file.write_text(json.dumps(index))
+    
+    manager = IndexManager(index_file)
+    assert manager.get_network_stats()['semantic_links'] == 20
+    drift = manager.verify_network_stats()
+    assert drift == {
+        'semantic_edges': (40, 4),
+        'status_breakdown': ({'new': 9}, {'new': 3, 'complete': 1})
+    }
+    assert IndexManager(index_file).verify_network_stats() == {}
+
+
+def test_verify_repairs_tampered_sqlite_counters(tmp_path):
+    manager = SQLiteIndexManager(tmp_path / 'index.db')
+    build_network(manager)
+    with manager.conn:
+        manager._set_metadata({'semantic_edges': 40, 'evolution_chains': 3})
+    
+    assert manager.verify_network_stats() == {
+        'semantic_edges': (40, 4),
+        'evolution_chains': (3, 1)
+    }
+    assert SQLiteIndexManager(tmp_path / 'index.db').verify_network_stats() == {}
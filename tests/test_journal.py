@@ -0,0 +1,111 @@
+"""
+Tests for the index journal and crash recovery of journaled indexes.
+"""
+
+import os
+import types
+
+import journal
+from index_manager import IndexManager
+from journal import IndexJournal, file_lock
+
+from tests.test_index_manager import make_gist
+
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    journal = IndexJournal(tmp_path / 'index.journal')
+    journal.append([{'op': 'del', 'id': 'a'}, {'op': 'del', 'id': 'b'}])
+    with open(journal.journal_file, 'ab') as f:
+        f.write(b'{"op":"del","id":"c"')  # Crash mid-append
+    
+    reader = IndexJournal(journal.journal_file)
+    assert [record['id'] for record in reader.read()] == ['a', 'b']
+    
+    reader.append([{'op': 'del', 'id': 'd'}])
+    assert [record['id'] for record in IndexJournal(journal.journal_file).read()] == ['a', 'b', 'd']
+    assert b'"c"' not in journal.journal_file.read_bytes()
+
+
+def test_records_replay_after_crash_before_compaction(tmp_path):
+    index_file = tmp_path / 'index.json'
+    manager = IndexManager(index_file, journaled=True)
+    manager.add_gist(make_gist('root'))
+    manager.add_gist(make_gist('child', parent='root'))
+    manager.link_gists('root', 'child')
+    manager.remove_gist('root')
+    del manager  # Dies without ever compacting
+    
+    assert not index_file.exists() or 'child' not in index_file.read_text()
+    
+    reopened = IndexManager(index_file, journaled=True)
+    assert reopened.get_gist('root') is None
+    assert reopened.get_content('child') == 'body child'
+    assert reopened.get_edges('child') == []
+    assert reopened.verify_network_stats() == {}
+
+
+def test_crash_between_snapshot_rename_and_journal_reset(tmp_path):
+    index_file = tmp_path / 'index.json'
+    manager = IndexManager(index_file, journaled=True)
+    manager.add_gist(make_gist('root'))
+    manager.compact()
+    manager.add_gist(make_gist('child', parent='root'))
+    manager.link_gists('root', 'child', 'supports')
+    
+    # The snapshot is renamed into place, but the journal is never reset
+    manager._write_snapshot()
+    
+    reopened = IndexManager(index_file, journaled=True)
+    assert reopened.get_neighbours('root', 'evolved_to') == ['child']
+    assert reopened.get_network_stats()['semantic_links'] == 1
+    assert reopened.verify_network_stats() == {}
+
+
+def test_compaction_starts_journal_with_base_snapshot_id(tmp_path):
+    index_file = tmp_path / 'index.json'
+    writer = IndexManager(index_file, journaled=True)
+    writer.add_gist(make_gist('a'))
+    reader = IndexManager(index_file, journaled=True)
+    
+    writer.add_gist(make_gist('b'))
+    writer.compact()
+    
+    base = IndexJournal(index_file.with_suffix('.journal')).read()
+    snapshot_id = writer.index['metadata']['snapshot_id']
+    assert base == [{'op': 'base', 'snapshot_id': snapshot_id}]
+    
+    # The reader's snapshot was replaced; it reloads rather than replaying onto it
+    writer.add_gist(make_gist('c'))
+    assert reader.refresh()
+    assert reader.index['metadata']['snapshot_id'] == snapshot_id
+    assert sorted(reader.index['thoughts']) == ['a', 'b', 'c']
+
+
+def fake_msvcrt(calls, busy=0):
+    """Stand-in for Windows' msvcrt that records lock calls, failing the first ``busy`` ones."""
+    def locking(fd, mode, nbytes):
+        calls.append((mode, nbytes, os.lseek(fd, 0, os.SEEK_CUR)))
+        if mode == 'lock' and calls.count(calls[-1]) <= busy:
+            raise OSError('locked by another process')
+    return types.SimpleNamespace(LK_LOCK='lock', LK_UNLCK='unlock', locking=locking)
+
+
+def test_windows_lock_waits_for_first_byte(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(journal, 'fcntl', None)
+    monkeypatch.setattr(journal, 'msvcrt', fake_msvcrt(calls, busy=2))
+    
+    with file_lock(tmp_path / 'index.lock'):
+        assert calls == [('lock', 1, 0)] * 3
+    assert calls[-1] == ('unlock', 1, 0)
+
+
+def test_missing_locking_warns_once(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(journal, 'fcntl', None)
+    monkeypatch.setattr(journal, 'msvcrt', None)
+    monkeypatch.setattr(journal, '_lock_warned', False)
+    
+    for _ in range(2):
+        with file_lock(tmp_path / 'index.lock'):
+            pass
+    assert capsys.readouterr().out.count('File locking is not available') == 1
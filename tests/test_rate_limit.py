@@ -0,0 +1,118 @@
+"""
+Tests for rate-limit-aware scheduling against a fake GitHub server.
+"""
+
+import random
+import time
+
+import pytest
+
+from gist import Gist
+from github_client import GitHubClient
+from rate_limit import RateLimitScheduler
+
+from tests.fake_github import FakeGitHub
+
+
+def make_gists(priorities):
+    return [
+        Gist(origin_hydra='test', intent=f'idea {n}', content=f'body {n}', priority=priority)
+        for n, priority in enumerate(priorities)
+    ]
+
+
+@pytest.fixture
+def github():
+    servers = []
+    clients = []
+    
+    def start(limit=None, reset_in=60, **client_options):
+        fake = FakeGitHub(limit=limit, reset_in=reset_in)
+        client = GitHubClient('token', base_url=fake.url, **client_options)
+        servers.append(fake)
+        clients.append(client)
+        return fake, client
+    
+    yield start
+    for client in clients:
+        client.close()
+    for fake in servers:
+        fake.close()
+
+
+def test_observe_paces_to_reported_quota():
+    scheduler = RateLimitScheduler(burst=5)
+    reset = time.time() + 100
+    assert scheduler.observe({'X-RateLimit-Remaining': '50', 'X-RateLimit-Reset': str(reset)}) is None
+    assert scheduler.remaining == 50
+    assert scheduler._capacity() == 5
+    assert 0.45 < scheduler._rate < 0.55
+    
+    # A late response from the same window can't raise the quota again
+    scheduler.observe({'X-RateLimit-Remaining': '80', 'X-RateLimit-Reset': str(reset - 10)})
+    assert scheduler.remaining == 50
+    
+    blocked = scheduler.observe({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)})
+    assert 95 < blocked <= 100
+
+
+def test_requests_are_paced_across_quota_windows(github):
+    fake, client = github(limit=10, reset_in=2, scheduler=RateLimitScheduler(max_wait=30))
+    start = time.monotonic()
+    results = client.create_many(make_gists([5] * 25))
+    
+    assert not [result for result in results if isinstance(result, Exception)]
+    assert len(fake.store) == 25
+    # Three quota windows were needed, and few requests ran into the limit
+    assert time.monotonic() - start >= 2
+    assert fake.statuses().count(403) <= 4
+
+
+def test_blocked_requests_go_out_highest_priority_first(github):
+    fake, client = github(concurrency=1)
+    priorities = list(range(1, 11))
+    random.shuffle(priorities)
+    
+    client.scheduler.block(0.5)
+    results = client.create_many(make_gists(priorities))
+    
+    in_creation_order = sorted(results, key=lambda result: result['id'])
+    sent = [priorities[results.index(result)] for result in in_creation_order]
+    assert sent == sorted(priorities, reverse=True)
+
+
+@pytest.mark.parametrize('status', [403, 429])
+def test_secondary_limit_waits_for_retry_after(github, status):
+    fake, client = github()
+    gist_id = client.create_gist(make_gists([5])[0])['id']
+    
+    fake.fail_next = [(status, {'Retry-After': '1'})]
+    start = time.monotonic()
+    assert client.get_gist(gist_id) is not None
+    assert time.monotonic() - start >= 1
+    assert fake.statuses()[-2:] == [status, 200]
+
+
+def test_server_errors_retry_reads_but_not_writes(github):
+    fake, client = github()
+    gist_id = client.create_gist(make_gists([5])[0])['id']
+    
+    fake.fail_next = [(502, {}), (503, {})]
+    assert client.get_gist(gist_id) is not None
+    assert fake.statuses()[-3:] == [502, 503, 200]
+    
+    fake.fail_next = [(502, {})]
+    with pytest.raises(Exception, match='502'):
+        client.create_gist(make_gists([5])[0])
+    assert len(fake.store) == 1
+
+
+def test_exhausted_quota_with_distant_reset_fails_fast(github):
+    fake, client = github(limit=2, reset_in=1000, scheduler=RateLimitScheduler(max_wait=5))
+    start = time.monotonic()
+    results = client.create_many(make_gists([5] * 5))
+    
+    failed = [result for result in results if isinstance(result, Exception)]
+    assert len(fake.store) == 2
+    assert len(failed) == 3 and all('rate limit' in str(error) for error in failed)
+    assert time.monotonic() - start < 2
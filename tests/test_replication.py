@@ -0,0 +1,273 @@
+"""
+Tests for CRDT replication between gistghost nodes.
+"""
+
+import copy
+import socket
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from gist import Gist
+from index_manager import IndexManager
+from replication import Replica, _merge_edge, recv_message, send_message
+
+
+SECRET = b'test secret'
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def make_gist(n, origin='a', parent=None):
+    return Gist(gist_id=f'g{n}', origin_hydra=origin, intent=f'idea {n}', content=f'body {n}',
+                parent_gist=parent, timestamp=(BASE_TIME + timedelta(minutes=n)).isoformat())
+
+
+def open_nodes(tmp_path, names):
+    managers = {}
+    for name in names:
+        (tmp_path / name).mkdir()
+        managers[name] = IndexManager(tmp_path / name / 'index.json')
+    return managers
+
+
+def contents(manager):
+    """Comparable view of an index: every thought with its intent and edges."""
+    view = {}
+    for record in manager.query_gists(limit=1000)['thoughts']:
+        edges = sorted((rel['to'], rel['type']) for rel in manager.get_edges(record['gist_id']))
+        view[record['gist_id']] = (record['intent'], record.get('parent_gist'), edges)
+    return view
+
+
+def serve_once(replica, address):
+    ready = threading.Event()
+    server = threading.Thread(target=replica.serve, args=(address, SECRET),
+                              kwargs={'once': True, 'ready': ready})
+    server.start()
+    assert ready.wait(10)
+    return server
+
+
+def socket_sync(tmp_path, managers, server_name, client_name):
+    address = str(tmp_path / 'sync.sock')
+    server = serve_once(Replica(managers[server_name], tmp_path / server_name), address)
+    merged = Replica(managers[client_name], tmp_path / client_name).sync_socket(address, SECRET)
+    server.join(10)
+    return merged
+
+
+needs_unix_sockets = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='needs Unix sockets')
+
+
+@needs_unix_sockets
+def test_two_nodes_converge_over_socket(tmp_path):
+    nodes = open_nodes(tmp_path, 'ab')
+    nodes['a'].add_gist(make_gist(1))
+    nodes['a'].add_gist(make_gist(2, parent='g1'))
+    nodes['a'].link_gists('g1', 'g2', 'related')
+    nodes['b'].add_gist(make_gist(3, origin='b'))
+    
+    socket_sync(tmp_path, nodes, 'a', 'b')
+    
+    assert contents(nodes['a']) == contents(nodes['b'])
+    assert set(contents(nodes['a'])) == {'g1', 'g2', 'g3'}
+    assert ('g2', 'related') in contents(nodes['b'])['g1'][2]
+    assert nodes['b'].get_neighbours('g1', 'evolved_to') == ['g2']
+
+
+def test_three_nodes_converge_through_exchange(tmp_path):
+    nodes = open_nodes(tmp_path, 'abc')
+    exchange = tmp_path / 'exchange'
+    nodes['a'].add_gist(make_gist(1))
+    nodes['b'].add_gist(make_gist(2, origin='b'))
+    nodes['c'].add_gist(make_gist(3, origin='c'))
+    
+    def sync_all():
+        for _ in range(2):
+            for name, manager in nodes.items():
+                Replica(manager, tmp_path / name).sync_file(exchange)
+    
+    sync_all()
+    assert contents(nodes['a']) == contents(nodes['b']) == contents(nodes['c'])
+    
+    # Concurrent edits of one thought, a removal and a new link on different nodes
+    for name in 'ab':
+        gist = nodes[name].get_gist('g3')
+        gist.intent = f'edited on {name}'
+        nodes[name].update_gist(gist)
+    nodes['c'].remove_gist('g2')
+    nodes['b'].link_gists('g3', 'g1', 'builds-on')
+    sync_all()
+    
+    views = [contents(nodes[name]) for name in 'abc']
+    assert views[0] == views[1] == views[2]
+    assert set(views[0]) == {'g1', 'g3'}
+    assert views[0]['g3'][0] in ('edited on a', 'edited on b')
+    assert ('g1', 'builds-on') in views[0]['g3'][2]
+
+
+def test_link_added_concurrently_with_removal_survives(tmp_path):
+    nodes = open_nodes(tmp_path, 'ab')
+    exchange = tmp_path / 'exchange'
+    for n in (1, 2):
+        nodes['a'].add_gist(make_gist(n))
+    nodes['a'].link_gists('g1', 'g2', 'related')
+    replicas = {name: Replica(nodes[name], tmp_path / name) for name in 'ab'}
+    for _ in range(2):
+        for replica in replicas.values():
+            replica.sync_file(exchange)
+    
+    # b drops the link; a drops it too, syncs, and then links again
+    nodes['b'].unlink_gists('g1', 'g2', 'related')
+    nodes['a'].unlink_gists('g1', 'g2', 'related')
+    replicas['a'].sync_file(exchange)
+    nodes['a'].link_gists('g1', 'g2', 'related')
+    replicas['a'].sync_file(exchange)
+    
+    # b's removal never saw a's new link, so the link wins
+    for _ in range(2):
+        for replica in replicas.values():
+            replica.sync_file(exchange)
+    
+    assert contents(nodes['a']) == contents(nodes['b'])
+    assert ('g2', 'related') in contents(nodes['b'])['g1'][2]
+
+
+def test_removed_link_stays_removed_on_every_node(tmp_path):
+    nodes = open_nodes(tmp_path, 'ab')
+    exchange = tmp_path / 'exchange'
+    for n in (1, 2):
+        nodes['a'].add_gist(make_gist(n))
+    nodes['a'].link_gists('g1', 'g2', 'related')
+    replicas = {name: Replica(nodes[name], tmp_path / name) for name in 'ab'}
+    
+    def sync_all():
+        for _ in range(2):
+            for replica in replicas.values():
+                replica.sync_file(exchange)
+    
+    sync_all()
+    assert nodes['b'].get_neighbours('g1', 'related') == ['g2']
+    
+    nodes['a'].unlink_gists('g1', 'g2', 'related')
+    sync_all()
+    sync_all()
+    
+    for name in 'ab':
+        assert contents(nodes[name])['g1'][2] == []
+        assert contents(nodes[name])['g2'][2] == []
+        assert nodes[name].verify_network_stats() == {}
+
+
+def test_edge_merge_is_commutative_associative_and_idempotent():
+    x = {'adds': [['a', 1]], 'removed': [], 'removals': []}
+    y = {'adds': [], 'removed': [['a', 1]], 'removals': [['b', 2]]}
+    z = {'adds': [['c', 3]], 'removed': [], 'removals': []}
+    
+    assert _merge_edge(x, y) == _merge_edge(y, x)
+    assert _merge_edge(_merge_edge(x, y), z) == _merge_edge(x, _merge_edge(y, z))
+    assert _merge_edge(x, x) == _merge_edge(x, {'adds': [], 'removed': [], 'removals': []})
+    # The removal only cancels the add it saw; the concurrent add survives
+    assert _merge_edge(_merge_edge(x, y), z)['adds'] == [['c', 3]]
+
+
+def test_merging_a_delta_twice_changes_nothing(tmp_path):
+    nodes = open_nodes(tmp_path, 'ab')
+    nodes['a'].add_gist(make_gist(1))
+    source = Replica(nodes['a'], tmp_path / 'a')
+    source.observe()
+    delta = source.delta({})
+    
+    target = Replica(nodes['b'], tmp_path / 'b')
+    assert target.merge(copy.deepcopy(delta)) == 1
+    assert target.merge(copy.deepcopy(delta)) == 0
+    assert contents(nodes['a']) == contents(nodes['b'])
+
+
+@needs_unix_sockets
+def test_wrong_secret_is_rejected_before_any_data(tmp_path):
+    nodes = open_nodes(tmp_path, 'ab')
+    nodes['a'].add_gist(make_gist(1))
+    address = str(tmp_path / 'sync.sock')
+    server = serve_once(Replica(nodes['a'], tmp_path / 'a'), address)
+    
+    with pytest.raises(ConnectionError):
+        Replica(nodes['b'], tmp_path / 'b').sync_socket(address, b'wrong secret')
+    server.join(10)
+    assert contents(nodes['b']) == {}
+
+
+@needs_unix_sockets
+def test_unauthenticated_peer_gets_no_delta(tmp_path):
+    nodes = open_nodes(tmp_path, 'a')
+    nodes['a'].add_gist(make_gist(1))
+    address = str(tmp_path / 'sync.sock')
+    server = serve_once(Replica(nodes['a'], tmp_path / 'a'), address)
+    
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(10)
+        conn.connect(address)
+        recv_message(conn)  # The server's challenge
+        send_message(conn, {'nonce': '00' * 32})
+        recv_message(conn)  # The server's own proof
+        send_message(conn, {'proof': 'forged'})
+        # The server hangs up instead of reading a version vector
+        assert conn.recv(1) == b''
+    server.join(10)
+
+
+def test_serving_needs_a_secret_and_a_local_address(tmp_path):
+    replica = Replica(open_nodes(tmp_path, 'a')['a'], tmp_path / 'a')
+    with pytest.raises(ValueError):
+        replica.serve(('127.0.0.1', 0), b'', once=True)
+    with pytest.raises(ValueError):
+        replica.serve(('0.0.0.0', 0), SECRET, once=True)
+
+
+def test_deltas_merge_to_the_same_state_in_any_order(tmp_path):
+    nodes = open_nodes(tmp_path, 'abcxy')
+    nodes['a'].add_gist(make_gist(1))
+    nodes['b'].add_gist(make_gist(2, origin='b', parent='g1'))
+    nodes['b'].add_gist(make_gist(1, origin='b'))
+    nodes['c'].add_gist(make_gist(3, origin='c'))
+    nodes['c'].add_gist(make_gist(1, origin='c'))
+    nodes['c'].link_gists('g3', 'g1', 'supports')
+    
+    deltas = []
+    for name in 'abc':
+        replica = Replica(nodes[name], tmp_path / name)
+        replica.observe()
+        deltas.append(replica.delta({}))
+    
+    for name, order in (('x', deltas), ('y', deltas[::-1])):
+        replica = Replica(nodes[name], tmp_path / name)
+        for delta in order:
+            replica.merge(copy.deepcopy(delta))
+    
+    assert contents(nodes['x']) == contents(nodes['y'])
+    assert set(contents(nodes['x'])) == {'g1', 'g2', 'g3'}
+    assert ('g1', 'supports') in contents(nodes['x'])['g3'][2]
+
+
+def test_later_removal_beats_earlier_edit(tmp_path):
+    nodes = open_nodes(tmp_path, 'ab')
+    exchange = tmp_path / 'exchange'
+    nodes['a'].add_gist(make_gist(1))
+    replicas = {name: Replica(nodes[name], tmp_path / name) for name in 'ab'}
+    for _ in range(2):
+        for replica in replicas.values():
+            replica.sync_file(exchange)
+    
+    # a's edit is synced first, so b's removal is stamped after it
+    gist = nodes['a'].get_gist('g1')
+    gist.intent = 'edited'
+    nodes['a'].update_gist(gist)
+    replicas['a'].sync_file(exchange)
+    replicas['b'].sync_file(exchange)
+    nodes['b'].remove_gist('g1')
+    for _ in range(2):
+        for replica in replicas.values():
+            replica.sync_file(exchange)
+    
+    assert contents(nodes['a']) == contents(nodes['b']) == {}
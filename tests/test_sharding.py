@@ -0,0 +1,80 @@
+"""
+Tests for the index sharded by origin_hydra.
+"""
+
+from datetime import datetime, timedelta
+
+from gist import Gist
+from index_manager import IndexManager
+from sharding import ShardedIndexManager
+
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def make_gist(n, origin, parent=None):
+    return Gist(gist_id=f'g{n}', origin_hydra=origin, intent=f'idea {n}', content=f'body {n}',
+                parent_gist=parent, timestamp=(BASE_TIME + timedelta(minutes=n)).isoformat())
+
+
+def open_sharded(tmp_path, origins=None):
+    return ShardedIndexManager(tmp_path / 'shards', lambda directory: IndexManager(directory / 'index.json'),
+                               origins=origins)
+
+
+def test_evolutions_join_their_parents_shard(tmp_path):
+    index = open_sharded(tmp_path)
+    index.add_gist(make_gist(1, 'alpha'))
+    index.add_gist(make_gist(2, 'beta', parent='g1'))
+    index.add_gist(make_gist(3, 'beta'))
+    
+    assert index.shard_origins() == ['alpha', 'beta']
+    assert sorted(index.shard('alpha').index['thoughts']) == ['g1', 'g2']
+    assert sorted(index.shard('beta').index['thoughts']) == ['g3']
+    assert index.get_evolution_chain('g1') == ['g1', 'g2']
+
+
+def test_cross_shard_links_and_removal(tmp_path):
+    index = open_sharded(tmp_path)
+    index.add_gist(make_gist(1, 'alpha'))
+    index.add_gist(make_gist(2, 'beta'))
+    index.link_gists('g1', 'g2', 'supports')
+    
+    assert [related['gist']['gist_id'] for related in index.get_related_gists('g1')] == ['g2']
+    assert index.get_neighbours('g2', 'reverse_supports') == ['g1']
+    
+    index.remove_gist('g2')
+    assert index.get_edges('g1') == []
+    assert open_sharded(tmp_path).get_edges('g1') == []
+
+
+def test_queries_page_through_all_shards_newest_first(tmp_path):
+    index = open_sharded(tmp_path)
+    with index.batch():
+        for n in range(12):
+            index.add_gist(make_gist(n, ('alpha', 'beta', 'gamma')[n % 3]))
+    
+    seen = []
+    cursor = None
+    while True:
+        page = index.query_gists(limit=5, cursor=cursor)
+        seen.extend(record['gist_id'] for record in page['thoughts'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert seen == [f'g{n}' for n in reversed(range(12))]
+    
+    stats = index.get_network_stats()
+    assert stats['total_thoughts'] == 12
+    assert index.verify_network_stats() == {}
+
+
+def test_restricted_node_opens_only_its_shards(tmp_path):
+    index = open_sharded(tmp_path)
+    index.add_gist(make_gist(1, 'alpha'))
+    index.add_gist(make_gist(2, 'beta'))
+    
+    local = open_sharded(tmp_path, origins=['alpha'])
+    assert [record['gist_id'] for record in local.list_gists()] == ['g1']
+    assert local.get_gist('g2') is None
+    assert list(local.shards) == ['alpha']
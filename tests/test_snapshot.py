@@ -0,0 +1,68 @@
+"""
+Tests for the binary index snapshot and its fallback to index.json.
+"""
+
+import pickle
+from collections import OrderedDict
+
+import index_manager
+from index_manager import IndexManager
+from journal import file_signature
+from snapshot import _HEADER, read_snapshot, write_snapshot
+
+from tests.test_index_manager import make_gist
+
+
+def open_binary(tmp_path):
+    return IndexManager(tmp_path / 'index.json', snapshot_format='binary')
+
+
+def forbid_json_parse(monkeypatch):
+    def parse(f):
+        raise AssertionError('index.json was parsed')
+    monkeypatch.setattr(index_manager.json, 'load', parse)
+
+
+def test_matching_snapshot_skips_json_parse(tmp_path, monkeypatch):
+    manager = open_binary(tmp_path)
+    manager.add_gist(make_gist('a'))
+    manager.link_gists('a', 'a', 'related')
+    
+    forbid_json_parse(monkeypatch)
+    reopened = open_binary(tmp_path)
+    assert reopened.get_content('a') == 'body a'
+    assert reopened.index == manager.index
+
+
+def test_index_written_by_json_manager_is_read_instead(tmp_path):
+    open_binary(tmp_path).add_gist(make_gist('a'))
+    IndexManager(tmp_path / 'index.json').add_gist(make_gist('b'))
+    
+    reopened = open_binary(tmp_path)
+    assert sorted(reopened.index['thoughts']) == ['a', 'b']
+    # The stale snapshot was replaced on the way
+    assert read_snapshot(tmp_path / 'index.snapshot', file_signature(tmp_path / 'index.json')) is not None
+
+
+def test_damaged_snapshot_falls_back_to_json(tmp_path):
+    open_binary(tmp_path).add_gist(make_gist('a'))
+    snapshot_file = tmp_path / 'index.snapshot'
+    data = snapshot_file.read_bytes()
+    snapshot_file.write_bytes(data[:len(data) // 2])
+    
+    assert sorted(open_binary(tmp_path).index['thoughts']) == ['a']
+
+
+def test_snapshot_never_rebuilds_objects(tmp_path):
+    index_file = tmp_path / 'index.json'
+    index_file.write_text('{}')
+    signature = file_signature(index_file)
+    snapshot_file = tmp_path / 'index.snapshot'
+    write_snapshot(snapshot_file, {'thoughts': {}, 'relationships': {}, 'metadata': {}}, signature)
+    assert read_snapshot(snapshot_file, signature) is not None
+    
+    header = snapshot_file.read_bytes()[:_HEADER.size]
+    snapshot_file.write_bytes(header + pickle.dumps(
+        {'thoughts': OrderedDict(), 'relationships': {}, 'metadata': {}}
+    ))
+    assert read_snapshot(snapshot_file, signature) is None
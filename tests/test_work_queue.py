@@ -0,0 +1,131 @@
+"""
+Tests for the work queue leasing new thoughts to workers.
+"""
+
+import multiprocessing
+
+import pytest
+
+from gist import Gist
+from index_manager import IndexManager
+from work_queue import WorkQueue
+
+
+WORKERS = 4
+THOUGHTS = 40
+
+
+def add_thought(manager, gist_id, priority=5, timestamp=None):
+    manager.add_gist(Gist(gist_id=gist_id, origin_hydra='test', intent=gist_id,
+                          priority=priority, timestamp=timestamp))
+
+
+def open_queue(tmp_path, lease_seconds=300):
+    manager = IndexManager(tmp_path / 'index.json', journaled=True)
+    return WorkQueue(manager, tmp_path / 'queue', lease_seconds=lease_seconds)
+
+
+def lease_all(tmp_path, worker, start, results):
+    """Lease and complete thoughts from this process until the queue runs dry."""
+    queue = open_queue(tmp_path)
+    start.wait()
+    while True:
+        lease = queue.lease(worker=str(worker))
+        if lease is None:
+            return
+        assert queue.complete(lease['gist_id'], lease['token'])
+        results.put(lease['gist_id'])
+
+
+def test_leases_by_priority_then_age(tmp_path):
+    queue = open_queue(tmp_path)
+    add_thought(queue.index_manager, 'old', timestamp='2024-01-01T00:00:00')
+    add_thought(queue.index_manager, 'young', timestamp='2024-06-01T00:00:00')
+    add_thought(queue.index_manager, 'urgent', priority=9, timestamp='2024-09-01T00:00:00')
+    
+    order = [queue.lease()['gist_id'] for _ in range(3)]
+    assert order == ['urgent', 'old', 'young']
+    assert queue.lease() is None
+    assert queue.index_manager.get_record('old')['status'] == 'processing'
+
+
+def test_complete_and_release(tmp_path):
+    queue = open_queue(tmp_path)
+    add_thought(queue.index_manager, 'a')
+    
+    lease = queue.lease()
+    assert not queue.complete('a', 'not-the-token')
+    assert queue.release('a', lease['token'])
+    assert queue.index_manager.get_record('a')['status'] == 'new'
+    assert not queue.complete('a', lease['token'])
+    
+    lease = queue.lease()
+    assert lease['gist_id'] == 'a'
+    assert queue.complete('a', lease['token'])
+    assert queue.index_manager.get_record('a')['status'] == 'complete'
+    assert queue.stats() == {'queued': 0, 'leased': 0}
+
+
+def test_expired_lease_is_reclaimed_and_token_revoked(tmp_path):
+    queue = open_queue(tmp_path)
+    add_thought(queue.index_manager, 'a')
+    
+    stale = queue.lease(worker='slow', seconds=0)
+    assert queue.reclaim() == ['a']
+    assert queue.index_manager.get_record('a')['status'] == 'new'
+    
+    fresh = queue.lease(worker='fast')
+    assert fresh['gist_id'] == 'a'
+    assert not queue.complete('a', stale['token'])
+    assert not queue.renew('a', stale['token'])
+    assert queue.complete('a', fresh['token'])
+
+
+def test_released_thought_reaches_other_queue(tmp_path):
+    first = open_queue(tmp_path)
+    second = open_queue(tmp_path)
+    add_thought(first.index_manager, 'a')
+    add_thought(first.index_manager, 'b', priority=1)
+    
+    lease = first.lease()
+    assert second.lease()['gist_id'] == 'b'
+    assert first.release('a', lease['token'])
+    assert second.lease()['gist_id'] == 'a'
+
+
+def test_concurrent_workers_lease_each_thought_once(tmp_path):
+    manager = IndexManager(tmp_path / 'index.json', journaled=True)
+    with manager.batch():
+        for n in range(THOUGHTS):
+            add_thought(manager, f'thought{n}', priority=n % 10 + 1)
+    
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=lease_all, args=(tmp_path, worker, start, results))
+        for worker in range(WORKERS)
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    leased = [results.get(timeout=60) for _ in range(THOUGHTS)]
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    
+    assert sorted(leased) == sorted(f'thought{n}' for n in range(THOUGHTS))
+    assert IndexManager(tmp_path / 'index.json').get_network_stats()['completed_thoughts'] == THOUGHTS
+
+
+def test_complete_only_accepts_final_statuses(tmp_path):
+    queue = open_queue(tmp_path)
+    add_thought(queue.index_manager, 'a')
+    lease = queue.lease()
+    
+    for status in ('new', 'processing', 'bogus'):
+        with pytest.raises(ValueError):
+            queue.complete('a', lease['token'], status=status)
+    assert queue.index_manager.get_record('a')['status'] == 'processing'
+    
+    assert queue.complete('a', lease['token'], status='evolving')
+    assert queue.index_manager.get_record('a')['status'] == 'evolving'